@@ -0,0 +1,222 @@
+"""Batched variable x target correlations, overall and per group.
+
+``corr_table`` computes the correlation of every variable with one target
+(pitch speed) for every group (playing level) at once. Missing values are
+handled pairwise, like ``df[[var, target]].dropna().corr()``: each
+(group, variable) cell uses only the rows where both the variable and the
+target are present.
+
+Resampling is vectorized over resamples:
+
+* bootstrap confidence intervals draw whole pitches with replacement inside
+  each group and express every resample as a row of multiplicity weights,
+  so all resamples x variables are a handful of matrix products (spearman
+  re-ranks every resample: all variables x resamples are ranked as one
+  stacked array from cumulative weights in sorted order);
+* permutation p-values shuffle the target inside each group with one
+  (resamples x rows) index matrix per cell and a single matrix-vector
+  product for all resampled correlations.
+"""
+import numpy as np
+import pandas as pd
+
+METHODS = ("pearson", "spearman")
+
+
+def _group_ids(df, by):
+    if by is None:
+        return np.zeros(len(df), dtype=int), np.array(["all"], dtype=object)
+    codes, labels = pd.factorize(df[by])  # order of first appearance, NaN -> -1
+    return np.asarray(codes), np.asarray(labels, dtype=object)
+
+
+def _onehot(gid, n_groups):
+    G = np.zeros((len(gid), n_groups))
+    ok = gid >= 0
+    G[np.flatnonzero(ok), gid[ok]] = 1.0
+    return G
+
+
+def _pearson_from_sums(n, sx, sy, sxx, syy, sxy):
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = n * sxy - sx * sy
+        var = (n * sxx - sx * sx) * (n * syy - sy * sy)
+        r = cov / np.sqrt(var)
+    return np.clip(r, -1.0, 1.0)
+
+
+def _pairwise_ranks(X, Y, M, gid):
+    """Average-tie ranks of X and Y inside each group, per column, over the
+    pairwise-complete rows only (other cells NaN)."""
+    ok = gid >= 0
+    rank = lambda A: pd.DataFrame(np.where(M[ok], A[ok], np.nan)).groupby(gid[ok]).rank(method="average").to_numpy()
+    rx, ry = np.full(X.shape, np.nan), np.full(X.shape, np.nan)
+    rx[ok], ry[ok] = rank(X), rank(Y)
+    return rx, ry
+
+
+def _rank_index(values, mask):
+    """Lookup tables for weighted average-tie ranks of every column of
+    ``values`` (rows x cols) over the rows in ``mask``.
+
+    Returns ``src``, the row behind every sorted position (rows outside
+    ``mask`` sort last and point at row ``n``, an all-zero weight row), and
+    ``lo``/``hi``, per row the flat index into the (rows + 1) x cols
+    cumulative weights just before and at the end of its tie block. Rows
+    outside ``mask`` index the leading zero row.
+    """
+    n, k = values.shape
+    v = np.where(mask, values, np.inf)
+    order = np.argsort(v, axis=0, kind="stable")
+    sv = np.take_along_axis(v, order, axis=0)
+    pos = np.arange(n)[:, None]
+    new = np.ones(v.shape, dtype=bool)
+    new[1:] = sv[1:] != sv[:-1]
+    end = np.ones(v.shape, dtype=bool)
+    end[:-1] = new[1:]
+    first = np.maximum.accumulate(np.where(new, pos, 0), axis=0)
+    last = np.minimum.accumulate(np.where(end, pos, n)[::-1], axis=0)[::-1] + 1
+    inv = np.empty_like(order)
+    np.put_along_axis(inv, order, np.broadcast_to(pos, order.shape), axis=0)
+    flat = lambda p: (np.where(mask, np.take_along_axis(p, inv, axis=0), 0) * k + np.arange(k)).ravel()
+    src = np.where(np.take_along_axis(mask, order, axis=0), order, n)
+    return src, flat(first), flat(last)
+
+
+def _resample_ranks(Wt, index):
+    """2 * rank - 1 of every (row, column) in every resample, stacked as
+    (rows x cols x resamples); 0 outside the mask.
+
+    ``Wt`` is (rows + 1) x resamples multiplicities ending in a zero row. An
+    observation drawn k times occupies k consecutive ranks, so ties and
+    repeats both get the mean rank of their block: half the cumulative
+    weight before plus through the block, plus 1/2.
+    """
+    src, lo, hi = index
+    cs = np.empty((len(src) + 1,) + src.shape[1:] + Wt.shape[1:])
+    cs[0] = 0.0
+    np.cumsum(Wt[src], axis=0, out=cs[1:])
+    cs = cs.reshape(-1, Wt.shape[1])
+    u = cs.take(lo, axis=0)
+    u += cs.take(hi, axis=0)
+    return u.reshape(src.shape + Wt.shape[1:])
+
+
+def _spearman_bootstrap(X, Y, M, W, block=1_000_000):
+    """Spearman r of every column of X vs Y (rows x cols, pairwise mask M) in
+    every resample of W (resamples x rows), as (resamples x cols).
+
+    All columns and resamples are ranked together, ``block`` cells at a
+    time. Pearson r is unchanged by the affine map rank -> 2 * rank - 1, so
+    the ranks go straight into the weighted sums, where each resample's
+    weighted sum of 2 * rank - 1 over its N draws is N ** 2.
+    """
+    n, k = M.shape
+    ix, iy = _rank_index(X, M), _rank_index(Y, M)
+    N = W @ M
+    sxx, syy, sxy = (np.empty(N.shape) for _ in range(3))
+    step = max(1, block // max(n * k, 1))
+    for s in range(0, len(W), step):
+        Wb = W[s:s + step]
+        Wt = np.zeros((n + 1, len(Wb)))
+        Wt[:n] = Wb.T
+        ux, uy = _resample_ranks(Wt, ix), _resample_ranks(Wt, iy)
+        wy = uy * Wt[:n, None, :]
+        sxy[s:s + step] = np.einsum("ijb,ijb->bj", ux, wy)
+        syy[s:s + step] = np.einsum("ijb,ijb->bj", uy, wy)
+        sxx[s:s + step] = np.einsum("ijb,ijb,ib->bj", ux, ux, Wt[:n])
+    return _pearson_from_sums(N, N * N, N * N, sxx, syy, sxy)
+
+
+def _bootstrap_counts(rng, n_boot, n_rows):
+    draws = rng.integers(0, n_rows, size=(n_boot, n_rows)) + (np.arange(n_boot) * n_rows)[:, None]
+    return np.bincount(draws.ravel(), minlength=n_boot * n_rows).reshape(n_boot, n_rows).astype(float)
+
+
+def corr_table(df, variables, target, by=None, method="pearson", min_n=3,
+               n_boot=0, n_perm=0, ci=0.95, seed=None):
+    """Correlation of every column in ``variables`` with ``target``.
+
+    Returns one row per (group, variable) with columns ``group`` (only when
+    ``by`` is given), ``variable``, ``r`` and ``n`` (pairwise-complete rows);
+    ``ci_low``/``ci_high`` when ``n_boot`` > 0 and ``p_perm`` when ``n_perm``
+    > 0. ``r`` is NaN for cells with fewer than ``min_n`` rows. Groups follow
+    their order of first appearance in ``df``; rows with a missing group are
+    ignored.
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+    variables = list(variables)
+    X = df[variables].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+    y = pd.to_numeric(df[target], errors="coerce").to_numpy(dtype=float)
+    Y = np.broadcast_to(y[:, None], X.shape)
+    M = ~np.isnan(X) & ~np.isnan(Y)
+
+    gid, groups = _group_ids(df, by)
+    n_groups = len(groups)
+    M &= (gid >= 0)[:, None]  # rows without a group take no part
+    if method == "spearman":
+        X, Y = _pairwise_ranks(X, Y, M, gid)
+
+    # Point estimates for all groups x variables: centre each cell on its own
+    # pairwise-complete mean, then one set of matrix products.
+    G = _onehot(gid, n_groups)
+    n = G.T @ M
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mx = (G.T @ np.where(M, X, 0.0)) / n
+        my = (G.T @ np.where(M, Y, 0.0)) / n
+    safe_gid = np.where(gid >= 0, gid, 0)
+    Xc = np.where(M, X - mx[safe_gid], 0.0)
+    Yc = np.where(M, Y - my[safe_gid], 0.0)
+    r = _pearson_from_sums(n, 0.0, 0.0, G.T @ (Xc * Xc), G.T @ (Yc * Yc), G.T @ (Xc * Yc))
+    r[n < min_n] = np.nan
+
+    ci_low = np.full(r.shape, np.nan)
+    ci_high = np.full(r.shape, np.nan)
+    p_perm = np.full(r.shape, np.nan)
+    rng = np.random.default_rng(seed)
+    tail = (1.0 - ci) / 2.0 * 100.0
+
+    for g in range(n_groups):
+        rows = np.flatnonzero(gid == g)
+        Mg = M[rows]
+
+        if n_boot > 0 and len(rows):
+            W = _bootstrap_counts(rng, n_boot, len(rows))
+            if method == "pearson":
+                xg, yg = Xc[rows], Yc[rows]
+                boot = _pearson_from_sums(W @ Mg, W @ xg, W @ yg, W @ (xg * xg), W @ (yg * yg), W @ (xg * yg))
+                boot[(W @ Mg) < min_n] = np.nan
+            else:
+                boot = _spearman_bootstrap(X[rows], Y[rows], Mg, W)
+                boot[:, n[g] < min_n] = np.nan
+                boot[(W @ Mg) < min_n] = np.nan
+            enough = np.isfinite(boot).sum(axis=0) > 0
+            if enough.any():
+                lo, hi = np.nanpercentile(boot[:, enough], [tail, 100.0 - tail], axis=0)
+                ci_low[g, enough], ci_high[g, enough] = lo, hi
+
+        if n_perm > 0:
+            for j in np.flatnonzero(np.isfinite(r[g])):
+                keep = rows[Mg[:, j]]
+                a = Xc[keep, j] / np.sqrt(np.sum(Xc[keep, j] ** 2))
+                b = Yc[keep, j] / np.sqrt(np.sum(Yc[keep, j] ** 2))
+                perms = rng.permuted(np.tile(np.arange(len(keep)), (n_perm, 1)), axis=1)
+                null = b[perms] @ a
+                hits = np.sum(np.abs(null) >= abs(r[g, j]) - 1e-12)
+                p_perm[g, j] = (1.0 + hits) / (n_perm + 1.0)
+
+    out = pd.DataFrame({
+        "group": np.repeat(groups, len(variables)),
+        "variable": np.tile(variables, n_groups),
+        "r": r.ravel(),
+        "n": n.astype(int).ravel(),
+    })
+    if n_boot > 0:
+        out["ci_low"] = ci_low.ravel()
+        out["ci_high"] = ci_high.ravel()
+    if n_perm > 0:
+        out["p_perm"] = p_perm.ravel()
+    if by is None:
+        out = out.drop(columns="group")
+    return out
@@ -0,0 +1,175 @@
+"""Columnar, memory-mapped cache for the full_sig CSV files.
+
+The first time a CSV is requested it is parsed once, sorted (stably) by
+``session_pitch`` and written as one ``.npy`` file per column next to a
+``manifest.json`` and a ``session_pitch`` -> row-range index:
+
+    <cache_dir>/<csv stem>/manifest.json
+    <cache_dir>/<csv stem>/<column>.npy
+    <cache_dir>/<csv stem>/_index_starts.npy, _index_stops.npy
+
+Later loads memory-map only the requested columns. The cache is rebuilt
+automatically when the source CSV's size or mtime no longer matches the
+manifest. Text columns are stored as integer codes plus a label table so
+every column file can be memory-mapped (no pickled object arrays).
+"""
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 1
+DEFAULT_CACHE_DIR = ".npy_cache"
+
+
+def _source_stamp(csv_path):
+    st = Path(csv_path).stat()
+    return {"path": str(Path(csv_path).resolve()), "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _column_file(name):
+    # Column names in full_sig are plain identifiers, but keep file names safe anyway.
+    return "".join(ch if ch.isalnum() or ch in "_-." else "_" for ch in name) + ".npy"
+
+
+class CachedTable:
+    """A converted CSV: memory-mapped columns plus the session_pitch index."""
+
+    def __init__(self, folder, manifest):
+        self.folder = Path(folder)
+        self.manifest = manifest
+        self.key = manifest["key"]
+        self.n_rows = manifest["n_rows"]
+
+    @property
+    def columns(self):
+        return list(self.manifest["columns"])
+
+    @property
+    def keys(self):
+        """Index labels (sorted), one per contiguous key block."""
+        return np.asarray(self.manifest["index_keys"], dtype=object)
+
+    @property
+    def starts(self):
+        return np.load(self.folder / "_index_starts.npy")
+
+    @property
+    def stops(self):
+        return np.load(self.folder / "_index_stops.npy")
+
+    def row_range(self, key_value):
+        """(start, stop) rows of one ``session_pitch`` in the cached order."""
+        if not hasattr(self, "_positions"):
+            self._positions = {k: i for i, k in enumerate(self.manifest["index_keys"])}
+        pos = self._positions[str(key_value)]
+        return int(self.starts[pos]), int(self.stops[pos])
+
+    def column(self, name, mmap=True):
+        info = self.manifest["columns"][name]
+        arr = np.load(self.folder / info["file"], mmap_mode="r" if mmap else None)
+        if "labels" in info:
+            labels = np.asarray(info["labels"] + [np.nan], dtype=object)
+            return labels[np.asarray(arr)]  # code -1 -> NaN
+        return arr
+
+    def frame(self, columns=None, rows=None):
+        """DataFrame of ``columns`` (all by default), optionally a row slice."""
+        names = self.columns if columns is None else list(dict.fromkeys(columns))
+        missing = [c for c in names if c not in self.manifest["columns"]]
+        if missing:
+            raise KeyError(f"Columns not in {self.manifest['source']['path']}: {missing}")
+        data = {}
+        for name in names:
+            arr = self.column(name)
+            data[name] = arr if rows is None else arr[rows]
+        return pd.DataFrame(data, copy=False)
+
+
+def _convert(csv_path, folder, key):
+    df = pd.read_csv(csv_path)
+    if key in df.columns:
+        codes, _ = pd.factorize(df[key], sort=True)
+        codes = np.where(codes < 0, np.iinfo(np.int64).max, codes)  # missing keys last
+        df = df.iloc[np.argsort(codes, kind="stable")].reset_index(drop=True)
+
+    tmp = folder.with_name(folder.name + ".tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    columns = {}
+    for name in df.columns:
+        col = df[name]
+        info = {"file": _column_file(name)}
+        if pd.api.types.is_numeric_dtype(col) or pd.api.types.is_bool_dtype(col):
+            np.save(tmp / info["file"], col.to_numpy())
+        else:
+            codes, labels = pd.factorize(col, sort=True)
+            np.save(tmp / info["file"], codes.astype(np.int32))
+            info["labels"] = [str(v) for v in labels]
+        columns[name] = info
+
+    index_keys, starts, stops = [], np.array([], int), np.array([], int)
+    if key in df.columns:
+        keys = df[key]
+        valid = keys.notna().to_numpy()
+        k = keys[valid].astype(str).to_numpy()
+        if len(k):
+            starts = np.flatnonzero(np.r_[True, k[1:] != k[:-1]])
+            stops = np.append(starts[1:], len(k))
+            index_keys = k[starts].tolist()
+    np.save(tmp / "_index_starts.npy", starts)
+    np.save(tmp / "_index_stops.npy", stops)
+
+    manifest = {
+        "version": CACHE_VERSION,
+        "source": _source_stamp(csv_path),
+        "key": key,
+        "n_rows": int(len(df)),
+        "columns": columns,
+        "index_keys": index_keys,
+    }
+    (tmp / "manifest.json").write_text(json.dumps(manifest))
+    shutil.rmtree(folder, ignore_errors=True)
+    tmp.rename(folder)
+    return manifest
+
+
+def open_cached(csv_path, key="session_pitch", cache_dir=None, verbose=True):
+    """Return a CachedTable for ``csv_path``, (re)building it when stale."""
+    csv_path = Path(csv_path)
+    if not csv_path.exists():
+        raise FileNotFoundError(f"CSV not found at: {csv_path}")
+    root = Path(cache_dir) if cache_dir is not None else csv_path.parent / DEFAULT_CACHE_DIR
+    folder = root / csv_path.stem
+
+    manifest = None
+    manifest_path = folder / "manifest.json"
+    if manifest_path.exists():
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except ValueError:
+            manifest = None
+    stamp = _source_stamp(csv_path)
+    stale = (
+        manifest is None
+        or manifest.get("version") != CACHE_VERSION
+        or manifest.get("key") != key
+        or manifest["source"]["size"] != stamp["size"]
+        or manifest["source"]["mtime_ns"] != stamp["mtime_ns"]
+    )
+    if stale:
+        if verbose:
+            print(f"[cache] Converting {csv_path.name} -> {folder}")
+        manifest = _convert(csv_path, folder, key)
+    return CachedTable(folder, manifest)
+
+
+def load_columns(csv_path, columns=None, key="session_pitch", cache_dir=None):
+    """Load ``columns`` of a CSV through the cache (key column always included)."""
+    table = open_cached(csv_path, key=key, cache_dir=cache_dir)
+    if columns is not None and key in table.columns:
+        columns = [key] + [c for c in columns if c != key]
+    return table.frame(columns)
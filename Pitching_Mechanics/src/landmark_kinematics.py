@@ -0,0 +1,142 @@
+"""Kinematic-sequence angular velocities straight from landmark positions.
+
+``joint_velos.csv`` comes precomputed with the OpenBiomechanics release;
+captures that only have landmark trajectories (``<joint>_x/_y/_z`` columns
+as in ``landmarks.csv``) get the same four signals here, in deg/s:
+
+* pelvis    rotation of the hip line (rear -> lead hip) about the vertical;
+* torso     rotation of the shoulder line (throwing -> glove shoulder)
+  about the vertical;
+* shoulder  humeral rotation about the upper arm (shoulder -> elbow), the
+  arm plane being set by the forearm;
+* elbow     elbow flexion/extension rate.
+
+Each segment gets a rotation matrix per row from two landmark vectors
+(Gram-Schmidt); its angular velocity is the axial vector of dR/dt R^T. All
+pitches are processed together: rows are grouped and time-ordered once
+(segments.py) and ``segment_gradient`` differentiates the stacked arrays
+with the same second-order differences as ``np.gradient``, one-sided at
+each pitch's first and last sample, so nothing loops over frames or
+pitches in Python.
+"""
+import numpy as np
+import pandas as pd
+
+from biomech.kinematics import angle_deg
+from parallel import run_sharded
+from segments import Segments
+
+UP = np.array([0.0, 0.0, 1.0])  # landmark z axis points up
+
+JOINTS = (
+    "rear_hip", "lead_hip", "shoulder_jc", "glove_shoulder_jc", "elbow_jc", "wrist_jc",
+)
+SIGNALS = ("pelvis", "torso", "shoulder", "elbow")
+
+
+def landmark_columns(joints=JOINTS):
+    """The ``<joint>_x/_y/_z`` columns read for ``joints``, joint by joint."""
+    return [f"{j}_{axis}" for j in joints for axis in "xyz"]
+
+
+def segment_gradient(values, starts, times):
+    """d(values)/d(times) within every segment, for every column.
+
+    ``values`` (rows x cols) and ``times`` must be ordered by time inside each
+    segment. Interior rows use the second-order central difference for
+    uneven spacing and the first and last row of a segment a one-sided one,
+    the same as ``np.gradient(values[seg], times[seg], axis=0)`` per segment.
+    Single-row segments, NaN inputs and repeated times give NaN.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    times = np.asarray(times, dtype=float)
+    n = len(values)
+    out = np.full(values.shape, np.nan)
+    if n == 0:
+        return out
+
+    first = np.zeros(n, dtype=bool)
+    first[starts] = True
+    last = np.zeros(n, dtype=bool)
+    last[np.append(starts[1:], n) - 1] = True
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        i = np.flatnonzero(~first & ~last)
+        hs = (times[i] - times[i - 1])[:, None]
+        hd = (times[i + 1] - times[i])[:, None]
+        out[i] = (hs ** 2 * values[i + 1] + (hd ** 2 - hs ** 2) * values[i] - hd ** 2 * values[i - 1]) \
+            / (hs * hd * (hs + hd))
+        i = np.flatnonzero(first & ~last)
+        out[i] = (values[i + 1] - values[i]) / (times[i + 1] - times[i])[:, None]
+        i = np.flatnonzero(last & ~first)
+        out[i] = (values[i] - values[i - 1]) / (times[i] - times[i - 1])[:, None]
+    out[~np.isfinite(out)] = np.nan
+    return out
+
+
+def _unit(v):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return v / np.linalg.norm(v, axis=-1, keepdims=True)
+
+
+def orientation(primary, secondary):
+    """(rows x 3 x 3) rotation matrices whose columns are the segment axes.
+
+    Axis 1 runs along ``primary``, axis 3 is normal to the plane of
+    ``primary`` and ``secondary``, axis 2 completes the right-handed frame.
+    """
+    e1 = _unit(primary)
+    e3 = _unit(np.cross(e1, secondary))
+    return np.stack([e1, np.cross(e3, e1), e3], axis=-1)
+
+
+def angular_velocity(R, starts, times):
+    """(rows x 3) lab-frame angular velocity (rad/s) of orientations ``R``."""
+    dR = segment_gradient(R.reshape(len(R), 9), starts, times).reshape(R.shape)
+    W = lambda i, k: (dR[:, i] * R[:, k]).sum(axis=1)  # (dR/dt R^T)[i, k]
+    return 0.5 * np.stack([W(2, 1) - W(1, 2), W(0, 2) - W(2, 0), W(1, 0) - W(0, 1)], axis=1)
+
+
+def sequence_velocities(values, starts, times):
+    """Worker: (rows x 4) pelvis, torso, shoulder and elbow velocities (deg/s).
+
+    ``values`` holds ``landmark_columns()`` for time-ordered rows grouped by
+    pitch, ``starts`` the first row of every pitch.
+    """
+    P = np.asarray(values, dtype=float).reshape(len(values), len(JOINTS), 3)
+    rear_hip, lead_hip, shoulder, glove_shoulder, elbow, wrist = (P[:, j] for j in range(len(JOINTS)))
+    up = np.broadcast_to(UP, rear_hip.shape)
+    trunk = 0.5 * (shoulder + glove_shoulder) - 0.5 * (rear_hip + lead_hip)
+    upper_arm = elbow - shoulder
+
+    pelvis = angular_velocity(orientation(lead_hip - rear_hip, up), starts, times)[:, 2]
+    torso = angular_velocity(orientation(glove_shoulder - shoulder, trunk), starts, times)[:, 2]
+    humerus = angular_velocity(orientation(upper_arm, wrist - elbow), starts, times)
+    shoulder_rot = (humerus * _unit(upper_arm)).sum(axis=1)
+    elbow_rate = segment_gradient(angle_deg(shoulder - elbow, wrist - elbow), starts, times)[:, 0]
+    return np.column_stack([np.degrees(pelvis), np.degrees(torso), np.degrees(shoulder_rot), elbow_rate])
+
+
+def joint_velocities(df, key, time_col, columns=None, pool=None):
+    """``joint_velos``-style table computed from the landmark rows of ``df``.
+
+    Returns ``key``, ``time_col`` and one column per signal (named by
+    ``columns``, a ``{signal: column}`` mapping; default ``<signal>_velo``),
+    rows grouped by ``key`` and sorted by time. With a process ``pool`` the
+    pitches are shared out in whole-pitch shards (parallel.py).
+    """
+    columns = columns or {s: f"{s}_velo" for s in SIGNALS}
+    missing = [c for c in landmark_columns() if c not in df.columns]
+    if missing:
+        raise KeyError(f"Landmark columns not found: {', '.join(missing)}")
+    seg = Segments.from_frame(df, key, within=time_col)
+    values = seg.take(df, landmark_columns())
+    times = seg.take(df, [time_col])[:, 0]
+    velos = run_sharded(sequence_velocities, values, seg.starts, times, pool=pool)
+
+    out = pd.DataFrame({key: np.repeat(seg.keys, seg.sizes), time_col: times})
+    for j, signal in enumerate(SIGNALS):
+        out[columns[signal]] = velos[:, j]
+    return out
@@ -0,0 +1,68 @@
+"""Process-pool execution of the segmented feature reductions.
+
+A grouped table is cut into shards of whole pitches (contiguous ranges of
+segments, balanced by row count). Each shard travels to a worker as plain
+NumPy arrays — the value matrix, the time vector and shard-local segment
+starts — never as a pickled DataFrame, and the per-pitch results come back
+as arrays. Shards are concatenated in order, so the result is identical to
+the single-process reduction regardless of which worker finishes first.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+class WorkerPool(ProcessPoolExecutor):
+    """ProcessPoolExecutor that keeps its process count as ``workers``."""
+
+    def __init__(self, workers):
+        super().__init__(max_workers=workers)
+        self.workers = workers
+
+
+def make_pool(workers):
+    """WorkerPool with ``workers`` processes (None/0/1 -> no pool)."""
+    if workers is None or workers <= 1:
+        return None
+    return WorkerPool(workers)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def shard_bounds(starts, n_rows, n_shards):
+    """Split segments into <= ``n_shards`` contiguous ranges of similar row count.
+
+    Returns a list of ``(seg_lo, seg_hi, row_lo, row_hi)``.
+    """
+    n_seg = len(starts)
+    n_shards = max(1, min(n_shards, n_seg))
+    targets = np.linspace(0, n_rows, n_shards + 1)[1:-1]
+    cuts = np.unique(np.r_[0, np.searchsorted(starts, targets), n_seg])
+    stops = np.append(starts, n_rows)
+    return [(lo, hi, int(stops[lo]), int(stops[hi])) for lo, hi in zip(cuts[:-1], cuts[1:]) if hi > lo]
+
+
+def run_sharded(fn, values, starts, times=None, pool=None, n_shards=None):
+    """Call ``fn(values, starts, times)`` shard by shard on ``pool``.
+
+    ``fn`` must return an array or a tuple of arrays with one row per
+    segment; shard results are stacked in segment order. Without a pool the
+    call is made once, in-process. ``n_shards`` defaults to the pool's
+    ``workers`` (see ``make_pool``), else the CPU count.
+    """
+    if pool is None or len(starts) == 0:
+        return fn(values, starts, times)
+    n_rows = len(values)
+    n_shards = n_shards or getattr(pool, "workers", None) or default_workers()
+    futures = []
+    for seg_lo, seg_hi, row_lo, row_hi in shard_bounds(starts, n_rows, n_shards):
+        local_starts = starts[seg_lo:seg_hi] - row_lo
+        shard_times = None if times is None else np.ascontiguousarray(times[row_lo:row_hi])
+        futures.append(pool.submit(fn, np.ascontiguousarray(values[row_lo:row_hi]), local_starts, shard_times))
+    results = [f.result() for f in futures]
+    if isinstance(results[0], tuple):
+        return tuple(np.concatenate(parts, axis=0) for parts in zip(*results))
+    return np.concatenate(results, axis=0)
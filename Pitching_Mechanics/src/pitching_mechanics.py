@@ -1,21 +1,35 @@
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
+"""Kinetic chain contributions to pitch velocity (OpenBiomechanics full_sig).
+
+Importable pipeline, one function per step:
+
+    load_analysis()   -> metadata + per-pitch features merged into analysis_df
+    correlate()       -> overall and per-level correlations with pitch speed
+    top_variables()   -> strongest overall variables
+    save_scatter_plots()
+
+and a command line with the same steps as subcommands:
+
+    python pitching_mechanics.py features  --data-dir DATA --out analysis_df.csv
+    python pitching_mechanics.py correlate --features analysis_df.csv
+    python pitching_mechanics.py plot      --features analysis_df.csv --top-n 8
+    python pitching_mechanics.py all       (default: features -> correlate -> plot)
+    python pitching_mechanics.py sequence  --landmarks landmarks.csv --out sequence.csv
+
+``sequence`` derives the peak / peak-time / delay table from landmark
+positions alone (landmark_kinematics.py), for captures without joint_velos.
+
+NumPy, pandas and the helper modules are imported inside the functions that
+use them and matplotlib only by the plot step, so ``--help`` and the table
+commands start without paying for the plotting stack.
+"""
+import argparse
+import sys
 from pathlib import Path
 
-# -----------------------------
-# CREATE OUTPUT FOLDER
-# -----------------------------
-output_dir = Path("plots")
-output_dir.mkdir(exist_ok=True)
+# Repository root on sys.path for the shared ``biomech`` package.
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-# -----------------------------
-# LOAD DATA
-# -----------------------------
-metadata = pd.read_csv("metadata.csv")
-joint_velos = pd.read_csv("joint_velos.csv")
-force_plate = pd.read_csv("force_plate.csv")
-energy_flow = pd.read_csv("energy_flow.csv")
+from biomech import profiling  # noqa: E402 (stdlib only, cheap to import)
 
 pitch_id = "session_pitch"
 speed_col = "pitch_speed_mph"
@@ -23,6 +37,9 @@ level_col = "playing_level"
 player_col = "user"
 time_col = "time"
 
+# Bump when a feature definition changes so --store recomputes every pitch.
+FEATURE_VERSION = 1
+
 # -----------------------------
 # JOINT VELOCITY COLUMNS
 # -----------------------------
@@ -31,108 +48,24 @@ torso_col = "torso_velo_z"
 shoulder_col = "shoulder_velo_z"
 elbow_col = "elbow_velo_z"
 
-# -----------------------------
-# HELPER FUNCTIONS
-# -----------------------------
-def peak_abs(series):
-    arr = pd.to_numeric(series, errors="coerce").to_numpy()
-    if np.all(np.isnan(arr)):
-        return np.nan
-    return np.nanmax(np.abs(arr))
-
-def get_peak_time(df, value_col, time_col="time"):
-    tmp = df[[time_col, value_col]].copy()
-    tmp[time_col] = pd.to_numeric(tmp[time_col], errors="coerce")
-    tmp[value_col] = pd.to_numeric(tmp[value_col], errors="coerce")
-    tmp = tmp.dropna()
-
-    if tmp.empty:
-        return np.nan
-
-    idx = np.abs(tmp[value_col]).idxmax()
-    return tmp.loc[idx, time_col]
-
-# -----------------------------
-# EXTRACT PEAK JOINT VELOCITIES
-# -----------------------------
-vel_features = (
-    joint_velos.groupby(pitch_id)
-    .agg(
-        peak_pelvis_vel=(pelvis_col, peak_abs),
-        peak_torso_vel=(torso_col, peak_abs),
-        peak_shoulder_vel=(shoulder_col, peak_abs),
-        peak_elbow_vel=(elbow_col, peak_abs),
-    )
-    .reset_index()
-)
-
-# -----------------------------
-# EXTRACT PEAK TIMING + SEQUENCING
-# -----------------------------
-sequence_rows = []
-
-for pid, sub in joint_velos.groupby(pitch_id):
-    row = {pitch_id: pid}
-    row["pelvis_peak_time"] = get_peak_time(sub, pelvis_col, time_col)
-    row["torso_peak_time"] = get_peak_time(sub, torso_col, time_col)
-    row["shoulder_peak_time"] = get_peak_time(sub, shoulder_col, time_col)
-    row["elbow_peak_time"] = get_peak_time(sub, elbow_col, time_col)
-    sequence_rows.append(row)
-
-sequence_df = pd.DataFrame(sequence_rows)
-
-sequence_df["pelvis_to_torso_delay"] = (
-    sequence_df["torso_peak_time"] - sequence_df["pelvis_peak_time"]
-)
-sequence_df["torso_to_shoulder_delay"] = (
-    sequence_df["shoulder_peak_time"] - sequence_df["torso_peak_time"]
-)
-sequence_df["shoulder_to_elbow_delay"] = (
-    sequence_df["elbow_peak_time"] - sequence_df["shoulder_peak_time"]
-)
-
-# -----------------------------
-# FORCE-PLATE FEATURES
-# -----------------------------
-force_features = (
-    force_plate.groupby(pitch_id)
-    .agg(
-        peak_rear_force_z=("rear_force_z", peak_abs),
-        peak_lead_force_z=("lead_force_z", peak_abs),
-        peak_rear_force_x=("rear_force_x", peak_abs),
-        peak_lead_force_x=("lead_force_x", peak_abs),
-    )
-    .reset_index()
-)
+velo_cols = {
+    "pelvis": pelvis_col,
+    "torso": torso_col,
+    "shoulder": shoulder_col,
+    "elbow": elbow_col,
+}
 
 # -----------------------------
-# IMPULSE CALCULATION
+# FORCE-PLATE COLUMNS
 # -----------------------------
-impulse_rows = []
+force_cols = ["rear_force_z", "lead_force_z", "rear_force_x", "lead_force_x"]
 
-for pid, sub in force_plate.groupby(pitch_id):
-    sub = sub.sort_values(time_col).copy()
-    t = pd.to_numeric(sub[time_col], errors="coerce").to_numpy()
-    rear_fz = pd.to_numeric(sub["rear_force_z"], errors="coerce").to_numpy()
-    lead_fz = pd.to_numeric(sub["lead_force_z"], errors="coerce").to_numpy()
-
-    valid_rear = ~(np.isnan(t) | np.isnan(rear_fz))
-    valid_lead = ~(np.isnan(t) | np.isnan(lead_fz))
-
-    rear_impulse_z = np.trapz(np.abs(rear_fz[valid_rear]), t[valid_rear]) if valid_rear.sum() > 1 else np.nan
-    lead_impulse_z = np.trapz(np.abs(lead_fz[valid_lead]), t[valid_lead]) if valid_lead.sum() > 1 else np.nan
-
-    impulse_rows.append({
-        pitch_id: pid,
-        "rear_impulse_z": rear_impulse_z,
-        "lead_impulse_z": lead_impulse_z
-    })
-
-impulse_df = pd.DataFrame(impulse_rows)
-force_features = force_features.merge(impulse_df, on=pitch_id, how="left")
+def impulse_name(force_col):
+    # "rear_force_z" -> "rear_impulse_z"
+    return force_col.replace("_force_", "_impulse_")
 
 # -----------------------------
-# ENERGY FLOW FEATURES
+# ENERGY FLOW COLUMNS
 # -----------------------------
 energy_vars = [
     "rear_hip_energy_generated",
@@ -147,43 +80,6 @@ energy_vars = [
     "elbow_energy_transfer_stp",
 ]
 
-energy_agg = {
-    var: (var, peak_abs)
-    for var in energy_vars
-}
-
-energy_features = (
-    energy_flow.groupby(pitch_id)
-    .agg(**energy_agg)
-    .reset_index()
-)
-
-# -----------------------------
-# EFFICIENCY RATIOS
-# -----------------------------
-energy_features["thorax_to_pelvis_power_ratio"] = (
-    energy_features["thorax_dist_seg_pwr"] / energy_features["pelvis_thorax_seg_pwr"]
-)
-
-energy_features["arm_to_thorax_power_ratio"] = (
-    energy_features["upper_arm_dist_seg_pwr"] / energy_features["thorax_dist_seg_pwr"]
-)
-
-energy_features.replace([np.inf, -np.inf], np.nan, inplace=True)
-
-# -----------------------------
-# MERGE EVERYTHING
-# -----------------------------
-analysis_df = (
-    metadata[[pitch_id, player_col, level_col, speed_col]]
-    .merge(vel_features, on=pitch_id, how="inner")
-    .merge(sequence_df, on=pitch_id, how="left")
-    .merge(force_features, on=pitch_id, how="inner")
-    .merge(energy_features, on=pitch_id, how="inner")
-)
-
-print("Merged dataframe shape:", analysis_df.shape)
-
 # -----------------------------
 # VARIABLES TO TEST
 # -----------------------------
@@ -198,94 +94,516 @@ vars_to_test = [
     "thorax_to_pelvis_power_ratio","arm_to_thorax_power_ratio"
 ]
 
-# -----------------------------
-# OVERALL CORRELATIONS
-# -----------------------------
-overall_results = []
+SOURCE_TABLES = ("joint_velos", "force_plate", "energy_flow")
 
-for var in vars_to_test:
-    sub = analysis_df[[var, speed_col]].dropna()
-    corr = sub.corr().iloc[0, 1] if len(sub) >= 3 else np.nan
 
-    overall_results.append({
-        "variable": var,
-        "correlation_with_pitch_speed": corr,
-        "n": len(sub)
-    })
+def needed_columns(impulse_window=None):
+    """Columns read from each full_sig CSV."""
+    return {
+        "metadata": [pitch_id, player_col, level_col, speed_col],
+        "joint_velos": [pitch_id, time_col, *velo_cols.values()],
+        "force_plate": [pitch_id, time_col] + force_cols + list(impulse_window or ()),
+        "energy_flow": [pitch_id] + energy_vars,
+    }
 
-overall_corr_df = pd.DataFrame(overall_results).sort_values(
-    "correlation_with_pitch_speed", ascending=False
-)
+# -----------------------------
+# LOAD DATA
+# -----------------------------
+def load_table(data_dir, name, columns, use_cache=True, cache_dir=None):
+    """Read ``columns`` of ``<data_dir>/<name>.csv``.
 
-print("\n=== Overall Correlations ===")
-print(overall_corr_df)
+    With the cache (default) each CSV is converted once into memory-mapped
+    .npy columns (csv_cache.py) and rebuilt when it changes.
+    """
+    import pandas as pd
+
+    path = Path(data_dir) / f"{name}.csv"
+    with profiling.stage(f"load:{name}") as st:
+        if not use_cache:
+            df = pd.read_csv(path, usecols=columns)
+        else:
+            from csv_cache import load_columns
+            df = load_columns(path, columns, key=pitch_id, cache_dir=cache_dir)
+        st.rows = len(df)
+    return df
 
 # -----------------------------
-# CORRELATIONS BY LEVEL
+# EXTRACT PEAK JOINT VELOCITIES + PEAK TIMING
 # -----------------------------
-level_results = []
+# One sort by session_pitch, then every signal column is reduced at once
+# (see segments.py) instead of a Python callable per group per column.
+def extract_velocity_features(joint_velos, pool=None):
+    import pandas as pd
+    from segments import peak_table
 
-for lvl in analysis_df[level_col].dropna().unique():
-    level_sub = analysis_df[analysis_df[level_col] == lvl]
+    with profiling.stage("peaks:joint_velos", rows=len(joint_velos)):
+        velo_peaks = peak_table(joint_velos, pitch_id, velo_cols.values(), time_col=time_col, pool=pool)
 
-    for var in vars_to_test:
-        sub = level_sub[[var, speed_col]].dropna()
-        corr = sub.corr().iloc[0, 1] if len(sub) >= 3 else np.nan
+    vel_features = pd.DataFrame({pitch_id: velo_peaks[pitch_id]})
+    for name, col in velo_cols.items():
+        vel_features[f"peak_{name}_vel"] = velo_peaks[f"{col}_peak"]
 
-        level_results.append({
-            "level": lvl,
-            "variable": var,
-            "correlation_with_pitch_speed": corr,
-            "n_pitches": len(sub)
-        })
+    # SEQUENCING
+    sequence_df = pd.DataFrame({pitch_id: velo_peaks[pitch_id]})
+    for name, col in velo_cols.items():
+        sequence_df[f"{name}_peak_time"] = velo_peaks[f"{col}_time"]
 
-level_corr_df = pd.DataFrame(level_results)
+    sequence_df["pelvis_to_torso_delay"] = (
+        sequence_df["torso_peak_time"] - sequence_df["pelvis_peak_time"]
+    )
+    sequence_df["torso_to_shoulder_delay"] = (
+        sequence_df["shoulder_peak_time"] - sequence_df["torso_peak_time"]
+    )
+    sequence_df["shoulder_to_elbow_delay"] = (
+        sequence_df["elbow_peak_time"] - sequence_df["shoulder_peak_time"]
+    )
+    return vel_features, sequence_df
 
 # -----------------------------
-# TOP VARIABLES BY LEVEL
+# KINEMATIC SEQUENCE FROM LANDMARKS
 # -----------------------------
-top_by_level = (
-    level_corr_df
-    .sort_values(["level", "correlation_with_pitch_speed"], ascending=[True, False])
-    .groupby("level")
-    .head(5)
-)
+def load_landmarks(path):
+    """Landmark rows of ``path`` (a landmarks.csv-style export) keyed by pitch.
+
+    Files without a ``session_pitch`` column are split into pitches where
+    the time column resets, numbered from 1 as in the animation script.
+    """
+    import pandas as pd
+    from biomech.motion import session_ids
+    from landmark_kinematics import landmark_columns
+
+    header = pd.read_csv(path, nrows=0).columns
+    keyed = pitch_id in header
+    columns = ([pitch_id] if keyed else []) + [time_col] + landmark_columns()
+    with profiling.stage("load:landmarks") as st:
+        df = pd.read_csv(path, usecols=columns)
+        if not keyed:
+            df[pitch_id] = session_ids(df[time_col]) + 1
+        st.rows = len(df)
+    return df
+
 
-print("\n=== Top 5 Variables by Level ===")
-print(top_by_level)
+def extract_landmark_velocity_features(landmarks, pool=None):
+    """``extract_velocity_features`` with the velocities derived from landmarks.
+
+    The pelvis/torso/shoulder/elbow signals come from landmark_kinematics.py
+    under the joint_velos column names, so the peak, peak-time and delay
+    columns are the same as for joint_velos.csv.
+    """
+    from landmark_kinematics import joint_velocities
+
+    with profiling.stage("kinematics:landmarks", rows=len(landmarks)):
+        joint_velos = joint_velocities(landmarks, pitch_id, time_col, columns=velo_cols, pool=pool)
+    return extract_velocity_features(joint_velos, pool=pool)
 
 # -----------------------------
-# TOP OVERALL VARIABLES
+# FORCE-PLATE FEATURES
 # -----------------------------
-top_vars = overall_corr_df.dropna().head(8)["variable"].tolist()
+def extract_force_features(force_plate, impulse_window=None, pool=None):
+    """Peak forces plus trapezoid impulses of |force| for every pitch.
+
+    ``impulse_window`` is an optional (start, end) pair of event-time columns
+    (e.g. foot plant to ball release) that adds ``*_window`` impulses.
+    """
+    import pandas as pd
+    from segments import impulse_table, peak_table
+
+    with profiling.stage("peaks:force_plate", rows=len(force_plate)):
+        force_peaks = peak_table(force_plate, pitch_id, force_cols, pool=pool)
 
-print("\nTop variables by overall correlation:")
-print(top_vars)
+    force_features = pd.DataFrame({pitch_id: force_peaks[pitch_id]})
+    for col in force_cols:
+        force_features[f"peak_{col}"] = force_peaks[f"{col}_peak"]
 
+    # IMPULSE CALCULATION
+    # Trapezoid impulse of |force| over each pitch, all pitches and channels
+    # in one pass (segments.impulse_table); optionally also over an event window.
+    with profiling.stage("impulse", rows=len(force_plate)):
+        impulses = impulse_table(force_plate, pitch_id, force_cols, time_col, pool=pool)
+        for col in force_cols:
+            force_features[impulse_name(col)] = impulses[f"{col}_impulse"].to_numpy()
+
+        if impulse_window is not None:
+            windowed = impulse_table(force_plate, pitch_id, force_cols, time_col, window=impulse_window, pool=pool)
+            for col in force_cols:
+                force_features[impulse_name(col) + "_window"] = windowed[f"{col}_impulse"].to_numpy()
+    return force_features
 
 # -----------------------------
-# SAVE PLOTS
+# ENERGY FLOW FEATURES
 # -----------------------------
-for var in top_vars:
-    plt.figure(figsize=(6, 5))
+def extract_energy_features(energy_flow, pool=None):
+    import numpy as np
+    import pandas as pd
+    from segments import peak_table
+
+    with profiling.stage("peaks:energy_flow", rows=len(energy_flow)):
+        energy_peaks = peak_table(energy_flow, pitch_id, energy_vars, pool=pool)
+
+    energy_features = pd.DataFrame({pitch_id: energy_peaks[pitch_id]})
+    for var in energy_vars:
+        energy_features[var] = energy_peaks[f"{var}_peak"]
 
-    for lvl in analysis_df[level_col].dropna().unique():
-        sub = analysis_df[analysis_df[level_col] == lvl]
-        plt.scatter(sub[var], sub[speed_col], label=lvl, alpha=0.6)
+    # EFFICIENCY RATIOS
+    energy_features["thorax_to_pelvis_power_ratio"] = (
+        energy_features["thorax_dist_seg_pwr"] / energy_features["pelvis_thorax_seg_pwr"]
+    )
 
-    plt.xlabel(var.replace("_", " ").title())
-    plt.ylabel("Pitch Speed (mph)")
-    plt.title(f"{var.replace('_', ' ').title()} vs Pitch Speed by Level")
-    plt.legend()
-    plt.tight_layout()
+    energy_features["arm_to_thorax_power_ratio"] = (
+        energy_features["upper_arm_dist_seg_pwr"] / energy_features["thorax_dist_seg_pwr"]
+    )
 
-    filename = output_dir / f"{var}_vs_pitch_speed.png"
-    plt.savefig(filename, dpi=150)
-    plt.close()
+    energy_features.replace([np.inf, -np.inf], np.nan, inplace=True)
+    return energy_features
+
+# -----------------------------
+# ALL FEATURES
+# -----------------------------
+def features_for(tables, keys=None, impulse_window=None, pool=None):
+    """Feature tables for the source ``tables`` (optionally only ``keys``).
+
+    Returns ``{"vel_features", "sequence_df", "force_features",
+    "energy_features"}``. With a process ``pool`` the three stages run side by
+    side, each fanning its pitch shards out to the pool (parallel.py).
+    """
+    if keys is not None:
+        tables = {name: df[df[pitch_id].isin(keys)] for name, df in tables.items()}
+    stages = {
+        "joint_velos": lambda df: extract_velocity_features(df, pool=pool),
+        "force_plate": lambda df: extract_force_features(df, impulse_window, pool=pool),
+        "energy_flow": lambda df: extract_energy_features(df, pool=pool),
+    }
+    if pool is None:
+        results = {name: fn(tables[name]) for name, fn in stages.items()}
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=len(stages)) as threads:
+            futures = {name: threads.submit(fn, tables[name]) for name, fn in stages.items()}
+            results = {name: f.result() for name, f in futures.items()}
+    vel_features, sequence_df = results["joint_velos"]
+    return {
+        "vel_features": vel_features,
+        "sequence_df": sequence_df,
+        "force_features": results["force_plate"],
+        "energy_features": results["energy_flow"],
+    }
+
+
+def compute_features(data_dir=".", use_cache=True, cache_dir=None, stream=False, chunksize=None,
+                     store=None, impulse_window=None, pool=None):
+    """Load the full_sig tables and compute every per-pitch feature table.
+
+    * default: whole tables (through the column cache unless ``use_cache`` is
+      False);
+    * ``stream``: the large CSVs are read in chunks of whole pitches, so memory
+      stays bounded by ``chunksize`` rather than the file size (streaming.py);
+    * ``store``: path of a per-pitch feature store; only new or changed
+      pitches are recomputed (feature_store.py).
+
+    Returns ``(metadata, features)`` with ``features`` as in ``features_for``.
+    """
+    if store and stream:
+        raise ValueError("A feature store cannot be combined with streaming.")
+    data_dir = Path(data_dir)
+    cols = needed_columns(impulse_window)
+
+    if stream:
+        import pandas as pd
+        from streaming import DEFAULT_CHUNKSIZE, stream_features
+
+        def table_features(name, feature_fn):
+            return stream_features(data_dir / f"{name}.csv", pitch_id, cols[name], feature_fn,
+                                   chunksize=chunksize or DEFAULT_CHUNKSIZE)
+
+        metadata = pd.read_csv(data_dir / "metadata.csv", usecols=cols["metadata"])
+        vel_features, sequence_df = table_features(
+            "joint_velos", lambda df: extract_velocity_features(df, pool=pool))
+        features = {
+            "vel_features": vel_features,
+            "sequence_df": sequence_df,
+            "force_features": table_features(
+                "force_plate", lambda df: extract_force_features(df, impulse_window, pool=pool)),
+            "energy_features": table_features(
+                "energy_flow", lambda df: extract_energy_features(df, pool=pool)),
+        }
+        return metadata, features
+
+    load = lambda name: load_table(data_dir, name, cols[name], use_cache=use_cache, cache_dir=cache_dir)
+    metadata = load("metadata")
+    tables = {name: load(name) for name in SOURCE_TABLES}
+    if not store:
+        return metadata, features_for(tables, impulse_window=impulse_window, pool=pool)
+
+    # Incremental: hash every pitch's source rows and recompute features only
+    # for new or changed pitches; the rest comes from the feature store.
+    from feature_store import FeatureStore, combine_hashes, pitch_hashes
+
+    hashes = combine_hashes(*(pitch_hashes(df, pitch_id, cols[name]) for name, df in tables.items()))
+    schema = {
+        "version": FEATURE_VERSION,
+        "columns": {name: cols[name] for name in SOURCE_TABLES},
+        "impulse_window": impulse_window,
+    }
+    feature_store = FeatureStore(store, pitch_id, schema)
+    features = feature_store.update(
+        hashes, lambda keys: features_for(tables, keys, impulse_window=impulse_window, pool=pool))
+    feature_store.save()
+    return metadata, features
 
-print(f"\nPlots saved to: {output_dir.resolve()}")
+# -----------------------------
+# MERGE EVERYTHING
+# -----------------------------
+def merge_features(metadata, features):
+    with profiling.stage("merge") as st:
+        analysis_df = (
+            metadata[[pitch_id, player_col, level_col, speed_col]]
+            .merge(features["vel_features"], on=pitch_id, how="inner")
+            .merge(features["sequence_df"], on=pitch_id, how="left")
+            .merge(features["force_features"], on=pitch_id, how="inner")
+            .merge(features["energy_features"], on=pitch_id, how="inner")
+        )
+        st.rows = len(analysis_df)
+    return analysis_df
+
+
+def load_analysis(data_dir=".", **options):
+    """analysis_df: one row per pitch with metadata and every feature.
+
+    ``options`` are passed to ``compute_features``.
+    """
+    metadata, features = compute_features(data_dir, **options)
+    return merge_features(metadata, features)
+
+# -----------------------------
+# CORRELATIONS
+# -----------------------------
+def correlate(analysis_df, variables=None, method="pearson", n_boot=0, n_perm=0, ci=0.95, seed=None):
+    """Overall and per-level correlations of ``variables`` with pitch speed.
+
+    Every variable x level correlation comes from one batched, NaN-aware pass
+    (correlation.py); ``n_boot``/``n_perm`` add bootstrap CIs and permutation
+    p-values. Returns ``(overall_corr_df, level_corr_df)``.
+    """
+    from correlation import corr_table
+
+    variables = vars_to_test if variables is None else variables
+    opts = dict(method=method, n_boot=n_boot, n_perm=n_perm, ci=ci, seed=seed)
+    corr_cols = {"r": "correlation_with_pitch_speed"}
+
+    with profiling.stage("correlation", rows=len(analysis_df)):
+        overall_corr_df = (
+            corr_table(analysis_df, variables, speed_col, **opts)
+            .rename(columns=corr_cols)
+            .sort_values("correlation_with_pitch_speed", ascending=False)
+        )
+        level_corr_df = (
+            corr_table(analysis_df, variables, speed_col, by=level_col, **opts)
+            .rename(columns={**corr_cols, "group": "level", "n": "n_pitches"})
+        )
+    return overall_corr_df, level_corr_df
+
+
+def top_by_level(level_corr_df, n=5):
+    return (
+        level_corr_df
+        .sort_values(["level", "correlation_with_pitch_speed"], ascending=[True, False])
+        .groupby("level")
+        .head(n)
+    )
 
 
+def top_variables(overall_corr_df, n=8):
+    return overall_corr_df.dropna(subset=["correlation_with_pitch_speed"]).head(n)["variable"].tolist()
 
+# -----------------------------
+# SAVE PLOTS
+# -----------------------------
+def save_scatter_plots(analysis_df, variables, output_dir="plots", pool=None, pdf=None, replot=False):
+    """Scatter of each variable vs pitch speed by level (plotting.py).
+
+    Unchanged PNGs are skipped; ``pdf`` also writes every plot into one
+    multi-page PDF. Returns ``(written, skipped)`` file names.
+    """
+    from plotting import plot_jobs, save_pdf, save_plots
+
+    with profiling.stage("plotting") as st:
+        jobs = plot_jobs(analysis_df, variables, speed_col, level_col)
+        written, skipped = save_plots(jobs, output_dir, pool=pool, force=replot)
+        if pdf:
+            save_pdf(jobs, pdf)
+        st.frames = len(written) + (len(jobs) if pdf else 0)
+    return written, skipped
+
+# -----------------------------
+# COMMAND LINE
+# -----------------------------
+def _add_feature_args(p):
+    g = p.add_argument_group("features")
+    g.add_argument("--data-dir", default=".",
+                   help="Folder with the full_sig CSVs (default: current directory)")
+    g.add_argument("--features", default=None, metavar="CSV",
+                   help="Use a saved analysis_df (from the 'features' command) instead of recomputing it")
+    g.add_argument("--no-cache", action="store_true",
+                   help="Parse the CSVs directly instead of the memory-mapped column cache")
+    g.add_argument("--cache-dir", default=None,
+                   help="Cache folder (default: <data-dir>/.npy_cache)")
+    g.add_argument("--impulse-window", nargs=2, metavar=("START_COL", "END_COL"), default=None,
+                   help="Also integrate force between two event-time columns of force_plate.csv "
+                        "(e.g. foot plant and ball release)")
+    g.add_argument("--stream", action="store_true",
+                   help="Read the large CSVs in chunks of whole pitches (bounded memory, no cache)")
+    g.add_argument("--chunksize", type=int, default=None,
+                   help="Rows per chunk in --stream mode (default: 200000)")
+    g.add_argument("--store", default=None, metavar="PATH",
+                   help="Per-pitch feature store (.pkl); only new or changed pitches are recomputed")
+    g.add_argument("--workers", type=int, default=1,
+                   help="Worker processes for the feature and plot stages (default: 1, 0 = all cores)")
+    p.add_argument("--profile", default=None, metavar="PATH",
+                   help="Record per-stage time/memory and write a .json or .csv report")
+
+
+def _add_corr_args(p):
+    g = p.add_argument_group("correlations")
+    g.add_argument("--method", choices=("pearson", "spearman"), default="pearson",
+                   help="Correlation method (default: pearson). With --bootstrap, spearman re-ranks "
+                        "every resample and runs up to about 3x slower than pearson")
+    g.add_argument("--bootstrap", type=int, default=0, metavar="N",
+                   help="Bootstrap resamples for confidence intervals (default: 0 = off)")
+    g.add_argument("--permutations", type=int, default=0, metavar="N",
+                   help="Permutations for p-values (default: 0 = off)")
+    g.add_argument("--ci", type=float, default=0.95, help="Confidence level (default: 0.95)")
+    g.add_argument("--seed", type=int, default=None, help="Random seed for resampling")
+
+
+def _add_plot_args(p):
+    g = p.add_argument_group("plots")
+    g.add_argument("--top-n", type=int, default=8,
+                   help="Number of top overall variables to plot (default: 8)")
+    g.add_argument("--plot-dir", default="plots", help="Output folder for PNGs (default: ./plots)")
+    g.add_argument("--pdf", default=None, metavar="PATH",
+                   help="Also write all plots into one multi-page PDF")
+    g.add_argument("--replot", action="store_true",
+                   help="Redraw every PNG even if its data and styling are unchanged")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Kinetic chain contributions to pitch velocity.")
+    sub = parser.add_subparsers(dest="command", metavar="{features,correlate,plot,all,sequence}")
+
+    p = sub.add_parser("features", help="Compute per-pitch features and save analysis_df")
+    _add_feature_args(p)
+    p.add_argument("--out", default="analysis_df.csv", help="Output CSV (default: analysis_df.csv)")
+
+    p = sub.add_parser("correlate", help="Correlate features with pitch speed (overall and by level)")
+    _add_feature_args(p)
+    _add_corr_args(p)
+    p.add_argument("--out-dir", default=None,
+                   help="Also save overall_correlations.csv and level_correlations.csv here")
+
+    p = sub.add_parser("plot", help="Scatter plots of the top variables vs pitch speed")
+    _add_feature_args(p)
+    _add_corr_args(p)
+    _add_plot_args(p)
+
+    p = sub.add_parser("all", help="features -> correlate -> plot (default)")
+    _add_feature_args(p)
+    _add_corr_args(p)
+    _add_plot_args(p)
+
+    p = sub.add_parser("sequence", help="Kinematic sequence table computed from landmark positions")
+    p.add_argument("--landmarks", required=True, metavar="CSV",
+                   help="Landmark CSV (<joint>_x/_y/_z columns; pitches by session_pitch or time resets)")
+    p.add_argument("--out", default="sequence.csv", help="Output CSV (default: sequence.csv)")
+    p.add_argument("--workers", type=int, default=1,
+                   help="Worker processes (default: 1, 0 = all cores)")
+    p.add_argument("--profile", default=None, metavar="PATH",
+                   help="Record per-stage time/memory and write a .json or .csv report")
+    return parser
+
+
+def _sequence_from_args(args, pool):
+    vel_features, sequence_df = extract_landmark_velocity_features(load_landmarks(args.landmarks), pool=pool)
+    table = vel_features.merge(sequence_df, on=pitch_id, how="left")
+    table.to_csv(args.out, index=False)
+    print(f"Kinematic sequence for {len(table)} pitch(es) saved to: {Path(args.out).resolve()}")
+
+
+def _analysis_from_args(args, pool):
+    import pandas as pd
+
+    if args.features:
+        return pd.read_csv(args.features)
+    if args.store and args.stream:
+        raise SystemExit("--store and --stream cannot be combined")
+    return load_analysis(
+        args.data_dir,
+        use_cache=not args.no_cache,
+        cache_dir=args.cache_dir,
+        stream=args.stream,
+        chunksize=args.chunksize,
+        store=args.store,
+        impulse_window=tuple(args.impulse_window) if args.impulse_window else None,
+        pool=pool,
+    )
 
 
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0].startswith("-") and argv[0] not in ("-h", "--help")):
+        argv = ["all", *argv]  # plain `python pitching_mechanics.py [options]` runs everything
+    args = build_parser().parse_args(argv)
+
+    from parallel import default_workers, make_pool
+
+    if args.profile:
+        profiling.activate(profiling.StageProfiler())
+    pool = make_pool(args.workers if args.workers > 0 else default_workers())
+    try:
+        if args.command == "sequence":
+            _sequence_from_args(args, pool)
+            return
+        analysis_df = _analysis_from_args(args, pool)
+        print("Merged dataframe shape:", analysis_df.shape)
+
+        if args.command == "features":
+            analysis_df.to_csv(args.out, index=False)
+            print(f"Features saved to: {Path(args.out).resolve()}")
+            return
+
+        overall_corr_df, level_corr_df = correlate(
+            analysis_df, method=args.method, n_boot=args.bootstrap,
+            n_perm=args.permutations, ci=args.ci, seed=args.seed,
+        )
+        if args.command in ("correlate", "all"):
+            print("\n=== Overall Correlations ===")
+            print(overall_corr_df)
+            print("\n=== Top 5 Variables by Level ===")
+            print(top_by_level(level_corr_df))
+        if getattr(args, "out_dir", None):
+            out_dir = Path(args.out_dir)
+            out_dir.mkdir(parents=True, exist_ok=True)
+            overall_corr_df.to_csv(out_dir / "overall_correlations.csv", index=False)
+            level_corr_df.to_csv(out_dir / "level_correlations.csv", index=False)
+        if args.command == "correlate":
+            return
+
+        top_vars = top_variables(overall_corr_df, args.top_n)
+        print("\nTop variables by overall correlation:")
+        print(top_vars)
+
+        written, skipped = save_scatter_plots(
+            analysis_df, top_vars, args.plot_dir, pool=pool, pdf=args.pdf, replot=args.replot)
+        print(f"\n{len(written)} plot(s) written, {len(skipped)} unchanged")
+        if args.pdf:
+            print("PDF saved to:", args.pdf)
+        print(f"\nPlots saved to: {Path(args.plot_dir).resolve()}")
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        if args.profile:
+            profiling.finish(args.profile)
+
+
+if __name__ == "__main__":
+    main()
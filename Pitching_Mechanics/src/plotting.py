@@ -0,0 +1,118 @@
+"""Scatter plots of the top variables vs pitch speed, coloured by level.
+
+Figures are drawn with the object-oriented Agg API (``Figure`` +
+``FigureCanvasAgg``), so no pyplot global state is involved and plots can be
+rendered in worker processes. The per-level masks are computed once for all
+variables, and every plot job carries only the arrays it draws.
+
+Each PNG is keyed by a hash of its input data and styling, stored in
+``.plot_manifest.json`` in the output folder; a PNG whose hash is unchanged
+since the last run (and which still exists) is not redrawn.
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+
+STYLE = {"figsize": (6, 5), "dpi": 150, "alpha": 0.6, "ylabel": "Pitch Speed (mph)"}
+MANIFEST = ".plot_manifest.json"
+
+
+def plot_jobs(analysis_df, variables, speed_col, level_col):
+    """One job per variable: (variable, [(level, x, y), ...])."""
+    levels = analysis_df[level_col].dropna().unique()
+    masks = [(lvl, (analysis_df[level_col] == lvl).to_numpy()) for lvl in levels]
+    speed = analysis_df[speed_col].to_numpy(dtype=float)
+    jobs = []
+    for var in variables:
+        x = analysis_df[var].to_numpy(dtype=float)
+        jobs.append((var, [(str(lvl), x[m], speed[m]) for lvl, m in masks]))
+    return jobs
+
+
+def job_hash(job, style=STYLE):
+    import matplotlib
+
+    var, series = job
+    h = hashlib.sha256()
+    h.update(json.dumps([var, style, matplotlib.__version__], default=str).encode())
+    for lvl, x, y in series:
+        h.update(lvl.encode())
+        h.update(np.ascontiguousarray(x).tobytes())
+        h.update(np.ascontiguousarray(y).tobytes())
+    return h.hexdigest()
+
+
+def build_figure(job, style=STYLE):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    var, series = job
+    fig = Figure(figsize=style["figsize"])
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for lvl, x, y in series:
+        ax.scatter(x, y, label=lvl, alpha=style["alpha"])
+
+    title = var.replace("_", " ").title()
+    ax.set_xlabel(title)
+    ax.set_ylabel(style["ylabel"])
+    ax.set_title(f"{title} vs Pitch Speed by Level")
+    ax.legend()
+    fig.tight_layout()
+    return fig
+
+
+def render_png(job, path, style=STYLE):
+    fig = build_figure(job, style)
+    fig.savefig(path, dpi=style["dpi"])
+    return str(path)
+
+
+def save_plots(jobs, output_dir, pool=None, style=STYLE, force=False):
+    """Write ``<var>_vs_pitch_speed.png`` for every job, skipping unchanged ones.
+
+    Returns ``(written, skipped)`` file-name lists.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_dir / MANIFEST
+    try:
+        manifest = json.loads(manifest_path.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    todo, skipped = [], []
+    for job in jobs:
+        name = f"{job[0]}_vs_pitch_speed.png"
+        digest = job_hash(job, style)
+        if not force and manifest.get(name) == digest and (output_dir / name).exists():
+            skipped.append(name)
+        else:
+            todo.append((job, name, digest))
+
+    if pool is None:
+        for job, name, _ in todo:
+            render_png(job, output_dir / name, style)
+    else:
+        futures = [pool.submit(render_png, job, output_dir / name, style) for job, name, _ in todo]
+        for f in futures:
+            f.result()
+
+    for _, name, digest in todo:
+        manifest[name] = digest
+    manifest_path.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+    return [name for _, name, _ in todo], skipped
+
+
+def save_pdf(jobs, pdf_path, style=STYLE):
+    """Write every job as one page of a multi-page PDF."""
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    pdf_path = Path(pdf_path)
+    pdf_path.parent.mkdir(parents=True, exist_ok=True)
+    with PdfPages(pdf_path) as pdf:
+        for job in jobs:
+            pdf.savefig(build_figure(job, style))
+    return str(pdf_path)
@@ -0,0 +1,196 @@
+"""Segmented (per-pitch) array reductions for the full_sig tables.
+
+Every table in the OpenBiomechanics full_sig release is a long frame of
+time samples keyed by ``session_pitch``. Instead of walking
+``groupby(pitch_id)`` in Python, the helpers here sort a table by its key
+once (stably, so rows keep their original order inside a pitch) and then
+reduce all signal columns for all pitches with ``np.*.reduceat``.
+"""
+import numpy as np
+import pandas as pd
+
+from parallel import run_sharded
+
+
+class Segments:
+    """Row order and boundaries of a table grouped by one key column.
+
+    ``order`` indexes the original rows so that ``values[order]`` is grouped
+    by key, ``starts`` holds the first row of every group in that sorted
+    view and ``keys`` the group labels (sorted, NaN keys dropped), matching
+    what ``df.groupby(key)`` would produce.
+    """
+
+    def __init__(self, keys, order, starts, n_rows):
+        self.keys = keys
+        self.order = order
+        self.starts = starts
+        self.n_rows = n_rows
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def stops(self):
+        return np.append(self.starts[1:], self.n_rows)
+
+    @property
+    def sizes(self):
+        return np.diff(np.append(self.starts, self.n_rows))
+
+    @property
+    def ids(self):
+        """Group number of every row in the sorted view."""
+        return np.repeat(np.arange(len(self.keys)), self.sizes)
+
+    @classmethod
+    def from_frame(cls, df, key, within=None):
+        """Group ``df`` by ``key``; optionally sort each group by ``within``.
+
+        Rows with a missing key are left out, like ``groupby`` does. When
+        ``within`` is given, rows are ordered by that column inside each
+        group (NaNs last), as ``sub.sort_values(within)`` would.
+        """
+        codes, keys = pd.factorize(df[key], sort=True)
+        codes = np.asarray(codes)
+        if within is None:
+            order = np.argsort(codes, kind="stable")
+        else:
+            inner = pd.to_numeric(df[within], errors="coerce").to_numpy(dtype=float)
+            inner = np.where(np.isnan(inner), np.inf, inner)
+            order = np.lexsort((inner, codes))
+        order = order[codes[order] >= 0]
+        sorted_codes = codes[order]
+        starts = np.flatnonzero(np.r_[True, sorted_codes[1:] != sorted_codes[:-1]]) if len(order) else np.array([], int)
+        return cls(np.asarray(keys), order, starts, len(order))
+
+    def take(self, df, cols):
+        """Numeric (rows x cols) float matrix of ``cols`` in grouped order."""
+        block = df[list(cols)].iloc[self.order]
+        return block.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float)
+
+
+def segment_peaks(values, starts, times=None):
+    """Peak |value| per segment for every column of a (rows x cols) matrix.
+
+    Returns ``(peak, signed, peak_time)``, each (segments x cols). ``peak`` is
+    the NaN-ignoring maximum of |value| (NaN for all-NaN segments). The signed
+    value and time of the peak come from the first row reaching the maximum
+    among rows where both the value and the time are finite, so they match a
+    ``dropna()`` followed by ``idxmax()``; ``peak_time`` is all NaN when
+    ``times`` is not given.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_seg, n_col = len(starts), values.shape[1]
+    if n_seg == 0:
+        empty = np.empty((0, n_col))
+        return empty, empty.copy(), empty.copy()
+
+    mag = np.abs(values)
+    peak = np.maximum.reduceat(np.where(np.isnan(mag), -np.inf, mag), starts, axis=0)
+    peak[np.isneginf(peak)] = np.nan
+
+    valid = ~np.isnan(mag)
+    if times is not None:
+        times = np.asarray(times, dtype=float)
+        valid &= ~np.isnan(times)[:, None]
+    scored = np.where(valid, mag, -np.inf)
+    best = np.maximum.reduceat(scored, starts, axis=0)
+    sizes = np.diff(np.append(starts, len(values)))
+    hit = valid & (scored == np.repeat(best, sizes, axis=0))
+
+    rows = np.arange(len(values))[:, None]
+    first = np.minimum.reduceat(np.where(hit, rows, len(values)), starts, axis=0)
+    found = first < len(values)
+    first = np.where(found, first, 0)
+
+    signed = np.where(found, np.take_along_axis(values, first, axis=0), np.nan)
+    if times is None:
+        peak_time = np.full((n_seg, n_col), np.nan)
+    else:
+        peak_time = np.where(found, times[first], np.nan)
+    return peak, signed, peak_time
+
+
+def peak_table(df, key, value_cols, time_col=None, segments=None, pool=None):
+    """Per-key peak features of ``value_cols`` in one vectorized pass.
+
+    Returns a DataFrame with the ``key`` column followed by ``<col>_peak``,
+    ``<col>_signed`` and, when ``time_col`` is given, ``<col>_time`` for every
+    value column. ``segments`` may be passed in to reuse a grouping of ``df``;
+    with a process ``pool`` the pitches are reduced in shards (parallel.py).
+    """
+    value_cols = list(value_cols)
+    seg = segments if segments is not None else Segments.from_frame(df, key)
+    values = seg.take(df, value_cols)
+    times = seg.take(df, [time_col])[:, 0] if time_col is not None else None
+    peak, signed, peak_time = run_sharded(segment_peaks, values, seg.starts, times, pool=pool)
+
+    out = {key: seg.keys}
+    for j, col in enumerate(value_cols):
+        out[f"{col}_peak"] = peak[:, j]
+        out[f"{col}_signed"] = signed[:, j]
+        if time_col is not None:
+            out[f"{col}_time"] = peak_time[:, j]
+    return pd.DataFrame(out)
+
+
+def segment_trapz(values, starts, times):
+    """Trapezoid integral over time per segment for every column.
+
+    ``values`` (rows x cols) and ``times`` must already be ordered by time
+    inside each segment. Rows where the value or the time is NaN are skipped
+    (per column), and segments with fewer than two usable samples give NaN,
+    the same as masking each pitch and calling ``np.trapz`` on it.
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        values = values[:, None]
+    times = np.asarray(times, dtype=float)
+    n_seg, n_col = len(starts), values.shape[1]
+    out = np.full((n_seg, n_col), np.nan)
+    if n_seg == 0:
+        return out
+
+    seg_ids = np.repeat(np.arange(n_seg), np.diff(np.append(starts, len(values))))
+    time_ok = ~np.isnan(times)
+    for j in range(n_col):
+        keep = time_ok & ~np.isnan(values[:, j])
+        t, y, ids = times[keep], values[keep, j], seg_ids[keep]
+        same = ids[1:] == ids[:-1]
+        area = np.diff(t) * (y[1:] + y[:-1]) / 2.0
+        total = np.bincount(ids[1:][same], weights=area[same], minlength=n_seg)
+        enough = np.bincount(ids, minlength=n_seg) > 1
+        out[enough, j] = total[enough]
+    return out
+
+
+def impulse_table(df, key, value_cols, time_col, window=None, absolute=True, segments=None, pool=None):
+    """Per-key trapezoid impulse of every column in ``value_cols``.
+
+    Each pitch is integrated in time order. ``absolute`` integrates |value|
+    (as the force-plate impulses do). ``window`` is an optional
+    ``(start_col, end_col)`` pair of per-row event-time columns; only samples
+    with ``start <= time <= end`` are integrated (e.g. foot plant to release).
+    Returns the ``key`` column followed by ``<col>_impulse`` columns.
+    ``pool`` works as in ``peak_table``.
+    """
+    value_cols = list(value_cols)
+    seg = segments if segments is not None else Segments.from_frame(df, key, within=time_col)
+    values = seg.take(df, value_cols)
+    times = seg.take(df, [time_col])[:, 0]
+    if absolute:
+        values = np.abs(values)
+    if window is not None:
+        bounds = seg.take(df, list(window))
+        with np.errstate(invalid="ignore"):
+            inside = (times >= bounds[:, 0]) & (times <= bounds[:, 1])
+        times = np.where(inside, times, np.nan)
+
+    impulse = run_sharded(segment_trapz, values, seg.starts, times, pool=pool)
+    out = {key: seg.keys}
+    for j, col in enumerate(value_cols):
+        out[f"{col}_impulse"] = impulse[:, j]
+    return pd.DataFrame(out)
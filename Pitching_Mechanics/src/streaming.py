@@ -0,0 +1,81 @@
+"""Bounded-memory streaming over the full_sig CSVs.
+
+``pd.read_csv(..., chunksize=...)`` hands back fixed-size row chunks that do
+not line up with pitches. ``iter_pitch_blocks`` re-cuts them so that every
+yielded block holds only complete ``session_pitch`` groups: the rows of the
+last (possibly unfinished) pitch in a chunk are carried over and prepended
+to the next chunk. Per-pitch features computed on a block are therefore
+exactly the ones the in-memory path computes, while only one chunk (plus
+one pitch) is ever held in memory.
+
+The full_sig tables store each pitch as one contiguous run of rows. If a
+pitch shows up again after it has been closed the file is not grouped and
+a ``ValueError`` is raised; use the in-memory path for such files.
+"""
+import pandas as pd
+
+DEFAULT_CHUNKSIZE = 200_000
+
+
+def iter_pitch_blocks(csv_path, key, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """Yield DataFrames of ``columns`` that each contain only whole pitches."""
+    usecols = None if columns is None else list(dict.fromkeys([key] + list(columns)))
+    closed = set()
+    carry = None
+
+    for chunk in pd.read_csv(csv_path, usecols=usecols, chunksize=chunksize):
+        chunk = chunk[chunk[key].notna()]
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+
+        keys = chunk[key].to_numpy()
+        run_starts = _run_starts(keys)
+        tail_start = run_starts[-1]
+
+        block = chunk.iloc[:tail_start]
+        carry = chunk.iloc[tail_start:]
+        if not block.empty:
+            _check_grouped(keys[:tail_start], run_starts[:-1], closed, csv_path)
+            yield block
+
+    if carry is not None and not carry.empty:
+        keys = carry[key].to_numpy()
+        _check_grouped(keys, [0], closed, csv_path)
+        yield carry
+
+
+def _run_starts(keys):
+    change = keys[1:] != keys[:-1]
+    return [0] + (change.nonzero()[0] + 1).tolist()
+
+
+def _check_grouped(keys, run_starts, closed, csv_path):
+    run_keys = [keys[i] for i in run_starts]
+    if len(set(run_keys)) != len(run_keys) or closed.intersection(run_keys):
+        raise ValueError(
+            f"{csv_path} is not grouped by pitch (a session_pitch appears in more than "
+            "one run of rows); streaming needs contiguous pitches, use the in-memory mode."
+        )
+    closed.update(run_keys)
+
+
+def stream_features(csv_path, key, columns, feature_fn, chunksize=DEFAULT_CHUNKSIZE):
+    """Apply ``feature_fn`` to every block of whole pitches and concatenate.
+
+    ``feature_fn`` takes a DataFrame and returns a per-pitch DataFrame (or a
+    tuple of them); the pieces are concatenated in key order.
+    """
+    pieces = []
+    for block in iter_pitch_blocks(csv_path, key, columns, chunksize=chunksize):
+        out = feature_fn(block)
+        pieces.append(out if isinstance(out, tuple) else (out,))
+    if not pieces:
+        raise ValueError(f"No rows with a {key} found in {csv_path}")
+
+    merged = tuple(
+        pd.concat(parts, ignore_index=True).sort_values(key, kind="stable").reset_index(drop=True)
+        for parts in zip(*pieces)
+    )
+    return merged if len(merged) > 1 else merged[0]
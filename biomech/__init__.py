@@ -0,0 +1,5 @@
+"""Helpers shared by the portfolio's biomechanics pipelines.
+
+The projects are standalone scripts under ``<project>/src``; each one puts
+the repository root on ``sys.path`` to import from this package.
+"""
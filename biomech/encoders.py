@@ -0,0 +1,223 @@
+"""Encoders that share one render pass.
+
+A figure is rasterized once per frame into an RGB array (height x width x 3,
+uint8) and the same array is handed to every encoder:
+
+* ``Mp4Encoder`` pipes raw RGB frames into ffmpeg (one process, one pass);
+* ``GifEncoder`` maps every frame onto a palette computed once from the
+  first frame and writes the GIF when closed;
+* ``PngSequenceEncoder`` writes ``<prefix>_00000.png``, ``..._00001.png``, ...
+
+``encode_frames`` drives them. Each encoder fails on its own: an encoder that
+raises while opening, writing or closing is aborted and reported, and the
+others keep going.
+"""
+import subprocess
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+from . import profiling
+
+
+def ffmpeg_exe():
+    """ffmpeg from imageio-ffmpeg if installed, else matplotlib's setting / PATH."""
+    try:
+        import imageio_ffmpeg
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        import matplotlib as mpl
+        return mpl.rcParams["animation.ffmpeg_path"]
+
+
+class FrameEncoder:
+    """Base class: ``open(width, height)``, ``write(frame)``, ``close()``, ``abort()``."""
+
+    name = "frames"
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def open(self, width, height):
+        pass
+
+    def write(self, frame):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def abort(self):
+        pass
+
+
+class Mp4Encoder(FrameEncoder):
+    """Stream raw RGB frames to an ffmpeg subprocess."""
+
+    name = "MP4"
+
+    def __init__(self, path, fps, codec="libx264", bitrate=1800, ffmpeg=None):
+        super().__init__(path)
+        self.fps = fps
+        self.codec = codec
+        self.bitrate = bitrate
+        self.ffmpeg = ffmpeg
+        self.proc = None
+        self._log = None
+
+    def open(self, width, height):
+        cmd = [self.ffmpeg or ffmpeg_exe(), "-f", "rawvideo", "-vcodec", "rawvideo",
+               "-s", f"{width}x{height}", "-pix_fmt", "rgb24", "-framerate", str(self.fps),
+               "-loglevel", "error", "-i", "pipe:", "-vcodec", self.codec]
+        if self.bitrate > 0:
+            cmd += ["-b", f"{self.bitrate}k"]
+        cmd += ["-y", str(self.path)]
+        # stderr goes to a file: a full pipe would block ffmpeg while we write stdin
+        self._log = tempfile.TemporaryFile()
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=self._log)
+
+    def write(self, frame):
+        self.proc.stdin.write(frame.tobytes())
+
+    def close(self):
+        self.proc.stdin.close()
+        code = self.proc.wait()
+        self._log.seek(0)
+        err = self._log.read().decode(errors="replace").strip()
+        self._log.close()
+        if code != 0:
+            raise RuntimeError(f"ffmpeg exited with code {code}: {err[-500:]}")
+
+    def abort(self):
+        if self.proc is not None and self.proc.poll() is None:
+            self.proc.kill()
+            self.proc.wait()
+        if self._log is not None:
+            self._log.close()
+
+
+class GifEncoder(FrameEncoder):
+    """Palettized GIF with one adaptive palette computed from the first frame.
+
+    Later frames are mapped to their nearest palette colour (exact). The
+    mapping is cached in a 24-bit colour lookup table, so only colours not
+    seen in earlier frames cost a nearest-colour search.
+    """
+
+    name = "GIF"
+
+    def __init__(self, path, fps, colors=256):
+        super().__init__(path)
+        self.fps = fps
+        self.colors = colors
+        self.palette = None
+        self.frames = []
+        self._lut = self._known = None
+
+    def write(self, frame):
+        from PIL import Image
+
+        if self.palette is None:
+            first = Image.fromarray(frame, "RGB").convert("P", palette=Image.Palette.ADAPTIVE, colors=self.colors)
+            self.palette = np.asarray(first.getpalette(), dtype=np.int32).reshape(-1, 3)
+            self._lut = np.zeros(1 << 24, dtype=np.uint8)
+            self._known = np.zeros(1 << 24, dtype=bool)
+        packed = (frame[..., 0].astype(np.int32) << 16) | (frame[..., 1].astype(np.int32) << 8) | frame[..., 2]
+        new = packed[~self._known[packed]]
+        if new.size:
+            colors = np.unique(new)
+            rgb = np.stack([colors >> 16, (colors >> 8) & 255, colors & 255], axis=1)
+            self._lut[colors] = ((rgb[:, None, :] - self.palette[None]) ** 2).sum(axis=2).argmin(axis=1)
+            self._known[colors] = True
+        im = Image.fromarray(self._lut[packed], "P")
+        im.putpalette(self.palette.astype(np.uint8).tobytes())
+        self.frames.append(im)
+
+    def close(self):
+        # All frames share one palette: skip Pillow's per-frame palette optimisation
+        self.frames[0].save(self.path, save_all=True, append_images=self.frames[1:],
+                            duration=int(1000 / self.fps), loop=0, optimize=False)
+        self.frames = []
+        self._lut = self._known = None
+
+    def abort(self):
+        self.frames = []
+        self._lut = self._known = None
+
+
+class PngSequenceEncoder(FrameEncoder):
+    """One PNG per frame in a directory."""
+
+    name = "PNG"
+
+    def __init__(self, directory, prefix="frame"):
+        super().__init__(directory)
+        self.prefix = prefix
+        self.count = 0
+
+    def open(self, width, height):
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, frame):
+        from PIL import Image
+
+        Image.fromarray(frame, "RGB").save(self.path / f"{self.prefix}_{self.count:05d}.png")
+        self.count += 1
+
+
+def figure_rgb(canvas):
+    """Draw an Agg canvas and return its pixels as a contiguous RGB array."""
+    canvas.draw()
+    return np.ascontiguousarray(np.asarray(canvas.buffer_rgba())[..., :3])
+
+
+def encode_frames(frames, encoders, log=print):
+    """Feed every RGB frame from the iterable ``frames`` to all ``encoders``.
+
+    Returns the encoders that finished successfully. Failures are logged as
+    ``[WARN] <name> save failed: ...`` and only drop the failing encoder.
+    """
+    live = list(encoders)
+
+    def drop(enc, exc):
+        log(f"[WARN] {enc.name} save failed: {exc}")
+        try:
+            enc.abort()
+        except Exception:
+            pass
+        live.remove(enc)
+
+    opened = False
+    for frame in frames:
+        if not opened:
+            height, width = frame.shape[:2]
+            for enc in list(live):
+                try:
+                    enc.open(width, height)
+                except Exception as e:
+                    drop(enc, e)
+            opened = True
+        for enc in list(live):
+            try:
+                with profiling.stage(f"encode {enc.name.lower()}", frames=1):
+                    enc.write(frame)
+            except Exception as e:
+                drop(enc, e)
+        if not live:
+            break
+    if not opened:
+        for enc in live:
+            log(f"[WARN] {enc.name} save failed: no frames to encode")
+        return []
+
+    done = []
+    for enc in list(live):
+        try:
+            with profiling.stage(f"encode {enc.name.lower()}"):
+                enc.close()
+            log(f"[OK] {enc.name} saved → {enc.path}")
+            done.append(enc)
+        except Exception as e:
+            drop(enc, e)
+    return done
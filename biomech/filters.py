@@ -0,0 +1,163 @@
+"""Multi-channel filtering for motion-capture arrays.
+
+Everything works on a whole (frames x ...) array in one call: trailing
+axes are flattened to channels, and channels that share a NaN pattern
+(e.g. a joint's x/y/z) are processed together.
+
+* ``fill_gaps``       linear interpolation across NaN runs of at most
+  ``max_gap`` frames; longer gaps and the ends stay NaN.
+* ``butter_lowpass``  zero-phase Butterworth low-pass (forward-backward, so
+  no time shift) with a cutoff in Hz, applied to each contiguous run of
+  data separately.
+* ``lowpass_motion``  both, in that order: the usual cleaning step before
+  angles are computed or skeletons are rendered.
+* ``moving_average``  centred moving average of every channel (the light
+  smoothing of plotted curves), NaN gaps bridged first.
+
+``butter_lowpass`` uses ``scipy.signal.butter``/``filtfilt`` when SciPy is
+installed. Without it, the same zero-phase magnitude response
+(``|H(f)|**2`` of the digital Butterworth design) is applied in the
+frequency domain to the run padded by odd reflection, which matches
+``filtfilt`` away from the first and last few samples.
+"""
+import numpy as np
+
+try:
+    from scipy import signal as _signal
+except ImportError:  # optional dependency
+    _signal = None
+
+
+def _channels(X):
+    X = np.asarray(X, dtype=float)
+    return X.reshape(X.shape[0], -1), X.shape
+
+
+def _pattern_groups(flat):
+    """(mask of finite rows, channel indices) for every distinct NaN pattern."""
+    patterns, group = np.unique(np.isfinite(flat), axis=1, return_inverse=True)
+    group = group.ravel()
+    return [(patterns[:, g], np.flatnonzero(group == g)) for g in range(patterns.shape[1])]
+
+
+def _runs(mask):
+    """(start, stop) of every run of True in a 1-D mask."""
+    edges = np.diff(np.r_[0, mask.astype(np.int8), 0])
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def fill_gaps(X, max_gap=None):
+    """Linearly interpolate interior NaN runs of at most ``max_gap`` frames.
+
+    ``max_gap=None`` bridges every interior gap. Leading/trailing NaN runs
+    are never filled. Returns a new array of the same shape.
+    """
+    flat, shape = _channels(X)
+    out = flat.copy()
+    n = len(flat)
+    idx = np.arange(n)
+    for ok, cols in _pattern_groups(flat):
+        valid = np.flatnonzero(ok)
+        if len(valid) < 2 or len(valid) == n:
+            continue
+        missing = np.flatnonzero(~ok)
+        hi = np.searchsorted(valid, missing)                  # next valid sample
+        inside = (hi > 0) & (hi < len(valid))
+        missing, hi = missing[inside], hi[inside]
+        a, b = valid[hi - 1], valid[hi]
+        if max_gap is not None:
+            short = (b - a - 1) <= max_gap
+            missing, a, b = missing[short], a[short], b[short]
+        if missing.size == 0:
+            continue
+        w = ((idx[missing] - a) / (b - a))[:, None]
+        out[np.ix_(missing, cols)] = flat[np.ix_(a, cols)] * (1 - w) + flat[np.ix_(b, cols)] * w
+    return out.reshape(shape)
+
+
+def _padlen(order):
+    return 3 * (order + 1)          # scipy.signal.filtfilt's default for a (b, a) design
+
+
+def _fft_filtfilt(x, cutoff_hz, rate_hz, order):
+    """Zero-phase Butterworth response applied in the frequency domain (x: samples x channels)."""
+    pad = min(_padlen(order), len(x) - 1)
+    head = 2 * x[:1] - x[pad:0:-1]
+    tail = 2 * x[-1:] - x[-2:-pad - 2:-1]
+    y = np.concatenate([head, x, tail], axis=0)
+    f = np.fft.rfftfreq(len(y), d=1.0 / rate_hz)
+    warped = np.tan(np.pi * np.minimum(f, rate_hz / 2 * (1 - 1e-12)) / rate_hz) / np.tan(np.pi * cutoff_hz / rate_hz)
+    gain = 1.0 / (1.0 + warped ** (2 * order))
+    y = np.fft.irfft(np.fft.rfft(y, axis=0) * gain[:, None], n=len(y), axis=0)
+    return y[pad:pad + len(x)]
+
+
+def butter_lowpass(X, cutoff_hz, rate_hz, order=4):
+    """Zero-phase low-pass of every channel of ``X`` (frames x ...) at ``cutoff_hz``.
+
+    Each contiguous run of finite samples is filtered on its own; runs too
+    short to filter (<= 3 * (order + 1) samples) are left unchanged, and NaN
+    stays NaN. Returns a new array of the same shape.
+    """
+    if not 0 < cutoff_hz < rate_hz / 2:
+        raise ValueError(f"Cutoff {cutoff_hz} Hz must be between 0 and the Nyquist frequency ({rate_hz / 2:g} Hz).")
+    flat, shape = _channels(X)
+    out = flat.copy()
+    if _signal is not None:
+        b, a = _signal.butter(order, cutoff_hz / (rate_hz / 2))
+    for ok, cols in _pattern_groups(flat):
+        for s, e in zip(*_runs(ok)):
+            if e - s <= _padlen(order):
+                continue
+            seg = flat[s:e][:, cols]
+            if _signal is not None:
+                out[s:e, cols] = _signal.filtfilt(b, a, seg, axis=0)
+            else:
+                out[s:e, cols] = _fft_filtfilt(seg, cutoff_hz, rate_hz, order)
+    return out.reshape(shape)
+
+
+def lowpass_motion(X, rate_hz, cutoff_hz, max_gap=None, order=4):
+    """``fill_gaps`` (gaps up to ``max_gap`` frames) then ``butter_lowpass``."""
+    return butter_lowpass(fill_gaps(X, max_gap), cutoff_hz, rate_hz, order)
+
+
+def _hold_ends(flat):
+    """Leading/trailing NaNs of every channel replaced by its first/last finite value."""
+    n = len(flat)
+    ok = np.isfinite(flat)
+    rows = np.arange(n)[:, None]
+    last = np.maximum.accumulate(np.where(ok, rows, -1), axis=0)               # previous finite row
+    nxt = np.minimum.accumulate(np.where(ok, rows, n)[::-1], axis=0)[::-1]     # next finite row
+    src = np.where(last >= 0, last, nxt)
+    src = np.where(src < n, src, 0)
+    return np.where(ok.any(axis=0), np.take_along_axis(flat, src, axis=0), np.nan)
+
+
+def moving_average(X, win):
+    """Centred ``win``-frame moving average of every channel of ``X`` (frames x ...).
+
+    NaN gaps are interpolated linearly and leading/trailing NaNs hold the
+    nearest value first; the average is zero-padded at the ends like
+    ``np.convolve(x, np.ones(win) / win, mode="same")``. ``win`` <= 1 returns
+    a float copy; all-NaN channels stay NaN.
+    """
+    flat, shape = _channels(X)
+    if win is None or win <= 1 or len(flat) == 0:
+        return flat.copy().reshape(shape)
+    win = int(win)
+    y = _hold_ends(fill_gaps(flat))
+    k = np.ones(win) / win
+    lo = (win - 1) // 2
+    out = np.empty_like(y)
+    for j in range(y.shape[1]):      # np.convolve per channel: same rounding as the per-series helper
+        out[:, j] = np.convolve(y[:, j], k, mode="full")[lo:lo + len(y)]
+    return out.reshape(shape)
+
+
+def sample_rate(t):
+    """Sampling rate (Hz) from the median step of a time vector in seconds (None if unknown)."""
+    t = np.asarray(t, dtype=float)
+    dt = np.diff(t[np.isfinite(t)])
+    dt = dt[dt > 0]
+    return float(1.0 / np.median(dt)) if dt.size else None
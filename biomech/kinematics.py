@@ -0,0 +1,98 @@
+"""Vectorized joint-angle kinematics over whole trials.
+
+Every function works on (frames x 3) arrays at once. NaN handling matches
+the per-frame helpers the scripts started from: a frame whose inputs are
+not all finite, or where a vector has zero length, gives NaN.
+
+Angles are described by a table ``{name: (kind, *points)}``:
+
+* ``("flexion", a, vertex, b)``  180 - angle between a-vertex and b-vertex
+  (0 = straight limb);
+* ``("angle", a, vertex, b)``    the angle at ``vertex`` itself (0..180);
+* ``("segment", a, b, axis)``    angle between the segment a->b and a
+  fixed ``axis`` vector, e.g. ``(0, 0, 1)`` for trunk lean from vertical.
+
+A point is a joint name or a tuple of names (their midpoint, e.g.
+``("L_HIP", "R_HIP")``). Points are looked up in a ``{name: (frames x 3)}``
+mapping.
+"""
+import numpy as np
+
+KINDS = ("flexion", "angle", "segment")
+
+
+def angle_deg(u, v):
+    """Unsigned angle (0..180 deg) between row vectors of ``u`` and ``v``."""
+    u = np.asarray(u, float)
+    v = np.asarray(v, float)
+    ok = np.isfinite(u).all(axis=-1) & np.isfinite(v).all(axis=-1)
+    nu = np.sqrt(np.einsum("...i,...i->...", u, u))
+    nv = np.sqrt(np.einsum("...i,...i->...", v, v))
+    ok &= (nu != 0) & (nv != 0)
+    dot = np.einsum("...i,...i->...", u, v)
+    c = np.cross(u, v)
+    crs = np.sqrt(np.einsum("...i,...i->...", c, c))
+    with np.errstate(invalid="ignore"):
+        return np.where(ok, np.degrees(np.arctan2(crs, dot)), np.nan)
+
+
+def midpoint(a, b):
+    """Row-wise midpoint; NaN where either point has a non-finite coordinate."""
+    a = np.asarray(a, float)
+    b = np.asarray(b, float)
+    ok = np.isfinite(a).all(axis=-1) & np.isfinite(b).all(axis=-1)
+    return np.where(ok[..., None], 0.5 * (a + b), np.nan)
+
+
+def midpoint_or_first(a, b):
+    """Midpoint where both points have data, otherwise whichever one does.
+
+    Per frame: if both ``a`` and ``b`` have any finite coordinate, their
+    midpoint (NaN unless both are fully finite); else ``a`` if it has any
+    finite coordinate, else ``b`` if it does, else NaN.
+    """
+    a = np.asarray(a, float)
+    b = np.asarray(b, float)
+    a_any = np.isfinite(a).any(axis=-1)[..., None]
+    b_any = np.isfinite(b).any(axis=-1)[..., None]
+    first = np.where(a_any, a, np.where(b_any, b, np.nan))
+    return np.where(a_any & b_any, midpoint(a, b), first)
+
+
+def point(points, ref):
+    """Resolve a point reference (name or tuple of names -> midpoint)."""
+    if isinstance(ref, str):
+        return np.asarray(points[ref], float)
+    arrs = [np.asarray(points[r], float) for r in ref]
+    ok = np.logical_and.reduce([np.isfinite(x).all(axis=-1) for x in arrs])
+    return np.where(ok[:, None], np.mean(arrs, axis=0), np.nan)
+
+
+def joint_angle(points, definition):
+    """One angle definition (see module docstring) over all frames."""
+    kind, *refs = definition
+    if kind in ("flexion", "angle"):
+        a, vertex, b = (point(points, r) for r in refs)
+        ang = angle_deg(a - vertex, b - vertex)
+        return 180.0 - ang if kind == "flexion" else ang
+    if kind == "segment":
+        a, b = point(points, refs[0]), point(points, refs[1])
+        axis = np.broadcast_to(np.asarray(refs[2], float), a.shape)
+        return angle_deg(b - a, axis)
+    raise ValueError(f"Unknown angle kind {kind!r}; expected one of {KINDS}")
+
+
+def point_names(definition):
+    """Joint names an angle definition reads."""
+    kind, *refs = definition
+    refs = refs[:2] if kind == "segment" else refs
+    return [n for r in refs for n in ((r,) if isinstance(r, str) else r)]
+
+
+def joint_angles(points, table):
+    """``{name: (frames,) degrees}`` for every entry of an angle ``table``.
+
+    Entries whose points are missing from ``points`` are skipped.
+    """
+    return {name: joint_angle(points, definition) for name, definition in table.items()
+            if all(n in points for n in point_names(definition))}
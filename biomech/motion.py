@@ -0,0 +1,169 @@
+"""Common in-memory model for motion-capture trials.
+
+A ``MotionTrial`` holds one capture (a pitching session or a free-throw
+trial) as a single contiguous float32 (frames x joints x 3) array, the
+joint names with a name -> index map, per-frame times (s) and frame
+numbers, and free-form metadata (session, participant/trial IDs, result,
+...). ``trial["R_WRIST"]`` is a zero-copy (frames x 3) view into that
+array, so a trial can be handed straight to ``biomech.kinematics``; filters
+and renderers work on ``trial.positions`` as one buffer.
+
+Loaders:
+
+* ``from_landmarks`` / ``load_landmarks_csv``  wide landmark exports with
+  ``<joint>_x/_y/_z`` columns (sessions split where the time column resets);
+* ``from_tracking`` / ``load_tracking``  SPL tracking JSON (the ball is the
+  joint ``"ball"``), optionally through ``biomech.trial_cache``.
+
+float32 keeps ~7 significant digits, well beyond capture precision, at
+half the memory of float64 pandas frames.
+"""
+import numpy as np
+
+DTYPE = np.float32
+AXES = "xyz"
+
+
+class MotionTrial:
+    """One capture as a (frames x joints x 3) float32 array plus names, times and metadata."""
+
+    def __init__(self, positions, joints, times=None, frames=None, meta=None):
+        self.positions = np.ascontiguousarray(positions, dtype=DTYPE)
+        if self.positions.ndim != 3 or self.positions.shape[1:] != (len(joints), 3):
+            raise ValueError(f"positions must be (frames x {len(joints)} x 3), got {self.positions.shape}")
+        n = len(self.positions)
+        self.joints = list(joints)
+        self.joint_index = {name: j for j, name in enumerate(self.joints)}
+        self.times = np.full(n, np.nan) if times is None else np.asarray(times, dtype=float)
+        self.frames = np.arange(n, dtype=float) if frames is None else np.asarray(frames, dtype=float)
+        self.meta = dict(meta or {})
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, name):
+        return name in self.joint_index
+
+    def __getitem__(self, name):
+        """(frames x 3) view of one joint (no copy)."""
+        return self.positions[:, self.joint_index[name]]
+
+    def keys(self):
+        return list(self.joints)
+
+    def joint(self, name):
+        """Like ``trial[name]``, but all-NaN for a joint the trial does not have."""
+        if name in self.joint_index:
+            return self[name]
+        return np.full((len(self), 3), np.nan, dtype=DTYPE)
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.times.nbytes + self.frames.nbytes
+
+    def replace(self, positions=None, times=None, frames=None):
+        """Same joints and metadata with some arrays swapped (e.g. filtered positions)."""
+        return MotionTrial(self.positions if positions is None else positions, self.joints,
+                           self.times if times is None else times,
+                           self.frames if frames is None else frames, self.meta)
+
+    def take(self, rows):
+        """Trial restricted to ``rows`` (a boolean mask or indices)."""
+        return MotionTrial(self.positions[rows], self.joints, self.times[rows], self.frames[rows], self.meta)
+
+    def with_joints(self, **arrays):
+        """Trial with extra (frames x 3) joints appended (e.g. derived midpoints)."""
+        names = [n for n in arrays if n not in self.joint_index]
+        P = np.empty((len(self), len(self.joints) + len(names), 3), dtype=DTYPE)
+        P[:, :len(self.joints)] = self.positions
+        joints = self.joints + names
+        out = MotionTrial(P, joints, self.times, self.frames, self.meta)
+        for name, a in arrays.items():
+            out.positions[:, out.joint_index[name]] = a
+        return out
+
+    def complete_rows(self):
+        """Mask of frames where every joint has all three coordinates."""
+        return ~np.isnan(self.positions).any(axis=(1, 2))
+
+    def axis_limits(self):
+        """((xmin, xmax), (ymin, ymax), (zmin, zmax)) over all frames; (-1, 1) for an empty axis."""
+        limits = []
+        for a in range(3):
+            v = self.positions[..., a]
+            v = v[~np.isnan(v)]
+            limits.append((float(v.min()), float(v.max())) if v.size else (-1.0, 1.0))
+        return tuple(limits)
+
+
+# -----------------------------
+# Landmark CSV (wide *_x/_y/_z columns)
+# -----------------------------
+def landmark_joints(columns):
+    """Joint names that have all of ``<joint>_x/_y/_z`` among ``columns`` (column order)."""
+    cols = set(columns)
+    return [c[:-2] for c in columns if c.endswith("_x") and f"{c[:-2]}_y" in cols and f"{c[:-2]}_z" in cols]
+
+
+def session_ids(time):
+    """0-based session id per row: a new session starts where time steps
+    backwards or is exactly 0 (except the first row). Missing times carry the
+    previous value forward; leading ones count as 0."""
+    import pandas as pd
+
+    t = pd.to_numeric(pd.Series(np.asarray(time)), errors="coerce").ffill().fillna(0.0).to_numpy()
+    resets = np.r_[False, (np.diff(t) < 0) | (t[1:] == 0)]
+    return np.cumsum(resets)
+
+
+def from_landmarks(df, time_col="time", meta=None):
+    """MotionTrial from a DataFrame of landmark rows (one session)."""
+    import pandas as pd
+
+    joints = landmark_joints(list(df.columns))
+    cols = [f"{j}_{a}" for j in joints for a in AXES]
+    P = df[cols].to_numpy(dtype=DTYPE).reshape(len(df), len(joints), 3)
+    times = pd.to_numeric(df[time_col], errors="coerce").to_numpy(dtype=float) if time_col in df else None
+    return MotionTrial(P, joints, times, meta=meta)
+
+
+def load_landmarks_csv(path, time_col="time", sessions=None, key_col="session_pitch"):
+    """Every session (or the 1-based ``sessions``) of a landmark CSV as MotionTrials."""
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    if time_col not in df.columns:
+        raise KeyError(f"Expected a '{time_col}' column in the CSV.")
+    ids = session_ids(df[time_col])
+    wanted = None if sessions is None else set(sessions)
+    out = []
+    for sid, chunk in df.groupby(ids, sort=True):
+        label = int(sid) + 1
+        if wanted is not None and label not in wanted:
+            continue
+        meta = {"session": label, "source": str(path)}
+        if key_col in chunk:
+            keys = chunk[key_col].dropna()
+            meta[key_col] = keys.iloc[0] if len(keys) else None
+        out.append(from_landmarks(chunk.reset_index(drop=True), time_col, meta))
+    return out
+
+
+# -----------------------------
+# Tracking JSON
+# -----------------------------
+def from_tracking(trial):
+    """MotionTrial from a ``tracking.TrackingTrial``; the ball becomes joint ``"ball"``."""
+    P = np.empty((len(trial), len(trial.joints) + 1, 3), dtype=DTYPE)
+    P[:, :-1] = trial.positions
+    P[:, -1] = trial.ball
+    return MotionTrial(P, list(trial.joints) + ["ball"], np.asarray(trial.times_ms, float) / 1000.0,
+                       trial.frames, trial.meta)
+
+
+def load_tracking(path, cache=True, cache_dir=None):
+    """MotionTrial of a tracking JSON trial, through the binary trial cache unless ``cache`` is False."""
+    from . import trial_cache, tracking
+
+    T = trial_cache.load_trial(path, cache_dir=cache_dir) if cache else tracking.read_tracking(path)
+    return from_tracking(T)
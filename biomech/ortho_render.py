@@ -0,0 +1,157 @@
+"""Headless fixed-camera skeleton renderer.
+
+An alternative to drawing every frame through mplot3d: the camera never
+moves, so every view is an orthographic projection. All frames' joints are
+projected for all views with one matrix multiply, mapped to pixels once,
+and each frame is then rasterized straight into an RGB buffer — joints as
+discs, bones as thick lines sampled along their length — with array
+operations only. Several views (side, front, overhead, ...) are tiled side
+by side in one frame.
+
+``render_frames`` yields RGB arrays that feed ``biomech.encoders`` the same
+way the matplotlib renderer does.
+
+Coordinates are expected with z up (the landmark exports' convention).
+"""
+import numpy as np
+
+# 3 x 2 projection matrices: rows are x, y, z; columns the image (right, up) axes
+VIEWS = {
+    "side": np.array([[1.0, 0.0], [0.0, 0.0], [0.0, 1.0]]),       # look along y
+    "front": np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0]]),      # look along x
+    "overhead": np.array([[1.0, 0.0], [0.0, 1.0], [0.0, 0.0]]),   # look down z
+}
+
+BONE_COLORS = np.array([
+    (31, 119, 180), (255, 127, 14), (44, 160, 44), (214, 39, 40), (148, 103, 189),
+    (140, 86, 75), (227, 119, 194), (127, 127, 127), (188, 189, 34), (23, 190, 207),
+], dtype=np.uint8)  # matplotlib's tab10 cycle
+JOINT_COLOR = np.array((40, 40, 40), dtype=np.uint8)
+BACKGROUND = 255
+TITLE_HEIGHT = 18
+
+
+def _brush(radius):
+    """Pixel offsets (dy, dx) of a filled disc."""
+    r = int(np.ceil(radius))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    keep = dy * dy + dx * dx <= radius * radius + 0.5
+    return np.stack([dy[keep], dx[keep]], axis=1)
+
+
+def project(P, views):
+    """(frames x joints x 3) -> (frames x views x joints x 2) with one matmul."""
+    M = np.concatenate([VIEWS[v] if isinstance(v, str) else np.asarray(v, float) for v in views], axis=1)
+    uv = P @ M                                            # frames x joints x 2V
+    return uv.reshape(P.shape[0], P.shape[1], len(views), 2).transpose(0, 2, 1, 3)
+
+
+def pixel_coords(uv, panel_size, margin):
+    """Fit every view's projected coordinates (over all frames) into its panel.
+
+    Returns float (x, y) pixel coordinates, y pointing down, per panel.
+    """
+    width, height = panel_size
+    lo = np.nanmin(uv, axis=(0, 2))                       # views x 2
+    hi = np.nanmax(uv, axis=(0, 2))
+    lo = np.where(np.isfinite(lo), lo, -1.0)
+    hi = np.where(np.isfinite(hi), hi, 1.0)
+    span = np.maximum(hi - lo, 1e-9)
+    scale = np.minimum((width - 2 * margin) / span[:, 0], (height - 2 * margin) / span[:, 1])
+    center = (lo + hi) / 2
+    x = (uv[..., 0] - center[None, :, None, 0]) * scale[None, :, None] + width / 2
+    y = height / 2 - (uv[..., 1] - center[None, :, None, 1]) * scale[None, :, None]
+    return np.stack([x, y], axis=-1)
+
+
+def _background(views, panel_size, title_height):
+    width, height = panel_size
+    img = np.full((title_height + height, width * len(views), 3), BACKGROUND, dtype=np.uint8)
+    for i in range(1, len(views)):
+        img[title_height:, i * width - 1] = 200           # panel separators
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError:
+        return img
+    im = Image.fromarray(img)
+    draw = ImageDraw.Draw(im)
+    for i, v in enumerate(views):
+        draw.text((i * width + 6, title_height + 4), v if isinstance(v, str) else f"view {i + 1}", fill=(90, 90, 90))
+    return np.asarray(im).copy()
+
+
+def render_frames(P, pairs, views=("side", "front", "overhead"), panel_size=(360, 360), margin=24,
+                  joint_radius=3.0, line_width=2.0, title=None, times=None):
+    """Yield one tiled RGB frame per row of ``P`` (frames x joints x 3).
+
+    ``pairs`` are (bones x 2) joint indices (-1 = missing joint). ``title``
+    is an optional format string with ``{frame}`` (and ``{time}`` from
+    ``times``, the frames' timestamps), drawn in a header strip.
+    Width and height are kept even for video encoders.
+    """
+    n_frames, n_joints = P.shape[:2]
+    width, height = (int(panel_size[0]) // 2 * 2, int(panel_size[1]) // 2 * 2)
+    title_height = TITLE_HEIGHT if title else 0
+    n_views = len(views)
+
+    # All frames, all views: one projection, one affine map to pixels
+    xy = pixel_coords(project(P, views), (width, height), margin)       # F x V x J x 2
+    xy[..., 0] += (np.arange(n_views) * width)[None, :, None]
+    xy[..., 1] += title_height
+
+    pairs = np.asarray(pairs, dtype=int).reshape(-1, 2)
+    known = (pairs >= 0).all(axis=1)
+    safe = np.where(pairs >= 0, pairs, 0)
+    valid = ~np.isnan(P).any(axis=2)                                     # F x J
+    bone_ok = known & valid[:, safe].all(axis=2)                         # F x B
+    colors = BONE_COLORS[np.arange(len(pairs)) % len(BONE_COLORS)]
+
+    bg = _background(views, (width, height), title_height)
+    H, W = bg.shape[:2]
+    line_brush = _brush(line_width / 2.0)
+    joint_brush = _brush(joint_radius)
+    # Each view's pixels stay inside its own panel
+    panel_lo = np.arange(n_views) * width
+    panel_hi = panel_lo + width - 1
+
+    def stamp(img, pts, panel, brush, color):
+        """Paint ``brush`` at every (x, y) in ``pts`` (N x 2), clipped to its panel."""
+        py = np.rint(pts[:, 1]).astype(np.intp)[:, None] + brush[None, :, 0]
+        px = np.rint(pts[:, 0]).astype(np.intp)[:, None] + brush[None, :, 1]
+        lo = panel_lo[panel][:, None]
+        hi = panel_hi[panel][:, None]
+        inside = (py >= title_height) & (py < H) & (px >= lo) & (px <= hi)
+        img[py[inside], px[inside]] = color if color.ndim == 1 else np.broadcast_to(
+            color[:, None, :], py.shape + (3,))[inside]
+
+    draw = None
+    if title:
+        try:
+            from PIL import Image, ImageDraw
+            draw = (Image, ImageDraw)
+        except ImportError:
+            draw = None
+
+    for f in range(n_frames):
+        img = bg.copy()
+        ok = bone_ok[f]
+        if ok.any():
+            seg = xy[f][:, safe[ok]]                                     # V x B x 2 x 2
+            a, b = seg[:, :, 0], seg[:, :, 1]
+            n = int(np.ceil(np.nanmax(np.abs(b - a)))) + 1
+            t = np.linspace(0.0, 1.0, n)
+            pts = a[:, :, None] + t[None, None, :, None] * (b - a)[:, :, None]   # V x B x n x 2
+            panel = np.broadcast_to(np.arange(n_views)[:, None, None], pts.shape[:3]).ravel()
+            col = np.broadcast_to(colors[ok][None, :, None], pts.shape[:3] + (3,)).reshape(-1, 3)
+            stamp(img, pts.reshape(-1, 2), panel, line_brush, col)
+        jv = valid[f]
+        if jv.any():
+            pts = xy[f][:, jv]                                           # V x J' x 2
+            panel = np.broadcast_to(np.arange(n_views)[:, None], pts.shape[:2]).ravel()
+            stamp(img, pts.reshape(-1, 2), panel, joint_brush, JOINT_COLOR)
+        if draw is not None:
+            Image, ImageDraw = draw
+            im = Image.fromarray(img)
+            ImageDraw.Draw(im).text((6, 3), title.format(frame=f, time=times[f] if times is not None else None), fill=(0, 0, 0))
+            img = np.asarray(im)
+        yield img
@@ -0,0 +1,184 @@
+"""Per-stage timing and memory instrumentation for the pipeline scripts.
+
+A ``StageProfiler`` records, for every named stage, the number of calls,
+wall time, CPU time, the tracemalloc peak reached while the stage ran, the
+process peak RSS at the end of the stage and optional row/frame counts.
+Stages called many times (e.g. one animation frame update) are aggregated
+under one name. Reports are written as JSON (run info + stages) or CSV.
+
+Instrumented code does not need to pass a profiler around::
+
+    from biomech import profiling
+
+    with profiling.stage("load") as st:
+        df = read(...)
+        st.rows = len(df)
+
+``stage()`` records into the active profiler set with ``activate()`` and is
+a no-op otherwise, so instrumentation costs nothing unless a script is run
+with its profiling flag.
+"""
+import csv
+import json
+import os
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+class StageCounts:
+    """Row/frame counts of one stage call; may be filled in inside the block."""
+
+    __slots__ = ("rows", "frames")
+
+    def __init__(self, rows=None, frames=None):
+        self.rows = rows
+        self.frames = frames
+
+
+FIELDS = ["stage", "calls", "wall_s", "cpu_s", "py_peak_mb", "rss_peak_mb", "rows", "frames"]
+
+
+def peak_rss_mb():
+    """High-water mark of the process RSS in MB (None where unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes.
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class StageProfiler:
+    """Collects per-stage wall/CPU time, memory peaks and row/frame counts."""
+
+    def __init__(self, trace_memory=True):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _stack(self):
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name, rows=None, frames=None):
+        stack = self._stack()
+        if self.trace_memory:
+            # Fold the enclosing stage's peak so far into it before resetting.
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        frame = {"peak": 0}
+        stack.append(frame)
+        counts = StageCounts(rows, frames)
+        wall0, cpu0 = time.perf_counter(), time.process_time()
+        try:
+            yield counts
+        finally:
+            wall = time.perf_counter() - wall0
+            cpu = time.process_time() - cpu0
+            stack.pop()
+            peak = max(frame["peak"], tracemalloc.get_traced_memory()[1]) if self.trace_memory else 0
+            if stack:
+                stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+            self._record(name, wall, cpu, peak, counts.rows, counts.frames)
+
+    def _record(self, name, wall, cpu, peak, rows, frames):
+        with self._lock:
+            rec = self.stages.setdefault(name, {
+                "stage": name, "calls": 0, "wall_s": 0.0, "cpu_s": 0.0,
+                "py_peak_mb": None, "rss_peak_mb": None, "rows": None, "frames": None,
+            })
+            rec["calls"] += 1
+            rec["wall_s"] += wall
+            rec["cpu_s"] += cpu
+            if self.trace_memory:
+                rec["py_peak_mb"] = max(rec["py_peak_mb"] or 0.0, peak / (1024 * 1024))
+            rec["rss_peak_mb"] = peak_rss_mb()
+            if rows is not None:
+                rec["rows"] = (rec["rows"] or 0) + int(rows)
+            if frames is not None:
+                rec["frames"] = (rec["frames"] or 0) + int(frames)
+
+    def run_info(self):
+        return {
+            "script": Path(sys.argv[0]).name,
+            "argv": sys.argv[1:],
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "total_wall_s": time.perf_counter() - self._t0,
+            "total_cpu_s": time.process_time(),
+            "rss_peak_mb": peak_rss_mb(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        }
+
+    def report(self):
+        return {"run": self.run_info(), "stages": list(self.stages.values())}
+
+    def write(self, path):
+        """Write the report as CSV (``.csv``) or JSON (anything else)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == ".csv":
+            with open(path, "w", newline="", encoding="utf-8") as f:
+                w = csv.DictWriter(f, fieldnames=FIELDS)
+                w.writeheader()
+                w.writerows(self.stages.values())
+        else:
+            path.write_text(json.dumps(self.report(), indent=2))
+        return path
+
+    def summary(self):
+        lines = [f"{'stage':<28}{'calls':>7}{'wall s':>10}{'cpu s':>10}{'py MB':>9}"]
+        for rec in self.stages.values():
+            py = f"{rec['py_peak_mb']:.1f}" if rec["py_peak_mb"] is not None else "-"
+            lines.append(f"{rec['stage']:<28}{rec['calls']:>7}{rec['wall_s']:>10.3f}{rec['cpu_s']:>10.3f}{py:>9}")
+        return "\n".join(lines)
+
+
+_active = None
+
+
+def activate(profiler):
+    """Make ``profiler`` the target of module-level ``stage()`` calls (None disables)."""
+    global _active
+    _active = profiler
+    return profiler
+
+
+def active():
+    return _active
+
+
+def stage(name, rows=None, frames=None):
+    """Context manager timing ``name`` in the active profiler (no-op if none)."""
+    if _active is None:
+        return nullcontext(StageCounts(rows, frames))
+    return _active.stage(name, rows=rows, frames=frames)
+
+
+def finish(path):
+    """Write the active profiler's report to ``path``, print a summary and deactivate."""
+    prof = _active
+    if prof is None:
+        return None
+    out = prof.write(path)
+    print(prof.summary())
+    print(f"[profile] Report saved to: {out}")
+    activate(None)
+    return out
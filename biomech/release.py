@@ -0,0 +1,211 @@
+"""Ball-release detection on whole trials, or on many trials in one call.
+
+Release ("ball leaves the hand") is found from the wrist-ball distance:
+
+1. the distance is lightly smoothed (NaN gaps interpolated, centred
+   moving average);
+2. adaptive thresholds come from the trial's own distance range:
+   ``contact_r = dmin + 0.15 * spread`` and ``rise_delta = max(0.01,
+   0.06 * spread)`` with ``spread = d90 - dmin``;
+3. release is the first upward crossing of ``contact_r`` after which the
+   distance stays above it for ~100 ms and grows by at least
+   ``rise_delta``;
+4. failing that, the first frame after the global minimum from which the
+   distance keeps rising (never drops by more than 1e-6) for ~100 ms and
+   ends ``rise_delta`` above the minimum.
+
+Every test is evaluated for all frames at once: window conditions are
+counts of failing frames from cumulative sums, so the cost is O(frames)
+array work regardless of the window length. Trials are processed together
+as rows of a NaN-padded (trials x frames) array; ``detect_batch`` accepts
+either that array (with ``lengths``) or a list of 1-D series.
+
+Each detection also gets a heuristic ``confidence`` in [0, 1]:
+``1 - rise_delta / rise`` (how clearly the confirmation-window rise clears
+the required one), times the fraction of frames around the release
+(+-window) that were measured rather than interpolated, halved when only
+the fallback rule matched. 0 means not detected.
+
+``set_point`` and ``ball_apex`` are alternative events on the same padded
+layout.
+"""
+import numpy as np
+
+CONTACT_FRAC = 0.15
+RISE_FRAC = 0.06
+RISE_MIN = 0.01
+STAY_MS = 100.0
+MIN_FINITE = 5
+
+
+def wrist_ball_distance(ball, wrist):
+    """Row-wise distance between (frames x 3) ball and wrist positions."""
+    return np.linalg.norm(np.asarray(ball, float) - np.asarray(wrist, float), axis=-1)
+
+
+def smooth_series(y, win):
+    """NaN gaps linearly interpolated (edges held), then a centred moving average.
+
+    ``win`` <= 1 returns ``y`` unchanged. An all-NaN series stays NaN.
+    """
+    if win is None or win <= 1:
+        return np.asarray(y, float)
+    y = np.array(y, float)
+    m = np.isfinite(y)
+    if m.any() and not m.all():
+        idx = np.arange(y.size)
+        y[~m] = np.interp(idx[~m], idx[m], y[m])
+    k = np.ones(int(win)) / max(1, int(win))
+    return np.convolve(y, k, mode="same")
+
+
+def stay_frames(fps):
+    """Confirmation window length in frames (~100 ms, at least 2)."""
+    return max(2, int(round(STAY_MS * fps / 1000.0)))
+
+
+def pad_rows(series, fill=np.nan):
+    """List of 1-D series -> ((trials x max_len) array padded with ``fill``, lengths)."""
+    lengths = np.array([len(s) for s in series], dtype=int)
+    out = np.full((len(series), int(lengths.max()) if len(series) else 0), fill, dtype=float)
+    for r, s in enumerate(series):
+        out[r, :len(s)] = s
+    return out, lengths
+
+
+def _window_ok(bad, width):
+    """``ok[r, i]`` = no True in ``bad[r, i:i + width]`` (False where the window runs off the end)."""
+    T, N = bad.shape
+    c = np.zeros((T, N + 1), dtype=np.int64)
+    np.cumsum(bad, axis=1, out=c[:, 1:])
+    ok = np.zeros((T, N), dtype=bool)
+    if N >= width:
+        ok[:, :N - width + 1] = (c[:, width:] - c[:, :N - width + 1]) == 0
+    return ok
+
+
+def _first(mask):
+    """Index of the first True per row, -1 where there is none."""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def detect_smoothed(ds, fps, lengths=None, observed=None):
+    """Release on already smoothed distances ``ds`` (trials x frames, NaN padded).
+
+    ``observed`` marks the frames that had a raw measurement (default: finite
+    ``ds``); it only affects the confidence. Returns ``(index, confidence)``
+    arrays; index is -1 where nothing is found.
+    """
+    ds = np.atleast_2d(np.asarray(ds, float))
+    T, N = ds.shape
+    lengths = np.full(T, N) if lengths is None else np.asarray(lengths, dtype=int)
+    cols = np.arange(N)[None, :]
+    in_trial = cols < lengths[:, None]
+    ds = np.where(in_trial, ds, np.nan)
+    finite = np.isfinite(ds)
+    n_finite = finite.sum(axis=1)
+    enough = n_finite >= MIN_FINITE
+
+    stats = np.where(enough[:, None], ds, 0.0)               # rows with too little data: dummy stats
+    dmin = np.nanmin(stats, axis=1)
+    d90 = np.nanpercentile(stats, 90, axis=1)
+    spread = np.maximum(1e-6, d90 - dmin)
+    contact_r = (dmin + CONTACT_FRAC * spread)[:, None]
+    rise_delta = np.maximum(RISE_MIN, RISE_FRAC * spread)[:, None]
+    stay_n = stay_frames(fps)
+    width = stay_n + 1                                       # frames i .. i + stay_n
+
+    # Rule 1: upward crossing of contact_r, confirmed over the following window
+    with np.errstate(invalid="ignore"):
+        prev = np.concatenate([np.full((T, 1), np.nan), ds[:, :-1]], axis=1)
+        crossed = np.isfinite(prev) & finite & (prev < contact_r) & (ds >= contact_r)
+        stays = _window_ok(~finite | (ds < contact_r), width)
+        end = np.concatenate([ds[:, stay_n:], np.full((T, min(stay_n, N)), np.nan)], axis=1)[:, :N]
+        rises = end - ds >= rise_delta
+    hit = crossed & stays & rises & (cols >= 1) & (cols < (lengths - stay_n)[:, None])
+    idx = _first(hit)
+
+    # Rule 2: after the global minimum, a monotone rise of at least rise_delta.
+    # As in the original per-frame scan, k0 is the minimum's position among the
+    # finite samples only (identical to its frame index when nothing is NaN).
+    first_min = np.argmin(np.where(finite, ds, np.inf), axis=1)
+    k0 = np.take_along_axis(np.cumsum(finite, axis=1), first_min[:, None], axis=1)[:, 0] - 1
+    d_k0 = ds[np.arange(T), np.clip(k0, 0, max(N - 1, 0))] if N else np.full(T, np.nan)
+    with np.errstate(invalid="ignore"):
+        step = np.diff(ds, axis=1)
+        mono = _window_ok(np.concatenate([~(step >= -1e-6), np.ones((T, 1), bool)], axis=1), stay_n)
+        rises2 = end - d_k0[:, None] >= rise_delta
+    hit2 = _window_ok(~finite, width) & mono & rises2 & (cols > k0[:, None]) & (cols < (lengths - stay_n)[:, None])
+    idx2 = _first(hit2)
+
+    use2 = (idx < 0) & (idx2 >= 0)
+    idx = np.where(enough, np.where(use2, idx2, idx), -1)
+
+    rows = np.arange(T)
+    safe = np.clip(idx, 0, max(N - 1, 0))
+    rise = np.where(use2, end[rows, safe] - d_k0, end[rows, safe] - ds[rows, safe])
+    observed = finite if observed is None else np.asarray(observed, bool) & in_trial
+    c = np.concatenate([np.zeros((T, 1)), np.cumsum(observed, axis=1)], axis=1)
+    lo = np.clip(safe - stay_n, 0, lengths)
+    hi = np.clip(safe + stay_n + 1, 0, lengths)
+    measured = (c[rows, hi] - c[rows, lo]) / np.maximum(hi - lo, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        conf = np.clip(1.0 - rise_delta[:, 0] / rise, 0.0, 1.0) * measured
+    conf = np.where(use2, 0.5 * conf, conf)
+    conf = np.where(idx >= 0, np.nan_to_num(conf), 0.0)
+    return idx, conf
+
+
+def detect_batch(distances, fps, smooth_win=5, lengths=None):
+    """Release index and confidence for many trials' wrist-ball distances.
+
+    ``distances`` is a list of 1-D series (ragged) or a (trials x frames)
+    array padded past each trial's ``lengths`` (default: full rows).
+    Returns ``(index, confidence)`` arrays with index -1 where not detected.
+    """
+    if isinstance(distances, np.ndarray) and distances.ndim == 2:
+        lengths = np.full(len(distances), distances.shape[1]) if lengths is None else np.asarray(lengths, int)
+        series = [row[:n] for row, n in zip(distances, lengths)]
+    else:
+        series = list(distances)
+    ds, lengths = pad_rows([smooth_series(s, smooth_win) for s in series])
+    if ds.size == 0:
+        return np.full(len(series), -1), np.zeros(len(series))
+    observed = np.zeros(ds.shape, dtype=bool)       # np.convolve(mode="same") can outgrow very short series
+    for r, s in enumerate(series):
+        observed[r, :len(s)] = np.isfinite(s)
+    return detect_smoothed(ds, fps, lengths, observed)
+
+
+def detect(ball, wrist, fps, smooth_win=5):
+    """Release of one trial from (frames x 3) ball and wrist positions -> (index or None, confidence)."""
+    idx, conf = detect_batch([wrist_ball_distance(ball, wrist)], fps, smooth_win)
+    return (int(idx[0]) if idx[0] >= 0 else None), float(conf[0])
+
+
+def set_point(flexion, release):
+    """Set point: frame of peak elbow flexion (most bent arm) before release.
+
+    ``flexion`` is one trial's (frames,) elbow flexion or a NaN-padded
+    (trials x frames) stack; ``release`` the matching index/indices (-1 or
+    None = unknown). Returns -1 where there is no finite sample before release.
+    """
+    return _masked_arg(flexion, release, before=True, largest=True)
+
+
+def ball_apex(ball_z, release):
+    """Ball apex: frame of the highest ball position after release (same layout as ``set_point``)."""
+    return _masked_arg(ball_z, release, before=False, largest=True)
+
+
+def _masked_arg(values, release, before, largest):
+    single = np.ndim(values) == 1
+    v = np.atleast_2d(np.asarray(values, float))
+    rel = np.atleast_1d(np.asarray([-1 if r is None else r for r in np.atleast_1d(release)], dtype=int))
+    cols = np.arange(v.shape[1])[None, :]
+    window = cols < rel[:, None] if before else cols > rel[:, None]
+    ok = window & np.isfinite(v) & (rel[:, None] >= 0)
+    fill = -np.inf if largest else np.inf
+    masked = np.where(ok, v, fill)
+    out = np.where(ok.any(axis=1), masked.argmax(axis=1) if largest else masked.argmin(axis=1), -1)
+    return int(out[0]) if single else out
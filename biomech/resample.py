@@ -0,0 +1,92 @@
+"""Resampling motion data onto a uniform output timeline.
+
+Capture rows arrive at the capture rate, and dropping rows with missing
+markers leaves uneven time gaps. ``timeline`` builds output sample times at
+a target frame rate — denser inside slow-motion windows — and ``resample``
+interpolates every channel onto them, bridging NaN gaps of up to
+``max_gap`` seconds and leaving longer gaps missing.
+"""
+import numpy as np
+
+
+def merge_windows(windows, t_start, t_end):
+    """Clip ``(start, end, factor)`` windows to [t_start, t_end] and flatten
+    overlaps into disjoint pieces (the larger factor wins)."""
+    edges = {t_start, t_end}
+    for a, b, _ in windows:
+        edges.update(min(max(v, t_start), t_end) for v in (a, b))
+    edges = np.array(sorted(edges))
+    factor = np.ones(len(edges) - 1)
+    mids = (edges[:-1] + edges[1:]) / 2
+    for a, b, f in windows:
+        inside = (mids >= a) & (mids <= b)
+        factor[inside] = np.maximum(factor[inside], f)
+    return edges, factor
+
+
+def timeline(t_start, t_end, fps, windows=()):
+    """Output sample times covering [t_start, t_end] at ``fps`` frames per
+    second of capture time; inside each ``(start, end, factor)`` window time
+    advances ``factor`` times slower (slow motion).
+    """
+    if not np.isfinite(t_start) or not np.isfinite(t_end) or t_end < t_start:
+        return np.empty(0)
+    edges, factor = merge_windows(windows, t_start, t_end)
+    # Output ("playback") time at each edge; invert the piecewise-linear warp.
+    out_edges = np.r_[0.0, np.cumsum(np.diff(edges) * factor)]
+    n = int(np.floor(out_edges[-1] * fps + 1e-9)) + 1
+    return np.interp(np.arange(n) / fps, out_edges, edges)
+
+
+def resample(t, values, t_out, max_gap=None):
+    """Linearly interpolate ``values`` (rows x ...) sampled at times ``t`` onto ``t_out``.
+
+    Each channel uses only its own non-NaN samples. Output times outside a
+    channel's sampled range, or inside a gap between samples wider than
+    ``max_gap`` seconds, are NaN. Rows with a NaN time are ignored.
+    """
+    t = np.asarray(t, dtype=float)
+    values = np.asarray(values, dtype=float)
+    t_out = np.asarray(t_out, dtype=float)
+    keep = np.isfinite(t)
+    order = np.argsort(t[keep], kind="stable")
+    t = t[keep][order]
+    flat = values[keep][order].reshape(len(t), -1)
+
+    out = np.full((len(t_out), flat.shape[1]), np.nan)
+    # Channels sharing a NaN pattern (e.g. a joint's x/y/z) are interpolated together.
+    patterns, group = np.unique(~np.isnan(flat), axis=1, return_inverse=True)
+    for g in range(patterns.shape[1]):
+        ok = patterns[:, g]
+        cols = np.flatnonzero(group.ravel() == g)
+        tv = t[ok]
+        if len(tv) == 0:
+            continue
+        hi = np.clip(np.searchsorted(tv, t_out, side="left"), 0, len(tv) - 1)
+        lo = np.clip(hi - 1, 0, len(tv) - 1)
+        exact = tv[hi] == t_out
+        inside = (t_out >= tv[0]) & (t_out <= tv[-1])
+        if max_gap is not None:
+            inside &= exact | (tv[hi] - tv[lo] <= max_gap)
+        for c in cols:
+            col = np.interp(t_out, tv, flat[ok, c])
+            out[:, c] = np.where(inside, col, np.nan)
+    return out.reshape((len(t_out),) + values.shape[1:])
+
+
+def peak_speed_time(t, xyz):
+    """Time of the largest speed of one (rows x 3) trajectory (None if unknown)."""
+    t = np.asarray(t, dtype=float)
+    xyz = np.asarray(xyz, dtype=float)
+    ok = np.isfinite(t) & ~np.isnan(xyz).any(axis=1)
+    if ok.sum() < 2:
+        return None
+    tv, pv = t[ok], xyz[ok]
+    dt = np.diff(tv)
+    step = np.linalg.norm(np.diff(pv, axis=0), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        speed = np.where(dt > 0, step / dt, np.nan)
+    if np.all(np.isnan(speed)):
+        return None
+    i = int(np.nanargmax(speed))
+    return float((tv[i] + tv[i + 1]) / 2)
@@ -0,0 +1,225 @@
+"""Streaming reader for SPL-style tracking JSON trials.
+
+A trial file is one JSON object with a few trial-level fields
+(``participant_id``, ``result``, ``entry_angle``, ``landing_x``, ...) and a
+``tracking`` array with one object per captured frame::
+
+    {"frame": 0, "time": 0, "data": {"ball": [x, y, z],
+                                     "player": {"R_WRIST": [x, y, z], ...}}}
+
+``iter_frames`` yields those frame objects one at a time (also handy for
+replaying a trial as a live feed). ``read_tracking`` never holds the whole
+document: it reads the file in blocks, decodes the ``tracking`` array one
+frame object at a time and writes each frame straight into preallocated
+(frames x joints x 3) arrays that grow geometrically as needed. Joint names are discovered from the
+data (a joint first seen late is NaN in earlier frames), so peak memory
+stays close to the size of the output arrays plus one read block.
+
+Coordinates that are missing or not a 3-vector of numbers become NaN, as
+do missing ``frame``/``time`` values. ``NaN`` literals are accepted.
+"""
+import json
+
+import numpy as np
+
+BLOCK_CHARS = 1 << 20
+TRIAL_FIELDS = ("participant_id", "trial_id", "result", "entry_angle", "landing_x", "landing_y")
+
+_decoder = json.JSONDecoder()
+_WS = " \t\n\r"
+_NUMBER_TAIL = "0123456789.eE+-"
+
+
+def _xyz(v):
+    try:
+        x, y, z = v
+        return float(x), float(y), float(z)
+    except (TypeError, ValueError):
+        return None
+
+
+def _number(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+class TrackingTrial:
+    """Arrays of one tracking trial.
+
+    ``positions`` is (frames x joints x 3) with joints in ``joints`` order,
+    ``ball`` is (frames x 3); ``frames`` and ``times_ms`` are per-frame
+    floats and ``meta`` holds the trial-level fields (every name in
+    ``TRIAL_FIELDS`` is present, None when the file lacks it).
+    """
+
+    def __init__(self, frames, times_ms, joints, positions, ball, meta):
+        self.frames = frames
+        self.times_ms = times_ms
+        self.joints = joints
+        self.positions = positions
+        self.ball = ball
+        self.meta = meta
+        self.joint_index = {name: j for j, name in enumerate(joints)}
+
+    def __len__(self):
+        return len(self.frames)
+
+    def joint(self, name):
+        """(frames x 3) view of one joint; all-NaN if the joint never appears."""
+        j = self.joint_index.get(name)
+        if j is None:
+            return np.full((len(self), 3), np.nan)
+        return self.positions[:, j]
+
+
+class _Builder:
+    """Growable frame arrays filled one decoded frame at a time."""
+
+    def __init__(self, capacity=256, joint_capacity=32):
+        self.n = 0
+        self.joints = {}
+        self.frames = np.full(capacity, np.nan)
+        self.times = np.full(capacity, np.nan)
+        self.ball = np.full((capacity, 3), np.nan)
+        self.pos = np.full((capacity, joint_capacity, 3), np.nan)
+
+    def _grow_frames(self):
+        cap = 2 * len(self.frames)
+        self.frames = np.resize(self.frames, cap)
+        self.frames[self.n:] = np.nan
+        self.times = np.resize(self.times, cap)
+        self.times[self.n:] = np.nan
+        ball = np.full((cap, 3), np.nan)
+        ball[:self.n] = self.ball[:self.n]
+        self.ball = ball
+        pos = np.full((cap,) + self.pos.shape[1:], np.nan)
+        pos[:self.n] = self.pos[:self.n]
+        self.pos = pos
+
+    def _grow_joints(self):
+        pos = np.full((self.pos.shape[0], 2 * self.pos.shape[1], 3), np.nan)
+        pos[:, :self.pos.shape[1]] = self.pos
+        self.pos = pos
+
+    def add(self, fr):
+        if self.n == len(self.frames):
+            self._grow_frames()
+        i = self.n
+        fr = fr if isinstance(fr, dict) else {}
+        self.frames[i] = _number(fr.get("frame", np.nan))
+        self.times[i] = _number(fr.get("time", np.nan))
+        d = fr.get("data") or {}
+        xyz = _xyz(d.get("ball"))
+        if xyz is not None:
+            self.ball[i] = xyz
+        player = d.get("player") or {}
+        for name, v in player.items():
+            j = self.joints.get(name)
+            if j is None:
+                j = self.joints[name] = len(self.joints)
+                if j == self.pos.shape[1]:
+                    self._grow_joints()
+            xyz = _xyz(v)
+            if xyz is not None:
+                self.pos[i, j] = xyz
+        self.n += 1
+
+    def finish(self, meta):
+        n, J = self.n, len(self.joints)
+        return TrackingTrial(self.frames[:n].copy(), self.times[:n].copy(), list(self.joints),
+                             np.ascontiguousarray(self.pos[:n, :J]), self.ball[:n].copy(), meta)
+
+
+class _Stream:
+    """A text file read in blocks with a cursor into the current buffer."""
+
+    def __init__(self, f, block_chars):
+        self.f = f
+        self.block_chars = block_chars
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        data = self.f.read(self.block_chars)
+        if not data:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + data
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (consumed whitespace), '' at EOF."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars):
+        c = self.peek()
+        if c == "" or c not in chars:
+            raise ValueError(f"Malformed tracking JSON: expected {chars!r}, got {c!r}")
+        self.pos += 1
+        return c
+
+    def value(self):
+        """Decode one complete JSON value at the cursor, reading more as needed."""
+        self.peek()
+        while True:
+            try:
+                v, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # A number cut by the block boundary ("7." of "7.15") decodes early
+            if (end == len(self.buf) or self.buf[end] in _NUMBER_TAIL) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return v
+
+
+def iter_frames(path, meta=None, block_chars=BLOCK_CHARS):
+    """Yield the raw frame objects of a trial's ``tracking`` array one at a time.
+
+    Trial-level fields are stored into ``meta`` (a dict) as they are met;
+    fields placed after the ``tracking`` array are only there once the
+    generator is exhausted.
+    """
+    meta = {} if meta is None else meta
+    with open(path, "r", encoding="utf-8") as f:
+        s = _Stream(f, block_chars)
+        s.expect("{")
+        if s.peek() == "}":
+            return
+        while True:
+            key = s.value()
+            s.expect(":")
+            if key == "tracking" and s.peek() == "[":
+                s.pos += 1
+                if s.peek() == "]":
+                    s.pos += 1
+                else:
+                    while True:
+                        yield s.value()
+                        if s.expect(",]") == "]":
+                            break
+            else:
+                meta[key] = s.value()
+            if s.expect(",}") == "}":
+                break
+
+
+def read_tracking(path, block_chars=BLOCK_CHARS):
+    """Stream a tracking JSON trial from ``path`` into a ``TrackingTrial``."""
+    builder = _Builder()
+    meta = dict.fromkeys(TRIAL_FIELDS)
+    for fr in iter_frames(path, meta, block_chars):
+        builder.add(fr)
+    return builder.finish(meta)
@@ -0,0 +1,135 @@
+"""Binary cache of parsed tracking JSON trials.
+
+Tracking JSON is verbose (pretty-printed, one number per line), so parsing
+dominates re-analysis. ``load_trial`` parses a trial once with
+``biomech.tracking`` and stores it in a compact binary file; later calls
+memory-map that file instead of touching the JSON.
+
+A cache file holds a small JSON header followed by raw little-endian
+arrays, each 64-byte aligned so it can be mapped in place:
+
+* ``positions``  float32 (frames x joints x 3)
+* ``ball``       float32 (frames x 3)
+* ``frames``, ``times_ms``  float64 (frames,)
+
+The header carries the joint-name table, the trial-level metadata and the
+source JSON's size and mtime. A cache whose source no longer matches (or
+whose format version differs) is rebuilt automatically. Caches live next
+to the trial (``<name>.trial.bin``) or, for read-only data folders, in a
+``cache_dir`` keyed by the trial's absolute path.
+
+Coordinates are kept as float32 (~7 significant digits, far beyond the
+millimetre precision of the exports); a trial loaded through the cache
+gives the same arrays whether it was just parsed or mapped from disk.
+"""
+import hashlib
+import json
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from . import tracking
+
+MAGIC = b"BMTRIAL\0"
+CACHE_VERSION = 1
+ALIGN = 64
+SUFFIX = ".trial.bin"
+ARRAYS = (("positions", "<f4"), ("ball", "<f4"), ("frames", "<f8"), ("times_ms", "<f8"))
+
+
+def cache_path(json_path, cache_dir=None):
+    """Where the cache of ``json_path`` lives (sidecar, or inside ``cache_dir``)."""
+    json_path = Path(json_path)
+    if cache_dir is None:
+        return json_path.with_name(json_path.stem + SUFFIX)
+    key = hashlib.sha1(str(json_path.resolve()).encode("utf-8")).hexdigest()[:16]
+    return Path(cache_dir) / f"{json_path.stem}-{key}{SUFFIX}"
+
+
+def _source_signature(json_path):
+    st = os.stat(json_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _aligned(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def write_cache(path, trial, source):
+    """Write ``trial`` (a ``tracking.TrackingTrial``) to ``path`` atomically."""
+    arrays = {name: np.ascontiguousarray(getattr(trial, name), dtype=dtype) for name, dtype in ARRAYS}
+    layout, offset = {}, 0
+    for name, dtype in ARRAYS:
+        a = arrays[name]
+        layout[name] = {"dtype": dtype, "shape": list(a.shape), "offset": offset}
+        offset = _aligned(offset + a.nbytes)
+    header = json.dumps({
+        "version": CACHE_VERSION, "source": source, "joints": list(trial.joints),
+        "meta": trial.meta, "arrays": layout,
+    }).encode("utf-8")
+    data_start = _aligned(len(MAGIC) + 8 + len(header))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header)) + header)
+        for name, _ in ARRAYS:
+            f.seek(data_start + layout[name]["offset"])
+            f.write(arrays[name].tobytes())
+        f.truncate(data_start + offset)
+    tmp.replace(path)
+
+
+def read_cache(path, source=None):
+    """Memory-map a cache file into a ``TrackingTrial``.
+
+    Returns None if the file is missing, unreadable, of another version, or
+    (when ``source`` is given) was built from a different source file.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (n,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(n).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+    if header.get("version") != CACHE_VERSION or (source is not None and header.get("source") != source):
+        return None
+    data_start = _aligned(len(MAGIC) + 8 + n)
+    arrays = {}
+    for name, _ in ARRAYS:
+        spec = header["arrays"][name]
+        shape = tuple(spec["shape"])
+        if int(np.prod(shape)) == 0:
+            arrays[name] = np.zeros(shape, dtype=spec["dtype"])
+        else:
+            arrays[name] = np.memmap(path, dtype=spec["dtype"], mode="r",
+                                     offset=data_start + spec["offset"], shape=shape)
+    return tracking.TrackingTrial(arrays["frames"], arrays["times_ms"], header["joints"],
+                                  arrays["positions"], arrays["ball"], header["meta"])
+
+
+def load_trial(json_path, cache_dir=None, rebuild=False, verbose=False):
+    """A tracking trial from its binary cache, parsing and caching the JSON if needed."""
+    path = cache_path(json_path, cache_dir)
+    source = _source_signature(json_path)
+    if not rebuild:
+        trial = read_cache(path, source)
+        if trial is not None:
+            return trial
+    trial = tracking.read_tracking(json_path)
+    try:
+        write_cache(path, trial, source)
+    except OSError as e:
+        if verbose:
+            print(f"[WARN] Could not save trial cache ({e}); using the parsed trial.")
+        for name, dtype in ARRAYS:
+            setattr(trial, name, np.asarray(getattr(trial, name), dtype=dtype))
+        return trial
+    if verbose:
+        print(f"[INFO] Cached trial → {path}")
+    return read_cache(path, source)
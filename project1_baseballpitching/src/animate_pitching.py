@@ -1,10 +1,13 @@
 import os
+import sys
+import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.animation as animation
-from matplotlib.animation import FFMpegWriter, PillowWriter
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from mpl_toolkits.mplot3d import Axes3D  # noqa: F401 (needed for 3D)
 import matplotlib as mpl
 
@@ -15,106 +18,199 @@ try:
 except Exception:
     pass  # if this fails, MP4 save may still work if ffmpeg is on PATH
 
+# Repository root on sys.path for the shared ``biomech`` package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from biomech import filters, motion, ortho_render, profiling  # noqa: E402
+from biomech.resample import peak_speed_time, resample, timeline  # noqa: E402
+from biomech.encoders import (GifEncoder, Mp4Encoder, PngSequenceEncoder,  # noqa: E402
+                              encode_frames, figure_rgb)
+from session_index import open_index  # noqa: E402
+
 # -----------------------------
 # Helpers
 # -----------------------------
 def add_session_id(df, time_col="time"):
     if time_col not in df.columns:
         raise KeyError(f"Expected a '{time_col}' column in the CSV.")
-    t = pd.to_numeric(df[time_col], errors="coerce").ffill().fillna(0.0)
-    resets = (t.diff() < 0) | ((t == 0) & (t.index != t.index.min()))
-    return resets.cumsum().astype(int)  # 0-based internal IDs
-
-def clean_chunk_dropna(chunk):
-    """Drop frames that have NaN in any coordinate column (*_x, *_y, *_z)."""
-    coord_cols = [c for c in chunk.columns if c.endswith(("_x", "_y", "_z"))]
-    before = len(chunk)
-    chunk = chunk.dropna(subset=coord_cols).reset_index(drop=True)
-    removed = before - len(chunk)
+    return pd.Series(motion.session_ids(df[time_col]), index=df.index)  # 0-based internal IDs
+
+def drop_incomplete(M):
+    """Drop frames that have NaN in any joint coordinate."""
+    keep = M.complete_rows()
+    removed = len(M) - int(keep.sum())
     if removed > 0:
         print(f"[INFO] Dropped {removed} frame(s) with NaNs in coordinate columns.")
-    return chunk
-
-def safe_axis_limits(chunk, suffix):
-    cols = [c for c in chunk.columns if c.endswith(suffix)]
-    if not cols:
-        return (-1.0, 1.0)
-    arr = chunk[cols].to_numpy(dtype=float)
-    arr = arr[~np.isnan(arr)]
-    if arr.size == 0:
-        return (-1.0, 1.0)
-    return float(arr.min()), float(arr.max())
+        M = M.take(keep)
+    return M
+
+def connection_index(connections, joints):
+    """Resolve (joint, joint) name pairs to index pairs into ``joints`` (-1 = missing)."""
+    pos = {j: i for i, j in enumerate(joints)}
+    return np.array([[pos.get(a, -1), pos.get(b, -1)] for a, b in connections], dtype=int).reshape(-1, 2)
+
+def parse_sessions(spec, n_sessions):
+    """1-based session numbers from ``"all"``, ``"3"``, ``"2-5"`` or ``"1,4,7-9"``."""
+    spec = str(spec).strip().lower()
+    if spec == "all":
+        return list(range(1, n_sessions + 1))
+    picked = []
+    for part in spec.split(","):
+        part = part.strip()
+        lo, sep, hi = part.partition("-")
+        try:
+            first, last = (int(lo), int(hi)) if sep else (int(part), int(part))
+        except ValueError:
+            raise ValueError(f"Bad session spec {part!r}; use e.g. 3, 2-5, 1,4,7-9 or all.") from None
+        if first > last:
+            raise ValueError(f"Bad session range {part!r} (start > end).")
+        if first < 1 or last > n_sessions:
+            raise IndexError(f"Requested session {part} out of range (1..{n_sessions}).")
+        picked.extend(range(first, last + 1))
+    return list(dict.fromkeys(picked))
+
+# Slow-motion events: name -> joint whose peak speed marks the event
+SLOWMO_EVENTS = {"release": "hand_jc"}
+SLOWMO_HALF_WIDTH = 0.15   # s on each side of an event
+SLOWMO_FACTOR = 4.0
+
+def parse_slowmo(spec):
+    """``START:END[:FACTOR]`` (seconds) or ``EVENT[:HALF_WIDTH[:FACTOR]]``.
+
+    EVENT is a name from SLOWMO_EVENTS or a joint name (its peak speed).
+    Returns ``("time", start, end, factor)`` or ``("event", name, half, factor)``.
+    """
+    parts = [p.strip() for p in spec.split(":")]
+    try:
+        float(parts[0])
+        is_time = True
+    except ValueError:
+        is_time = False
+    try:
+        if is_time:
+            if len(parts) not in (2, 3):
+                raise ValueError
+            factor = float(parts[2]) if len(parts) == 3 else SLOWMO_FACTOR
+            window = ("time", float(parts[0]), float(parts[1]), factor)
+        else:
+            if len(parts) > 3 or not parts[0]:
+                raise ValueError
+            half = float(parts[1]) if len(parts) > 1 else SLOWMO_HALF_WIDTH
+            factor = float(parts[2]) if len(parts) > 2 else SLOWMO_FACTOR
+            window = ("event", parts[0], half, factor)
+    except ValueError:
+        raise ValueError(f"Bad --slowmo {spec!r}; use START:END[:FACTOR] or EVENT[:HALF_WIDTH[:FACTOR]].") from None
+    if window[3] < 1:
+        raise ValueError(f"Bad --slowmo {spec!r}: the slow-motion factor must be >= 1.")
+    return window
+
+def slowmo_windows(specs, t, P, joints):
+    """Resolve parsed --slowmo specs to (start, end, factor) windows for one session."""
+    windows = []
+    for kind, a, b, factor in specs:
+        if kind == "time":
+            windows.append((a, b, factor))
+            continue
+        joint = SLOWMO_EVENTS.get(a, a)
+        if joint not in joints:
+            print(f"[WARN] Slow-motion event {a!r}: no '{joint}' landmarks; window skipped.")
+            continue
+        t_event = peak_speed_time(t, P[:, joints.index(joint)])
+        if t_event is None:
+            print(f"[WARN] Slow-motion event {a!r} not found; window skipped.")
+            continue
+        windows.append((t_event - b, t_event + b, factor))
+    return windows
+
+def lowpass_trial(M, cutoff_hz, max_gap=None):
+    """``M`` with every joint's coordinates gap-filled (gaps up to ``max_gap`` s)
+    and zero-phase low-pass filtered at ``cutoff_hz`` in one pass. The capture
+    rate comes from the trial's times."""
+    rate = filters.sample_rate(M.times)
+    if rate is None:
+        print("[WARN] Cannot tell the capture rate from the time column; skipping --lowpass.")
+        return M
+    gap = None if max_gap is None else int(round(max_gap * rate))
+    return M.replace(positions=filters.lowpass_motion(M.positions, rate, cutoff_hz, max_gap=gap))
+
+def prepare_session(chunk, time_col="time", fps=None, slowmo=(), max_gap=None, lowpass=None):
+    """Clean (or resample) one session's rows.
+
+    The rows become a float32 ``MotionTrial``. With ``lowpass`` (Hz) the
+    landmarks are first gap-filled and low-pass filtered (``lowpass_trial``).
+    Without ``fps`` frames with NaNs are then dropped and every capture row
+    becomes a frame. With ``fps`` the landmarks are interpolated onto a
+    uniform timeline at that rate (slow-motion windows from ``slowmo``),
+    bridging NaN gaps up to ``max_gap`` seconds.
+    Returns (landmarks, joints, axis limits, frame times or None).
+    """
+    M = motion.from_landmarks(chunk.reset_index(drop=True), time_col)
+    if lowpass:
+        with profiling.stage("filter", rows=len(M)):
+            M = lowpass_trial(M, lowpass, max_gap)
+    if fps is None:
+        with profiling.stage("clean frames", rows=len(M)):
+            M = drop_incomplete(M)
+        return M.positions, M.joints, M.axis_limits(), None
+
+    limits = M.axis_limits()
+    with profiling.stage("resample", rows=len(M)) as st:
+        t = M.times
+        windows = slowmo_windows(slowmo, t, M.positions, M.joints)
+        times = timeline(np.nanmin(t), np.nanmax(t), fps, windows) if np.isfinite(t).any() else np.empty(0)
+        P = np.ascontiguousarray(resample(t, M.positions, times, max_gap=max_gap), dtype=motion.DTYPE)
+        st.frames = len(times)
+    slow = f", {len(windows)} slow-motion window(s)" if windows else ""
+    print(f"[INFO] Resampled {len(M)} row(s) → {len(times)} frame(s) at {fps:g} fps{slow}.")
+    return P, M.joints, limits, times
+
+# Skeleton connections (edit if your column names differ)
+CONNECTIONS = [
+    ("glove_shoulder_jc", "glove_elbow_jc"),
+    ("glove_elbow_jc", "glove_wrist_jc"),
+    ("glove_wrist_jc", "glove_hand_jc"),
+    ("shoulder_jc", "elbow_jc"),
+    ("elbow_jc", "wrist_jc"),
+    ("wrist_jc", "hand_jc"),
+    ("glove_shoulder_jc", "shoulder_jc"),
+    ("glove_shoulder_jc", "lead_hip"),
+    ("shoulder_jc", "rear_hip"),
+    ("lead_hip", "rear_hip"),
+    ("rear_hip", "rear_knee_jc"),
+    ("rear_knee_jc", "rear_ankle_jc"),
+    ("lead_hip", "lead_knee_jc"),
+    ("lead_knee_jc", "lead_ankle_jc"),
+]
+
+DEFAULT_VIEWS = ("side", "front", "overhead")
 
 # -----------------------------
-# Main
+# Rendering
 # -----------------------------
-def main():
-    parser = argparse.ArgumentParser(description="Animate pitching landmarks (choose session, remove NaNs).")
-    here = os.path.dirname(os.path.abspath(__file__))
-    parser.add_argument("--csv", default=os.path.join(here, "pitching_landmarks.csv"),
-                        help="Path to landmarks CSV (default: ./pitching_landmarks.csv)")
-    parser.add_argument("--time-col", default="time", help="Time column name (default: time)")
-    parser.add_argument("--session", type=int, default=1,
-                        help="1-based session number to animate (1 = first)")
-    parser.add_argument("--fps", type=int, default=30, help="Frames per second (default: 30)")
-    parser.add_argument("--out", default=None,
-                        help="Output base name without extension (default: session_<N> in the CSV folder)")
-    args = parser.parse_args()
+def frame_title(session_label, times=None):
+    """Title format string; shows capture time instead of the frame number when resampled."""
+    if times is None:
+        return f"Session {session_label} · Frame {{frame}}"
+    return f"Session {session_label} · t = {{time:.3f}} s"
 
-    # Load CSV
-    if not os.path.exists(args.csv):
-        raise FileNotFoundError(f"CSV not found at: {args.csv}")
-    df = pd.read_csv(args.csv)
-
-    # Add session_id and pick session
-    df["session_id"] = add_session_id(df, time_col=args.time_col)
-    groups = list(df.groupby("session_id"))
-    if not groups:
-        raise RuntimeError("No sessions detected. Check your time column and values.")
-
-    n_sessions = len(groups)
-    if args.session < 1 or args.session > n_sessions:
-        raise IndexError(f"Requested session {args.session} out of range (1..{n_sessions}).")
-
-    # Map 1-based CLI to 0-based internal index
-    idx0 = args.session - 1
-    sid0, chunk = groups[idx0]          # 0-based internal
-    session_label = args.session        # 1-based for titles/files
-    chunk = chunk.reset_index(drop=True)
-
-    # Remove NaN frames from the selected session
-    chunk = clean_chunk_dropna(chunk)
-    if len(chunk) == 0:
-        raise RuntimeError("All frames were dropped due to NaNs; nothing to animate.")
+def mpl_frames(P, joints, limits, session_label, times=None):
+    """Yield one RGB frame per row of ``P`` drawn with the mplot3d figure."""
+    title = frame_title(session_label, times)
+    # Bones as (frames x bones x 2 x 3) plus validity masks
+    pairs = connection_index(CONNECTIONS, joints)
+    valid = ~np.isnan(P).any(axis=2)                                   # frames x joints
+    known = (pairs >= 0).all(axis=1)
+    bones = P[:, np.where(pairs >= 0, pairs, 0)]                       # frames x bones x 2 x 3
+    bone_ok = known & valid[:, np.where(pairs >= 0, pairs, 0)].all(axis=2)
 
-    # Skeleton connections (edit if your column names differ)
-    connections = [
-        ("glove_shoulder_jc", "glove_elbow_jc"),
-        ("glove_elbow_jc", "glove_wrist_jc"),
-        ("glove_wrist_jc", "glove_hand_jc"),
-        ("shoulder_jc", "elbow_jc"),
-        ("elbow_jc", "wrist_jc"),
-        ("wrist_jc", "hand_jc"),
-        ("glove_shoulder_jc", "shoulder_jc"),
-        ("glove_shoulder_jc", "lead_hip"),
-        ("shoulder_jc", "rear_hip"),
-        ("lead_hip", "rear_hip"),
-        ("rear_hip", "rear_knee_jc"),
-        ("rear_knee_jc", "rear_ankle_jc"),
-        ("lead_hip", "lead_knee_jc"),
-        ("lead_knee_jc", "lead_ankle_jc"),
-    ]
-
-    # Figure/artists
-    fig = plt.figure()
+    # Figure/artists (own figure, no pyplot state: safe in worker processes)
+    fig = Figure()
+    canvas = FigureCanvasAgg(fig)
     ax = fig.add_subplot(111, projection="3d")
     scat = ax.scatter([], [], [], s=20)
-    lines = [ax.plot([], [], [], "o-", lw=2)[0] for _ in connections]
+    lines = [ax.plot([], [], [], "o-", lw=2)[0] for _ in CONNECTIONS]
 
     # Axis limits
-    x_min, x_max = safe_axis_limits(chunk, "_x")
-    y_min, y_max = safe_axis_limits(chunk, "_y")
-    z_min, z_max = safe_axis_limits(chunk, "_z")
+    (x_min, x_max), (y_min, y_max), (z_min, z_max) = limits
 
     def set_axes():
         ax.set_xlim(x_min, x_max)
@@ -140,67 +236,271 @@ def main():
         return (scat, *lines)
 
     def update(frame):
-        bases = [c[:-2] for c in chunk.columns if c.endswith("_x")]
-        J = {}
-        for base in bases:
-            x, y, z = f"{base}_x", f"{base}_y", f"{base}_z"
-            if x in chunk and y in chunk and z in chunk:
-                xv, yv, zv = chunk.at[frame, x], chunk.at[frame, y], chunk.at[frame, z]
-                if pd.notna(xv) and pd.notna(yv) and pd.notna(zv):
-                    J[base] = (float(xv), float(yv), float(zv))
-        if not J:
+        with profiling.stage("frame update", frames=1):
+            return draw_frame(frame)
+
+    def draw_frame(frame):
+        ok = valid[frame]
+        if not ok.any():
             return (scat, *lines)
 
-        xs, ys, zs = zip(*J.values())
-        scat._offsets3d = (xs, ys, zs)
+        pts = P[frame, ok]
+        scat._offsets3d = (pts[:, 0], pts[:, 1], pts[:, 2])
 
-        for ln, (j1, j2) in zip(lines, connections):
-            if j1 in J and j2 in J:
-                ln.set_data([J[j1][0], J[j2][0]], [J[j1][1], J[j2][1]])
-                ln.set_3d_properties([J[j1][2], J[j2][2]])
+        for ln, seg, seg_ok in zip(lines, bones[frame], bone_ok[frame]):
+            if seg_ok:
+                ln.set_data(seg[:, 0], seg[:, 1])
+                ln.set_3d_properties(seg[:, 2])
             else:
                 ln.set_data([], [])
                 ln.set_3d_properties([])
 
-        ax.set_title(f"Session {session_label} · Frame {frame}")
+        ax.set_title(title.format(frame=frame, time=times[frame] if times is not None else None))
         return (scat, *lines)
 
-    ani = animation.FuncAnimation(fig, update, frames=len(chunk), init_func=init,
-                                  interval=1000/args.fps, blit=False)
+    fig.set_dpi(120)
+    init()
+    for frame in range(len(P)):
+        update(frame)
+        with profiling.stage("rasterize", frames=1):
+            rgb = figure_rgb(canvas)
+        yield rgb
+
+def ortho_frames(P, joints, session_label, views=DEFAULT_VIEWS, times=None):
+    """Yield tiled fixed-camera views rasterized directly with NumPy (no figure)."""
+    frames = ortho_render.render_frames(P, connection_index(CONNECTIONS, joints), views=views,
+                                        title=frame_title(session_label, times), times=times)
+    while True:
+        with profiling.stage("rasterize", frames=1):
+            rgb = next(frames, None)
+        if rgb is None:
+            return
+        yield rgb
 
-    # Output filenames (use 1-based label in names)
-    base = args.out or f"Session_{session_label}"
-    out_dir = os.path.dirname(os.path.abspath(args.csv))
-    mp4_path = os.path.join(out_dir, f"{base}.mp4")
-    gif_path = os.path.join(out_dir, f"{base}.gif")
+def render_session(P, joints, limits, session_label, base_path, fps, png_frames=None,
+                   renderer="mpl", views=DEFAULT_VIEWS, times=None):
+    """Render one session's (frames x joints x 3) landmarks once and encode it.
 
-    # --- Save BOTH MP4 and GIF ---
-    mp4_ok = gif_ok = False
+    ``renderer`` is ``"mpl"`` (mplot3d figure) or ``"ortho"`` (headless tiled
+    ``views``). ``times`` are the frames' capture times when resampled.
+    Writes ``<base_path>.mp4``/``.gif`` (and a PNG per frame
+    into ``png_frames``). Returns the output paths that were written; raises
+    RuntimeError if every output failed.
+    """
+    if len(P) == 0:
+        raise RuntimeError("All frames were dropped due to NaNs; nothing to animate.")
 
-    # MP4
+    # --- Render each frame once and feed it to every encoder ---
+    encoders = [Mp4Encoder(f"{base_path}.mp4", fps=fps, codec="libx264", bitrate=1800),
+                GifEncoder(f"{base_path}.gif", fps=fps)]
+    if png_frames:
+        encoders.append(PngSequenceEncoder(png_frames, prefix=os.path.basename(base_path)))
+
+    if renderer == "ortho":
+        frames = ortho_frames(P, joints, session_label, views, times)
+    else:
+        frames = mpl_frames(P, joints, limits, session_label, times)
+
+    print(f"[INFO] Session {session_label}: rendering {len(P)} frame(s) → "
+          f"{', '.join(e.name for e in encoders)}…")
+    done = encode_frames(frames, encoders)
+    if not done:
+        raise RuntimeError("All saves failed. Ensure ffmpeg (for MP4) and pillow are available.")
+    return [str(e.path) for e in done]
+
+def _render_shared(task):
+    """Worker: view one session's rows of the shared landmark block and render it."""
+    # Pool workers share the parent's resource tracker; the parent unlinks the block.
+    shm = shared_memory.SharedMemory(name=task["shm"])
+    block = P = None
     try:
-        print("[INFO] Saving MP4…")
-        writer_mp4 = FFMpegWriter(fps=args.fps, codec="libx264", bitrate=1800)
-        ani.save(mp4_path, writer=writer_mp4, dpi=120)
-        print(f"[OK] MP4 saved → {mp4_path}")
-        mp4_ok = True
-    except Exception as e:
-        print(f"[WARN] MP4 save failed: {e}")
-
-    # GIF
+        block = np.ndarray(task["shape"], dtype=task["dtype"], buffer=shm.buf)
+        P = block[task["lo"]:task["hi"]]
+        t0 = time.perf_counter()
+        paths = render_session(P, task["joints"], task["limits"], task["label"],
+                               task["base_path"], task["fps"], task["png_frames"],
+                               task["renderer"], task["views"], task["times"])
+        return paths, time.perf_counter() - t0
+    finally:
+        del block, P
+        shm.close()
+
+def render_batch(sessions, out_paths, fps, workers, png_frames=None, renderer="mpl", views=DEFAULT_VIEWS):
+    """Render many sessions across a process pool.
+
+    ``sessions`` maps label -> (landmarks, joints, limits, times). All landmark
+    arrays are packed into one shared-memory block; each worker gets only its
+    row range. Returns ``{label: error message}`` for the failed sessions.
+    """
+    labels = list(sessions)
+    sizes = [len(sessions[lb][0]) for lb in labels]
+    n_joints = sessions[labels[0]][0].shape[1]
+    offsets = np.concatenate([[0], np.cumsum(sizes)])
+    shape = (int(offsets[-1]), n_joints, 3)
+
+    dtype = np.dtype(motion.DTYPE)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+    failed = {}
     try:
-        print("[INFO] Saving GIF…")
-        writer_gif = PillowWriter(fps=args.fps)
-        ani.save(gif_path, writer=writer_gif, dpi=120)
-        print(f"[OK] GIF saved → {gif_path}")
-        gif_ok = True
-    except Exception as e:
-        print(f"[WARN] GIF save failed: {e}")
-
-    if not mp4_ok and not gif_ok:
-        raise RuntimeError("Both MP4 and GIF saves failed. Ensure ffmpeg (for MP4) and pillow are available.")
-
-    plt.close(fig)
+        block = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        tasks = {}
+        for lb, lo, hi in zip(labels, offsets[:-1], offsets[1:]):
+            P, joints, limits, times = sessions[lb]
+            block[lo:hi] = P
+            tasks[lb] = {
+                "shm": shm.name, "shape": shape, "dtype": dtype.str, "lo": int(lo), "hi": int(hi),
+                "joints": joints, "limits": limits, "label": lb, "base_path": out_paths[lb],
+                "fps": fps, "renderer": renderer, "views": views, "times": times,
+                "png_frames": os.path.join(png_frames, f"Session_{lb}") if png_frames else None,
+            }
+        del block
+
+        print(f"[INFO] Rendering {len(labels)} session(s) with {workers} worker(s)…")
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_render_shared, task): lb for lb, task in tasks.items()}
+            for k, fut in enumerate(as_completed(futures), 1):
+                lb = futures[fut]
+                try:
+                    _, secs = fut.result()
+                    print(f"[{k}/{len(labels)}] Session {lb} done ({secs:.1f} s)")
+                except Exception as e:
+                    failed[lb] = f"{type(e).__name__}: {e}"
+                    print(f"[{k}/{len(labels)}] Session {lb} FAILED: {failed[lb]}")
+    finally:
+        shm.close()
+        shm.unlink()
+    return failed
+
+# -----------------------------
+# Main
+# -----------------------------
+def main():
+    parser = argparse.ArgumentParser(description="Animate pitching landmarks (choose session(s), remove NaNs).")
+    here = os.path.dirname(os.path.abspath(__file__))
+    parser.add_argument("--csv", default=os.path.join(here, "pitching_landmarks.csv"),
+                        help="Path to landmarks CSV (default: ./pitching_landmarks.csv)")
+    parser.add_argument("--time-col", default="time", help="Time column name (default: time)")
+    parser.add_argument("--session", default="1",
+                        help="1-based session(s) to animate: 3, 2-5, 1,4,7-9 or all (default: 1)")
+    parser.add_argument("--fps", type=int, default=30, help="Frames per second (default: 30)")
+    parser.add_argument("--out", default=None,
+                        help="Output base name without extension (default: session_<N> in the CSV folder; "
+                             "with several sessions, <out>_<N>)")
+    parser.add_argument("--png-frames", default=None, metavar="DIR",
+                        help="Also write every frame as a PNG into DIR (same render pass as the MP4/GIF; "
+                             "one Session_<N> subfolder per session when rendering several)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Processes used when rendering several sessions (default: CPU count)")
+    parser.add_argument("--renderer", choices=("mpl", "ortho"), default="mpl",
+                        help="mpl: 3D matplotlib figure; ortho: fast headless fixed-camera views "
+                             "rasterized with NumPy (default: mpl)")
+    parser.add_argument("--views", default=",".join(DEFAULT_VIEWS),
+                        help=f"Comma-separated views tiled by --renderer ortho "
+                             f"({', '.join(ortho_render.VIEWS)}; default: %(default)s)")
+    parser.add_argument("--resample", action="store_true",
+                        help="Interpolate landmarks onto a uniform --fps timeline using the time column "
+                             "(one frame per 1/fps s of capture instead of one per row; short NaN gaps are filled)")
+    parser.add_argument("--slowmo", action="append", default=[], metavar="WINDOW",
+                        help="Slow-motion window (implies --resample), repeatable: START:END[:FACTOR] in seconds, "
+                             f"or EVENT[:HALF_WIDTH[:FACTOR]] with EVENT = {', '.join(SLOWMO_EVENTS)} or a joint "
+                             f"name (its peak speed); defaults {SLOWMO_HALF_WIDTH:g} s, x{SLOWMO_FACTOR:g}")
+    parser.add_argument("--max-gap", type=float, default=0.1,
+                        help="Longest NaN gap (s) bridged by --resample and --lowpass; longer gaps hide the joint "
+                             "(default: 0.1)")
+    parser.add_argument("--lowpass", type=float, default=None, metavar="HZ",
+                        help="Zero-phase low-pass filter the landmarks at this cutoff before rendering "
+                             "(short gaps are interpolated first; default: off)")
+    parser.add_argument("--no-index", action="store_true",
+                        help="Read the whole CSV instead of using/building the <name>.sessions.json session index")
+    parser.add_argument("--profile", default=None,
+                        help="Record per-stage time/memory and write a .json or .csv report to this path")
+    args = parser.parse_args()
+    views = tuple(v.strip() for v in args.views.split(",") if v.strip())
+    unknown = [v for v in views if v not in ortho_render.VIEWS]
+    if unknown or not views:
+        parser.error(f"Unknown view(s) {unknown}; choose from {', '.join(ortho_render.VIEWS)}.")
+    try:
+        slowmo = [parse_slowmo(w) for w in args.slowmo]
+    except ValueError as e:
+        parser.error(str(e))
+    prep = {}
+    if args.resample or slowmo:
+        prep.update(time_col=args.time_col, fps=args.fps, slowmo=slowmo, max_gap=args.max_gap)
+    if args.lowpass:
+        prep.update(time_col=args.time_col, lowpass=args.lowpass, max_gap=args.max_gap)
+    if args.profile:
+        profiling.activate(profiling.StageProfiler())
+
+    try:
+        if not os.path.exists(args.csv):
+            raise FileNotFoundError(f"CSV not found at: {args.csv}")
+        if args.no_index:
+            # Load the whole CSV, add session_id and split into sessions (once)
+            with profiling.stage("load csv") as st:
+                df = pd.read_csv(args.csv)
+                st.rows = len(df)
+            with profiling.stage("split sessions", rows=len(df)):
+                df["session_id"] = add_session_id(df, time_col=args.time_col)
+                groups = list(df.groupby("session_id"))
+            n_sessions = len(groups)
+
+            def load_session(label):
+                return groups[label - 1][1]      # groups are 0-based internally
+        else:
+            # Sidecar index: seek to each requested session and parse only its rows
+            with profiling.stage("session index"):
+                index = open_index(args.csv, time_col=args.time_col)
+            n_sessions = len(index)
+
+            def load_session(label):
+                with profiling.stage("load session") as st:
+                    chunk = index.load(label)
+                    st.rows = len(chunk)
+                return chunk
+        if not n_sessions:
+            raise RuntimeError("No sessions detected. Check your time column and values.")
+
+        # 1-based CLI labels
+        try:
+            labels = parse_sessions(args.session, n_sessions)
+        except ValueError as e:
+            parser.error(str(e))
+
+        # Output filenames (use 1-based label in names)
+        out_dir = os.path.dirname(os.path.abspath(args.csv))
+        if len(labels) == 1:
+            out_paths = {labels[0]: os.path.join(out_dir, args.out or f"Session_{labels[0]}")}
+        else:
+            out_paths = {lb: os.path.join(out_dir, f"{args.out}_{lb}" if args.out else f"Session_{lb}")
+                         for lb in labels}
+
+        if len(labels) == 1:
+            session_label = labels[0]
+            P, joints, limits, times = prepare_session(load_session(session_label), **prep)
+            render_session(P, joints, limits, session_label, out_paths[session_label], args.fps, args.png_frames,
+                           args.renderer, views, times)
+        else:
+            sessions, failed = {}, {}
+            for lb in labels:
+                P, joints, limits, times = prepare_session(load_session(lb), **prep)
+                if len(P) == 0:
+                    failed[lb] = "no frames left to animate"
+                else:
+                    sessions[lb] = (P, joints, limits, times)
+            if sessions:
+                with profiling.stage("render sessions", frames=sum(len(s[0]) for s in sessions.values())):
+                    failed.update(render_batch(sessions, out_paths, args.fps,
+                                               max(1, min(args.workers, len(sessions))), args.png_frames,
+                                               args.renderer, views))
+
+            print(f"[SUMMARY] {len(labels) - len(failed)}/{len(labels)} session(s) rendered.")
+            for lb in sorted(failed):
+                print(f"  Session {lb} failed: {failed[lb]}")
+            if failed:
+                raise RuntimeError(f"{len(failed)} of {len(labels)} session(s) failed.")
+    finally:
+        if args.profile:
+            profiling.finish(args.profile)
 
 if __name__ == "__main__":
     main()
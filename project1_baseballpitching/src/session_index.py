@@ -0,0 +1,209 @@
+"""Seekable session index for large landmark CSVs.
+
+A landmark export holds many capture sessions back to back; a new session
+starts wherever the time column resets (same rule as
+``animate_pitching.add_session_id``). ``build_index`` makes one streaming
+pass over the file and records, for every session, the byte offset and
+length of its rows, the row count, the time range and its ``session_pitch``
+value. The index is kept in a small JSON sidecar next to the CSV
+(``<name>.sessions.json``) together with the CSV's size and mtime, and is
+rebuilt automatically when either changes.
+
+``SessionIndex.load`` seeks straight to a session's bytes and parses only
+that slice, so opening session 500 costs the same as opening session 1.
+Rows are located by newline, so fields must not contain embedded newlines
+(numeric landmark exports never do).
+"""
+import io
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+INDEX_VERSION = 1
+BLOCK_BYTES = 64 << 20
+
+
+def sidecar_path(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}.sessions.json")
+
+
+def _source_signature(csv_path):
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _json_value(v):
+    if v is None or (isinstance(v, float) and np.isnan(v)):
+        return None
+    return v.item() if isinstance(v, np.generic) else v
+
+
+class _SessionScanner:
+    """Incremental session splitter fed with consecutive blocks of rows."""
+
+    def __init__(self):
+        self.sessions = []
+        self.n_rows = 0
+        self._last = np.nan      # last forward-filled time (NaN until the first valid one)
+
+    def feed(self, starts, ends, t, keys):
+        """``starts``/``ends`` are absolute byte ranges of the rows in this block."""
+        n = len(t)
+        if n == 0:
+            return
+        # Same rule as add_session_id: ffill, leading NaN -> 0, new session on a
+        # backwards step or on time == 0 (except the very first row).
+        filled = pd.Series(np.r_[self._last, t]).ffill().to_numpy()[1:]
+        prev = np.r_[self._last, filled[:-1]]
+        filled0 = np.where(np.isnan(filled), 0.0, filled)
+        prev0 = np.where(np.isnan(prev), 0.0, prev)
+        new = (filled0 - prev0 < 0) | (filled0 == 0)
+        if self.n_rows == 0:
+            new[0] = True                 # first row of the file opens session 1
+        self._last = filled[-1]
+        self.n_rows += n
+
+        cuts = np.r_[np.flatnonzero(new), n]
+        if cuts[0] != 0:
+            cuts = np.r_[0, cuts]
+        for a, b in zip(cuts[:-1], cuts[1:]):
+            seg_t = t[a:b][~np.isnan(t[a:b])]
+            if new[a]:
+                self.sessions.append({
+                    "session": len(self.sessions) + 1, "offset": int(starts[a]), "nbytes": 0, "rows": 0,
+                    "t_start": None, "t_end": None, "session_pitch": None,
+                })
+            cur = self.sessions[-1]
+            cur["rows"] += int(b - a)
+            cur["nbytes"] = int(ends[b - 1]) - cur["offset"]
+            if seg_t.size:
+                lo, hi = float(seg_t.min()), float(seg_t.max())
+                cur["t_start"] = lo if cur["t_start"] is None else min(cur["t_start"], lo)
+                cur["t_end"] = hi if cur["t_end"] is None else max(cur["t_end"], hi)
+            if cur["session_pitch"] is None and keys is not None:
+                seg_k = keys[a:b]
+                seg_k = seg_k[pd.notna(seg_k)]
+                if len(seg_k):
+                    cur["session_pitch"] = _json_value(seg_k[0])
+
+
+def build_index(csv_path, time_col="time", key_col="session_pitch", block_bytes=BLOCK_BYTES):
+    """Scan ``csv_path`` once and return the index dict (not saved)."""
+    scanner = _SessionScanner()
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        names = pd.read_csv(io.BytesIO(header), nrows=0).columns.tolist()
+        if time_col not in names:
+            raise KeyError(f"Expected a '{time_col}' column in the CSV.")
+        has_key = key_col is not None and key_col in names
+        usecols = [time_col, key_col] if has_key else [time_col]
+
+        pos = len(header)
+        rest = b""
+        while True:
+            data = f.read(block_bytes)
+            buf = rest + data
+            if data:
+                cut = buf.rfind(b"\n") + 1
+                block, rest = buf[:cut], buf[cut:]
+            else:
+                block, rest = buf, b""
+            if block:
+                _scan_block(block, pos, names, usecols, time_col, key_col if has_key else None, scanner)
+                pos += len(block)
+            if not data:
+                break
+
+    return {
+        "version": INDEX_VERSION,
+        "source": _source_signature(csv_path),
+        "time_col": time_col,
+        "key_col": key_col,
+        "columns": names,
+        "n_rows": scanner.n_rows,
+        "sessions": scanner.sessions,
+    }
+
+
+def _scan_block(block, base, names, usecols, time_col, key_col, scanner):
+    arr = np.frombuffer(block, dtype=np.uint8)
+    nl = np.flatnonzero(arr == 10)
+    starts = np.r_[0, nl + 1]
+    ends = np.r_[nl + 1, len(arr)]                    # exclusive, newline included
+    body = ends - starts - (np.r_[nl, len(arr)] < len(arr))   # length without "\n"
+    cr = (body > 0) & (arr[np.maximum(starts + body - 1, 0)] == 13)
+    rows = (body - cr) > 0                            # pandas skips blank lines
+    starts, ends = starts[rows], ends[rows]
+
+    part = pd.read_csv(io.BytesIO(block), header=None, names=names, usecols=usecols)
+    if len(part) != len(starts):
+        raise ValueError("Could not line up CSV rows with byte offsets (quoted fields "
+                         "with embedded newlines are not supported by the session index).")
+    t = pd.to_numeric(part[time_col], errors="coerce").to_numpy(dtype=float)
+    keys = part[key_col].to_numpy() if key_col else None
+    scanner.feed(base + starts, base + ends, t, keys)
+
+
+class SessionIndex:
+    """Per-session byte ranges of a landmark CSV (see module docstring)."""
+
+    def __init__(self, csv_path, index):
+        self.csv_path = Path(csv_path)
+        self.index = index
+        self.columns = index["columns"]
+        self.sessions = index["sessions"]
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def info(self, session):
+        """Index entry of a 1-based session number."""
+        if session < 1 or session > len(self.sessions):
+            raise IndexError(f"Requested session {session} out of range (1..{len(self.sessions)}).")
+        return self.sessions[session - 1]
+
+    def load(self, session):
+        """Rows of one 1-based session as a DataFrame (index 0..rows-1)."""
+        entry = self.info(session)
+        with open(self.csv_path, "rb") as f:
+            f.seek(entry["offset"])
+            data = f.read(entry["nbytes"])
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.columns)
+        if len(df) != entry["rows"]:
+            raise ValueError(f"Session index for {self.csv_path} is out of date; delete "
+                             f"{sidecar_path(self.csv_path)} and rerun.")
+        return df
+
+
+def open_index(csv_path, time_col="time", key_col="session_pitch", rebuild=False, verbose=True):
+    """Load the sidecar index of ``csv_path``, (re)building it if missing or stale."""
+    path = sidecar_path(csv_path)
+    index = None
+    if not rebuild:
+        try:
+            index = json.loads(path.read_text())
+        except (OSError, ValueError):
+            index = None
+    fresh = (
+        index is not None
+        and index.get("version") == INDEX_VERSION
+        and index.get("source") == _source_signature(csv_path)
+        and index.get("time_col") == time_col
+        and index.get("key_col") == key_col
+    )
+    if not fresh:
+        index = build_index(csv_path, time_col=time_col, key_col=key_col)
+        tmp = path.with_name(path.name + ".tmp")
+        try:
+            tmp.write_text(json.dumps(index, indent=1))
+            tmp.replace(path)
+            if verbose:
+                print(f"[INFO] Indexed {len(index['sessions'])} session(s) → {path}")
+        except OSError as e:
+            if verbose:
+                print(f"[WARN] Could not save session index ({e}); using it in memory only.")
+    return SessionIndex(csv_path, index)
@@ -0,0 +1,282 @@
+"""Batch free-throw analysis over many tracking JSON trials.
+
+    python shooting_batch.py data/                      # every *.json in a folder
+    python shooting_batch.py "season/**/BB_FT_*.json"   # or a glob (quote it)
+
+Every trial goes through the same steps as ``shooting_mechanics.py``
+(streamed read, release detection, ANGLE_TABLE angles), spread across a
+process pool. Two tables are written to ``--out``:
+
+* ``frames.csv``  one row per frame of every trial: ids, frame, time and
+  every angle;
+* ``trials.csv``  one row per trial: release frame/time and confidence, set
+  point and ball apex, every angle at release, its peak over the trial, and
+  the trial's result, entry angle and landing point.
+
+Runs are resumable: trials already in ``trials.csv`` (same file, size and
+mtime) are skipped, so an interrupted batch picks up where it stopped and
+new trials dropped into the folder are simply added. A trial's frame rows
+are written before its summary row; rows left behind by a run that died
+in between are cut off on the next start. Trials whose file changed have
+their old rows removed from both tables before they are analysed again,
+and tables written with different angle columns are refused (start over
+with ``--no-resume``).
+"""
+import argparse
+import csv
+import glob
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import shooting_mechanics as sm
+
+ID_RE = re.compile(r"_(P\d+)_(T\d+)$", re.IGNORECASE)
+FRAME_COLS = ["participant_id", "trial_id", "frame", "time_s"]
+TRIAL_COLS = ["file", "size", "mtime_ns", "participant_id", "trial_id", "n_frames",
+              "release_frame", "release_t", "release_confidence",
+              "set_point_frame", "set_point_t", "ball_apex_frame", "ball_apex_t"]
+META_COLS = ["result", "entry_angle", "landing_x", "landing_y"]
+
+
+def table_headers(angles):
+    """(frames.csv, trials.csv) headers for the angle names ``angles``."""
+    per_angle = [f"{name}_{k}" for name in angles for k in ("at_release", "peak")]
+    return FRAME_COLS + list(angles), TRIAL_COLS + per_angle + META_COLS
+
+
+def find_trials(spec):
+    """JSON trial paths from a directory, glob pattern or single file (sorted)."""
+    if os.path.isdir(spec):
+        paths = glob.glob(os.path.join(spec, "*.json"))
+    elif glob.has_magic(spec):
+        paths = glob.glob(spec, recursive=True)
+    else:
+        paths = [spec] if os.path.isfile(spec) else []
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def trial_ids(path, meta=None):
+    """(participant_id, trial_id) from a ``..._Pxxxx_Txxxx.json`` name, else the file's fields."""
+    m = ID_RE.search(Path(path).stem)
+    if m:
+        return m.group(1).upper(), m.group(2).upper()
+    meta = meta or {}
+    return meta.get("participant_id") or Path(path).stem, meta.get("trial_id") or ""
+
+
+def _signature(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _value(v):
+    """CSV cell: blank for None/NaN, plain floats otherwise."""
+    if v is None:
+        return ""
+    if isinstance(v, (float, np.floating)):
+        return "" if np.isnan(v) else float(v)
+    return v
+
+
+def analyze_file(path, side, fps, smooth_win, cache=True, cache_dir=None, lowpass=sm.LOWPASS_HZ, max_gap=sm.MAX_GAP):
+    """Worker: analyse one trial -> (summary row dict, per-frame rows)."""
+    t0 = time.perf_counter()
+    M = sm.read_trial(path, cache=cache, cache_dir=cache_dir)
+    time_s, events, mags = sm.analyze(M, side=side, fps=fps, smooth_win=smooth_win, lowpass=lowpass, max_gap=max_gap)
+    rel_idx = events["release"]
+    meta = M.meta
+    pid, tid = trial_ids(path, meta)
+    size, mtime_ns = _signature(path)
+
+    summary = {
+        "file": path, "size": size, "mtime_ns": mtime_ns, "participant_id": pid, "trial_id": tid,
+        "n_frames": len(time_s),
+        "release_frame": rel_idx if rel_idx is not None else "",
+        "release_t": float(time_s[rel_idx]) if rel_idx is not None else "",
+        "release_confidence": round(events["release_conf"], 3),
+    }
+    for name in ("set_point", "ball_apex"):
+        i = events[name]
+        summary[f"{name}_frame"] = i if i is not None else ""
+        summary[f"{name}_t"] = float(time_s[i]) if i is not None else ""
+    for name, y in mags.items():
+        summary[f"{name}_at_release"] = _value(y[rel_idx]) if rel_idx is not None else ""
+        summary[f"{name}_peak"] = _value(np.nanmax(y)) if np.isfinite(y).any() else ""
+    for k in META_COLS:
+        summary[k] = _value(meta.get(k))
+
+    frame_no = [int(f) if np.isfinite(f) else "" for f in M.frames]
+    rows = [[pid, tid, f] + [_value(v) for v in row] for f, *row in zip(frame_no, time_s, *mags.values())]
+    return summary, list(mags), rows, time.perf_counter() - t0
+
+
+def _load_done(trials_csv, frames_csv):
+    """Finished trials ``{file: (size, mtime_ns)}``.
+
+    Trims ``frames.csv`` back to the rows of the finished trials.
+    """
+    done, expected = {}, 0
+    if trials_csv.exists():
+        with open(trials_csv, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                done[row["file"]] = (int(row["size"]), int(row["mtime_ns"]))
+                expected += int(row["n_frames"])
+    if frames_csv.exists():
+        keep = 0
+        with open(frames_csv, "rb") as f:
+            for i, line in enumerate(f):
+                if i > expected or not line.endswith(b"\n"):
+                    break
+                keep += len(line)
+        if keep != frames_csv.stat().st_size:
+            with open(frames_csv, "r+b") as f:
+                f.truncate(keep)
+            print(f"[INFO] Dropped frame rows of an unfinished trial from {frames_csv}")
+    return done
+
+
+def _read_header(path):
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.reader(f), None)
+
+
+def _drop_trials(trials_csv, frames_csv, files):
+    """Rewrite both tables without the rows of the trials in ``files``.
+
+    frames.csv holds each trial's ``n_frames`` rows in trials.csv order, so
+    the two files are walked side by side.
+    """
+    files = set(files)
+    tmp_t, tmp_f = trials_csv.with_suffix(".csv.tmp"), frames_csv.with_suffix(".csv.tmp")
+    with open(trials_csv, newline="", encoding="utf-8") as ti, open(frames_csv, newline="", encoding="utf-8") as fi, \
+            open(tmp_t, "w", newline="", encoding="utf-8") as to, open(tmp_f, "w", newline="", encoding="utf-8") as fo:
+        tr, fr = csv.DictReader(ti), csv.reader(fi)
+        tw, fw = csv.DictWriter(to, fieldnames=tr.fieldnames), csv.writer(fo)
+        tw.writeheader()
+        fw.writerow(next(fr))
+        for row in tr:
+            block = [next(fr) for _ in range(int(row["n_frames"]))]
+            if row["file"] in files:
+                continue
+            tw.writerow(row)
+            fw.writerows(block)
+    os.replace(tmp_t, trials_csv)
+    os.replace(tmp_f, frames_csv)
+
+
+def run_batch(paths, out_dir, side=sm.SHOOTING_SIDE, fps=sm.FPS, smooth_win=sm.SMOOTH_WIN,
+              workers=None, resume=True, cache=sm.TRIAL_CACHE, cache_dir=sm.CACHE_DIR,
+              lowpass=sm.LOWPASS_HZ, max_gap=sm.MAX_GAP):
+    """Analyse ``paths`` into ``out_dir``/frames.csv and trials.csv.
+
+    Returns ``{path: error message}`` for the trials that failed.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    trials_csv, frames_csv = out_dir / "trials.csv", out_dir / "frames.csv"
+    if not resume:
+        for p in (trials_csv, frames_csv):
+            if p.exists():
+                p.unlink()
+    done = _load_done(trials_csv, frames_csv)
+    frame_header, trial_header = table_headers(sm.ANGLE_TABLE)
+    for p, header in ((frames_csv, frame_header), (trials_csv, trial_header)):
+        found = _read_header(p)
+        if found is not None and found != header:
+            raise ValueError(f"{p} was written with different columns than the current ANGLE_TABLE; "
+                             f"rerun with --no-resume or choose another --out folder.")
+
+    todo = [p for p in paths if done.get(p) != _signature(p)]
+    stale = [p for p in todo if p in done]
+    if stale:
+        _drop_trials(trials_csv, frames_csv, stale)
+        print(f"[INFO] {len(stale)} trial(s) changed since their rows were written; "
+              f"old rows removed, analysing them again.")
+    skipped = len(paths) - len(todo)
+    if skipped:
+        print(f"[INFO] Skipping {skipped} trial(s) already in {trials_csv}")
+    if not todo:
+        return {}
+
+    workers = max(1, min(workers or os.cpu_count() or 1, len(todo)))
+    print(f"[INFO] Analysing {len(todo)} trial(s) with {workers} worker(s)…")
+    failed = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(frames_csv, "a", newline="", encoding="utf-8") as ff, \
+            open(trials_csv, "a", newline="", encoding="utf-8") as tf:
+        frame_w, trial_w = csv.writer(ff), None
+        futures = {pool.submit(analyze_file, p, side, fps, smooth_win, cache, cache_dir, lowpass, max_gap): p for p in todo}
+        for k, fut in enumerate(as_completed(futures), 1):
+            path = futures[fut]
+            try:
+                summary, angles, rows, secs = fut.result()
+            except Exception as e:
+                failed[path] = f"{type(e).__name__}: {e}"
+                print(f"[{k}/{len(todo)}] {Path(path).name} FAILED: {failed[path]}")
+                continue
+            if ff.tell() == 0:
+                frame_w.writerow(frame_header)
+            frame_w.writerows(rows)
+            ff.flush()
+            if trial_w is None:
+                trial_w = csv.DictWriter(tf, fieldnames=trial_header, extrasaction="ignore")
+                if tf.tell() == 0:
+                    trial_w.writeheader()
+            trial_w.writerow(summary)
+            tf.flush()
+            rel = f"release {summary['release_t']:.3f} s" if summary["release_t"] != "" else "no release"
+            print(f"[{k}/{len(todo)}] {summary['participant_id']} {summary['trial_id']} done "
+                  f"({summary['n_frames']} frames, {rel}, {secs:.1f} s)")
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse many free-throw tracking JSON trials.")
+    parser.add_argument("inputs", nargs="+", help="Trial folder(s), glob pattern(s) or JSON file(s)")
+    parser.add_argument("--out", default="batch_out", help="Output folder for frames.csv / trials.csv "
+                                                           "(default: ./batch_out)")
+    parser.add_argument("--side", choices=("R", "L"), default=sm.SHOOTING_SIDE.upper(),
+                        help=f"Shooting side (default: {sm.SHOOTING_SIDE})")
+    parser.add_argument("--fps", type=float, default=sm.FPS, help=f"Frames per second (default: {sm.FPS:g})")
+    parser.add_argument("--smooth", type=int, default=sm.SMOOTH_WIN,
+                        help=f"Smoothing window for release detection, frames (default: {sm.SMOOTH_WIN})")
+    parser.add_argument("--lowpass", type=float, default=sm.LOWPASS_HZ,
+                        help="Low-pass cutoff for joint coordinates in Hz before angles are computed (default: off, raw angles)")
+    parser.add_argument("--max-gap", type=int, default=sm.MAX_GAP,
+                        help=f"Longest gap of missing joint data to interpolate, frames (default: {sm.MAX_GAP})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: CPU count)")
+    parser.add_argument("--no-resume", action="store_true",
+                        help="Start over instead of skipping trials already in trials.csv")
+    parser.add_argument("--cache-dir", default=sm.CACHE_DIR,
+                        help="Folder for binary trial caches (default: next to each JSON)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Parse every JSON instead of using/creating binary trial caches")
+    args = parser.parse_args()
+
+    paths = sorted({p for spec in args.inputs for p in find_trials(spec)})
+    if not paths:
+        raise SystemExit("No trial JSON files found.")
+    try:
+        failed = run_batch(paths, args.out, side=args.side, fps=args.fps, smooth_win=args.smooth,
+                           workers=args.workers, resume=not args.no_resume,
+                           cache=not args.no_cache, cache_dir=args.cache_dir,
+                           lowpass=args.lowpass or None, max_gap=args.max_gap)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    print(f"[SUMMARY] {len(paths) - len(failed)} of {len(paths)} trial(s) in {Path(args.out).resolve()}")
+    if failed:
+        raise SystemExit(f"{len(failed)} trial(s) failed: " + ", ".join(Path(p).name for p in failed))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,153 +3,97 @@ INPUT_JSON = r"C:/Users/Kesar Lab/Desktop/Py Projects/BB_FT_P0001_T0001.json"
 OUT_DIR    = r"C:/Users/Kesar Lab/Desktop/Py Projects/plots_out"      # or None -> creates ./plots next to this script
 SHOOTING_SIDE = "R"           # "R" or "L"
 FPS = 30.0                    # frames per second
-SMOOTH_WIN = 5                # frames for light smoothing (0/1 disables)
+SMOOTH_WIN = 5                # frames of light smoothing: release-detection distance, plotted curves without LOWPASS_HZ (0/1 disables)
+LOWPASS_HZ = None             # e.g. 6.0: zero-phase low-pass of joint coordinates before angles/plots (None = raw angles)
+MAX_GAP = 5                   # frames of missing joint data bridged by interpolation before filtering
+PROFILE_OUT = None            # per-stage time/memory report (.json or .csv), None disables
+TRIAL_CACHE = True            # keep a binary copy of each parsed trial (<name>.trial.bin); False re-parses the JSON
+CACHE_DIR = None              # folder for trial caches, None -> next to each JSON
+EXTENDED_CSV = False          # also write joint_angles.csv with every ANGLE_TABLE angle (hip, shoulder, trunk lean too)
 # ===================================================================
 
-import os, json, math
+import os, sys
 import numpy as np
 import matplotlib.pyplot as plt
 from pathlib import Path
 from csv import writer as csv_writer
 
-def _to_xyz(v):
-    try:
-        x,y,z = v; return np.array([float(x), float(y), float(z)], float)
-    except: return np.array([np.nan, np.nan, np.nan], float)
-
-def midpoint(a,b):
-    if a is None or b is None: return np.full(3, np.nan)
-    if np.any(~np.isfinite(a)) or np.any(~np.isfinite(b)): return np.full(3, np.nan)
-    return 0.5*(a+b)
-
-def first_valid(*arrs):
-    for a in arrs:
-        if a is not None and np.any(np.isfinite(a)): return a
-    return np.full(3, np.nan)
-
-def angle_mag_deg(u, v):
-    if u is None or v is None: return np.nan
-    if np.any(~np.isfinite(u)) or np.any(~np.isfinite(v)): return np.nan
-    nu, nv = np.linalg.norm(u), np.linalg.norm(v)
-    if nu == 0 or nv == 0: return np.nan
-    dot = float(np.dot(u, v))
-    crs = float(np.linalg.norm(np.cross(u, v)))
-    return math.degrees(math.atan2(crs, dot))  # 0..180
-
-def simple_nan_interp(y):
-    y = np.asarray(y, float)
-    n = y.size; idx = np.arange(n)
-    m = np.isfinite(y)
-    if m.sum() == 0: return y
-    y[~m] = np.interp(idx[~m], idx[m], y[m])
-    return y
-
-def smooth(y, win):
-    if win is None or win <= 1: return y
-    y = simple_nan_interp(y)
-    k = np.ones(int(win))/max(1,int(win))
-    return np.convolve(y, k, mode="same")
-
-def read_trial(path):
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    track = data.get("tracking", [])
-    frames, times_ms, ball = [], [], []
-    R_SH=[]; L_SH=[]; R_EL=[]; L_EL=[]; R_WR=[]; L_WR=[]
-    R_HP=[]; L_HP=[]; R_KN=[]; L_KN=[]; R_AN=[]; L_AN=[]
-    R_F1=[]; R_F5=[]; L_F1=[]; L_F5=[]
-    for fr in track:
-        frames.append(fr.get("frame", np.nan))
-        times_ms.append(fr.get("time", np.nan))
-        d = fr.get("data", {}) or {}
-        p = d.get("player", {}) or {}
-        ball.append(_to_xyz(d.get("ball", [])))
-        R_SH.append(_to_xyz(p.get("R_SHOULDER")));  L_SH.append(_to_xyz(p.get("L_SHOULDER")))
-        R_EL.append(_to_xyz(p.get("R_ELBOW")));     L_EL.append(_to_xyz(p.get("L_ELBOW")))
-        R_WR.append(_to_xyz(p.get("R_WRIST")));     L_WR.append(_to_xyz(p.get("L_WRIST")))
-        R_HP.append(_to_xyz(p.get("R_HIP")));       L_HP.append(_to_xyz(p.get("L_HIP")))
-        R_KN.append(_to_xyz(p.get("R_KNEE")));      L_KN.append(_to_xyz(p.get("L_KNEE")))
-        R_AN.append(_to_xyz(p.get("R_ANKLE")));     L_AN.append(_to_xyz(p.get("L_ANKLE")))
-        R_F1.append(_to_xyz(p.get("R_1STFINGER"))); R_F5.append(_to_xyz(p.get("R_5THFINGER")))
-        L_F1.append(_to_xyz(p.get("L_1STFINGER"))); L_F5.append(_to_xyz(p.get("L_5THFINGER")))
-    frames = np.asarray(frames, float)
-    times_s = np.asarray(times_ms, float)/1000.0
-    ball = np.asarray(ball, float)
-    R_SH=np.asarray(R_SH); L_SH=np.asarray(L_SH)
-    R_EL=np.asarray(R_EL); L_EL=np.asarray(L_EL)
-    R_WR=np.asarray(R_WR); L_WR=np.asarray(L_WR)
-    R_HP=np.asarray(R_HP); L_HP=np.asarray(L_HP)
-    R_KN=np.asarray(R_KN); L_KN=np.asarray(L_KN)
-    R_AN=np.asarray(R_AN); L_AN=np.asarray(L_AN)
-    R_F1=np.asarray(R_F1); R_F5=np.asarray(R_F5)
-    L_F1=np.asarray(L_F1); L_F5=np.asarray(L_F5)
-    HAND_R = np.array([midpoint(R_F1[i], R_F5[i]) if (np.any(np.isfinite(R_F1[i])) and np.any(np.isfinite(R_F5[i])))
-                       else first_valid(R_F1[i], R_F5[i]) for i in range(len(frames))], float)
-    HAND_L = np.array([midpoint(L_F1[i], L_F5[i]) if (np.any(np.isfinite(L_F1[i])) and np.any(np.isfinite(L_F5[i])))
-                       else first_valid(L_F1[i], L_F5[i]) for i in range(len(frames))], float)
-    return {
-        "frames": frames, "times_s": times_s, "ball": ball,
-        "R_SH": R_SH, "L_SH": L_SH, "R_EL": R_EL, "L_EL": L_EL, "R_WR": R_WR, "L_WR": L_WR,
-        "R_HP": R_HP, "L_HP": L_HP, "R_KN": R_KN, "L_KN": L_KN, "R_AN": R_AN, "L_AN": L_AN,
-        "HAND_R": HAND_R, "HAND_L": HAND_L
-    }
-
-def mags_from(D):
-    N = len(D["frames"])
-    EL_R = np.full(N, np.nan); EL_L = np.full(N, np.nan)
-    KN_R = np.full(N, np.nan); KN_L = np.full(N, np.nan)
-    WR_R = np.full(N, np.nan); WR_L = np.full(N, np.nan)
-    for i in range(N):
-        EL_R[i] = angle_mag_deg(D["R_SH"][i]-D["R_EL"][i], D["R_WR"][i]-D["R_EL"][i])
-        EL_L[i] = angle_mag_deg(D["L_SH"][i]-D["L_EL"][i], D["L_WR"][i]-D["L_EL"][i])
-        KN_R[i] = angle_mag_deg(D["R_HP"][i]-D["R_KN"][i], D["R_AN"][i]-D["R_KN"][i])
-        KN_L[i] = angle_mag_deg(D["L_HP"][i]-D["L_KN"][i], D["L_AN"][i]-D["L_KN"][i])
-        WR_R[i] = angle_mag_deg(D["R_EL"][i]-D["R_WR"][i], D["HAND_R"][i]-D["R_WR"][i])
-        WR_L[i] = angle_mag_deg(D["L_EL"][i]-D["L_WR"][i], D["HAND_L"][i]-D["L_WR"][i])
-    return {
-        "ELBOW_R": 180.0 - EL_R, "ELBOW_L": 180.0 - EL_L,
-        "KNEE_R":  180.0 - KN_R, "KNEE_L":  180.0 - KN_L,
-        "WRIST_R": 180.0 - WR_R, "WRIST_L": 180.0 - WR_L,
-    }
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))  # repo root -> shared `biomech` package
+from biomech import filters, kinematics, motion, profiling, release
+
+# ===== Angle table: name -> (kind, points...)  (kinds: see biomech/kinematics.py) =====
+# A point is a joint name of the tracking data (or HAND_R/HAND_L, added by read_trial) or a tuple of names (their midpoint).
+ANGLE_TABLE = {
+    "WRIST_R":    ("flexion", "R_ELBOW", "R_WRIST", "HAND_R"),
+    "WRIST_L":    ("flexion", "L_ELBOW", "L_WRIST", "HAND_L"),
+    "ELBOW_R":    ("flexion", "R_SHOULDER", "R_ELBOW", "R_WRIST"),
+    "ELBOW_L":    ("flexion", "L_SHOULDER", "L_ELBOW", "L_WRIST"),
+    "KNEE_R":     ("flexion", "R_HIP", "R_KNEE", "R_ANKLE"),
+    "KNEE_L":     ("flexion", "L_HIP", "L_KNEE", "L_ANKLE"),
+    "HIP_R":      ("flexion", "R_SHOULDER", "R_HIP", "R_KNEE"),
+    "HIP_L":      ("flexion", "L_SHOULDER", "L_HIP", "L_KNEE"),
+    "SHOULDER_R": ("angle", "R_HIP", "R_SHOULDER", "R_ELBOW"),      # arm elevation vs trunk side
+    "SHOULDER_L": ("angle", "L_HIP", "L_SHOULDER", "L_ELBOW"),
+    "TRUNK_LEAN": ("segment", ("L_HIP", "R_HIP"), ("L_SHOULDER", "R_SHOULDER"), (0.0, 0.0, 1.0)),  # from vertical (z up)
+}
+CSV_ANGLES = ("WRIST_R", "WRIST_L", "ELBOW_R", "ELBOW_L", "KNEE_R", "KNEE_L")   # magnitudes_wrist_elbow_knee.csv columns
+# ===================================================================================
+
+def hand_points(M):
+    """HAND_R/HAND_L: midpoint of the 1st/5th finger, else whichever exists."""
+    return {f"HAND_{k}": kinematics.midpoint_or_first(M.joint(f"{k}_1STFINGER"), M.joint(f"{k}_5THFINGER")) for k in "RL"}
+
+def read_trial(path, cache=TRIAL_CACHE, cache_dir=CACHE_DIR):
+    """MotionTrial (float32 frames x joints x 3, ball = joint "ball") with HAND_R/HAND_L added.
+    ANGLE_TABLE joints the trial never reports are added as NaN, so every angle is present."""
+    M = motion.load_tracking(path, cache=cache, cache_dir=cache_dir)
+    extra = {n: M.joint(n) for d in ANGLE_TABLE.values() for n in kinematics.point_names(d) if n not in M}
+    extra.update(hand_points(M))
+    return M.with_joints(**extra)
+
+def filter_trial(M, fps=FPS, lowpass=LOWPASS_HZ, max_gap=MAX_GAP):
+    """M with every joint except the ball gap-filled and low-pass filtered in one pass."""
+    if not lowpass: return M
+    body = [j for j in range(len(M.joints)) if M.joints[j] != "ball"]
+    P = M.positions.copy()
+    P[:, body] = filters.lowpass_motion(M.positions[:, body], fps, lowpass, max_gap=max_gap)
+    return M.replace(positions=P)
+
+def mags_from(M, table=None):
+    """All ANGLE_TABLE angles (deg) over all frames; entries with missing points are skipped."""
+    return kinematics.joint_angles(M, ANGLE_TABLE if table is None else table)
 
 def auto_release(time_s, ball_xyz, wrist_xyz, fps=FPS, smooth_win=SMOOTH_WIN):
-    """Adaptive 'ball leaves hand' based on wrist–ball distance."""
-    t = np.asarray(time_s, float)
-    d = np.linalg.norm(ball_xyz - wrist_xyz, axis=1)
-    ds = smooth(d, smooth_win if smooth_win else 1)
-
-    # stats → adaptive thresholds
-    finite = np.isfinite(ds)
-    if finite.sum() < 5: return None
-    dmin = float(np.nanmin(ds[finite]))
-    d90  = float(np.nanpercentile(ds[finite], 90))
-    spread = max(1e-6, d90 - dmin)
-
-    contact_r = dmin + 0.15*spread          # slightly above tight contact
-    rise_delta = max(0.01, 0.06*spread)     # must keep separating a bit
-    stay_n = max(2, int(round(100 * fps / 1000.0)))  # ≈100 ms
-
-    N = len(ds)
-    for i in range(1, N - stay_n):
-        if not (np.isfinite(ds[i-1]) and np.isfinite(ds[i])): continue
-        crossed = (ds[i-1] < contact_r) and (ds[i] >= contact_r)
-        if not crossed: continue
-        seg = ds[i:i+stay_n+1]
-        if np.all(np.isfinite(seg)) and np.all(seg >= contact_r) and (seg[-1] - seg[0] >= rise_delta):
-            return i
-
-    # Fallback: after global min, first frame that rises by rise_delta and stays higher
-    k0 = int(np.nanargmin(ds[finite]))
-    for j in range(k0+1, N - stay_n):
-        seg = ds[j:j+stay_n+1]
-        if np.all(np.isfinite(seg)) and (seg[-1] - ds[k0] >= rise_delta) and np.all(np.diff(seg) >= -1e-6):
-            return j
-    return None
-
-def plot_pair(time_s, yR, yL, ylabel, title, out_png, release_t=None, smooth_win=SMOOTH_WIN):
+    """Adaptive 'ball leaves hand' frame (or None) from the wrist–ball distance; rules in biomech/release.py."""
+    return release.detect(ball_xyz, wrist_xyz, fps, smooth_win if smooth_win else 1)[0]
+
+def analyze(M, side=SHOOTING_SIDE, fps=FPS, smooth_win=SMOOTH_WIN, lowpass=LOWPASS_HZ, max_gap=MAX_GAP):
+    """time_s, events and all angles of one read_trial() MotionTrial.
+
+    Release is detected on the raw positions; with ``lowpass`` (Hz) the
+    angles come from the filtered ones (filter_trial), else from the raw ones.
+
+    events: "release" index (or None) with its "release_conf" (0..1), plus the
+    alternative "set_point" (peak elbow flexion before release) and
+    "ball_apex" (highest ball after release) indices, None when unknown.
+    """
+    time_s = M.frames / float(fps)
+    side = side.upper()
+    with profiling.stage("release detection", frames=len(time_s)):
+        rel_idx, conf = release.detect(M.joint("ball"), M.joint(f"{side}_WRIST"), fps, smooth_win if smooth_win else 1)
+    with profiling.stage("filtering", frames=len(time_s)):
+        F = filter_trial(M, fps, lowpass, max_gap)
+    with profiling.stage("angle computation", frames=len(time_s)):
+        mags = mags_from(F)
+    rel = -1 if rel_idx is None else rel_idx
+    sp = release.set_point(mags[f"ELBOW_{side}"], rel) if f"ELBOW_{side}" in mags else -1
+    ap = release.ball_apex(M.joint("ball")[:, 2], rel)
+    events = {"release": rel_idx, "release_conf": conf,
+              "set_point": sp if sp >= 0 else None, "ball_apex": ap if ap >= 0 else None}
+    return time_s, events, mags
+
+def plot_pair(time_s, yR, yL, ylabel, title, out_png, release_t=None):
     yR = np.asarray(yR, float); yL = np.asarray(yL, float)
-    if smooth_win and smooth_win > 1:
-        yR = smooth(yR, smooth_win); yL = smooth(yL, smooth_win)
     fig, ax = plt.subplots(figsize=(11,6))
     ax.plot(time_s, yR, label="Right"); ax.plot(time_s, yL, label="Left")
     if release_t is not None:
@@ -158,8 +102,8 @@ def plot_pair(time_s, yR, yL, ylabel, title, out_png, release_t=None, smooth_win
     fig.tight_layout(); fig.savefig(out_png, dpi=150); plt.close(fig)
 
 def save_csv(path_csv, time_s, mags):
-    headers = ["time_s","WRIST_R","WRIST_L","ELBOW_R","ELBOW_L","KNEE_R","KNEE_L"]
-    rows = zip(time_s, mags["WRIST_R"], mags["WRIST_L"], mags["ELBOW_R"], mags["ELBOW_L"], mags["KNEE_R"], mags["KNEE_L"])
+    headers = ["time_s"] + list(mags)
+    rows = zip(time_s, *mags.values())
     with open(path_csv, "w", newline="", encoding="utf-8") as f:
         w = csv_writer(f); w.writerow(headers); w.writerows(rows)
 
@@ -167,24 +111,37 @@ def main():
     out_dir = Path(OUT_DIR) if OUT_DIR else (Path.cwd() / "plots")
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    D = read_trial(INPUT_JSON)
-    time_s = np.asarray(D["frames"], float) / float(FPS)
-
-    wrist = D["R_WR"] if SHOOTING_SIDE.upper()=="R" else D["L_WR"]
-    rel_idx = auto_release(time_s, D["ball"], wrist, fps=FPS)
-    release_t = float(time_s[rel_idx]) if rel_idx is not None else None
+    if PROFILE_OUT: profiling.activate(profiling.StageProfiler())
 
-    mags = mags_from(D)
-    plot_pair(time_s, mags["WRIST_R"], mags["WRIST_L"], "Wrist flexion magnitude (deg)",
-              "Wrist flexion magnitude (R & L)", str(out_dir/"wrist_flexion_magnitude.png"), release_t)
-    plot_pair(time_s, mags["ELBOW_R"], mags["ELBOW_L"], "Elbow flexion magnitude (deg)",
-              "Elbow flexion magnitude (R & L)", str(out_dir/"elbow_flexion_magnitude.png"), release_t)
-    plot_pair(time_s, mags["KNEE_R"], mags["KNEE_L"], "Knee flexion magnitude (deg)",
-              "Knee flexion magnitude (R & L)", str(out_dir/"knee_flexion_magnitude.png"), release_t)
-
-    save_csv(str(out_dir/"magnitudes_wrist_elbow_knee.csv"), time_s, mags)
-    print("Saved to:", str(out_dir.resolve()))
-    print("Release:", f"{release_t:.3f} s (frame {rel_idx})" if release_t is not None else "NOT DETECTED")
+    try:
+        with profiling.stage("trial load") as st:
+            M = read_trial(INPUT_JSON); st.frames = len(M)
+        time_s, events, mags = analyze(M)
+        rel_idx = events["release"]
+        release_t = float(time_s[rel_idx]) if rel_idx is not None else None
+        plot_win = 0 if LOWPASS_HZ else SMOOTH_WIN   # filtered angles need no extra smoothing
+        with profiling.stage("plots", frames=len(time_s)):
+            # plotted curves: one moving-average pass over all plotted angles (raw values stay in the CSV)
+            S = dict(zip(CSV_ANGLES, filters.moving_average(np.column_stack([mags[k] for k in CSV_ANGLES]), plot_win).T))
+            plot_pair(time_s, S["WRIST_R"], S["WRIST_L"], "Wrist flexion magnitude (deg)",
+                      "Wrist flexion magnitude (R & L)", str(out_dir/"wrist_flexion_magnitude.png"), release_t)
+            plot_pair(time_s, S["ELBOW_R"], S["ELBOW_L"], "Elbow flexion magnitude (deg)",
+                      "Elbow flexion magnitude (R & L)", str(out_dir/"elbow_flexion_magnitude.png"), release_t)
+            plot_pair(time_s, S["KNEE_R"], S["KNEE_L"], "Knee flexion magnitude (deg)",
+                      "Knee flexion magnitude (R & L)", str(out_dir/"knee_flexion_magnitude.png"), release_t)
+
+        with profiling.stage("csv", frames=len(time_s)):
+            save_csv(str(out_dir/"magnitudes_wrist_elbow_knee.csv"), time_s, {k: mags[k] for k in CSV_ANGLES})
+            if EXTENDED_CSV: save_csv(str(out_dir/"joint_angles.csv"), time_s, mags)
+        print("Saved to:", str(out_dir.resolve()))
+        print("Release:", f"{release_t:.3f} s (frame {rel_idx}, confidence {events['release_conf']:.2f})" if release_t is not None else "NOT DETECTED")
+        for name in ("set_point", "ball_apex"):
+            if events[name] is not None: print(f"{name.replace('_', ' ').capitalize()}: {time_s[events[name]]:.3f} s (frame {events[name]})")
+        meta = M.meta
+        if meta.get("result") is not None:
+            print("Result:", meta["result"], f"| entry angle {meta['entry_angle']}" if meta.get("entry_angle") is not None else "")
+    finally:
+        if PROFILE_OUT: profiling.finish(PROFILE_OUT)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,292 @@
+"""Online (live) free-throw kinematics and release detection.
+
+``OnlineShot`` takes one tracking frame at a time (the same objects as in a
+trial's ``tracking`` array) and keeps only fixed-size ring buffers:
+
+* angles from ``shooting_mechanics.ANGLE_TABLE`` for the new frame, smoothed
+  with a trailing (causal) moving average over ``smooth_win`` frames;
+* the wrist–ball distance, smoothed the same way, with its running minimum
+  and 90th percentile over the last ``history_s`` seconds for the adaptive
+  thresholds of ``biomech/release.py``;
+* a release candidate: an upward crossing of the contact radius that is
+  confirmed once the distance has stayed above it for ~100 ms and grown by
+  ``rise_delta`` (the offline detector's main rule; the offline fallback
+  needs the whole trial and has no online equivalent).
+
+The release event is emitted ``stay_frames(fps)`` frames after the crossing,
+and the causal average lags ``(smooth_win - 1) // 2`` frames behind the
+offline centred one, which is subtracted from the reported frame. So the
+event arrives at most ``stay_frames(fps) + (smooth_win - 1) // 2`` frames
+after the ball leaves the hand (5 frames ≈ 167 ms at 30 fps, SMOOTH_WIN 5).
+
+    python shooting_online.py < frames.jsonl            # JSON lines on stdin
+    python shooting_online.py --listen 5005             # JSON lines over TCP (localhost)
+    python shooting_online.py --replay data/*.json      # compare with the offline analysis
+
+Output is JSON lines: one ``{"frame": ..., "angles": {...}}`` per input frame
+(``--events-only`` drops them) and ``{"event": "release", ...}`` when the
+release is confirmed.
+"""
+import argparse
+import glob
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import shooting_mechanics as sm
+from biomech import kinematics, release, tracking
+
+HISTORY_S = 20.0
+
+
+class Ring:
+    """Fixed-capacity ring buffer of rows (capacity x channels), oldest overwritten."""
+
+    def __init__(self, capacity, channels=1):
+        self.data = np.full((capacity, channels), np.nan)
+        self.n = 0
+
+    def push(self, row):
+        self.data[self.n % len(self.data)] = row
+        self.n += 1
+
+    def last(self, k):
+        """The most recent ``min(k, stored)`` rows, oldest first."""
+        k = min(k, self.n, len(self.data))
+        idx = np.arange(self.n - k, self.n) % len(self.data)
+        return self.data[idx]
+
+    def filled(self):
+        return self.data if self.n >= len(self.data) else self.data[:self.n]
+
+
+def _xyz(v):
+    try:
+        x, y, z = v
+        return np.array([[float(x), float(y), float(z)]])
+    except (TypeError, ValueError):
+        return np.full((1, 3), np.nan)
+
+
+class OnlineShot:
+    """Per-frame angles and release detection for one live shot."""
+
+    def __init__(self, side=sm.SHOOTING_SIDE, fps=sm.FPS, smooth_win=sm.SMOOTH_WIN,
+                 table=None, history_s=HISTORY_S):
+        self.side = side.upper()
+        self.fps = float(fps)
+        self.win = max(1, int(smooth_win or 1))
+        self.table = dict(sm.ANGLE_TABLE if table is None else table)
+        self.names = list(self.table)
+        self.stay_n = release.stay_frames(self.fps)
+        self.lag = (self.win - 1) // 2
+        self.angles = Ring(self.win, len(self.names))
+        self.dist = Ring(self.win)
+        self.history = Ring(max(self.stay_n + 2, int(history_s * self.fps)))
+        self.times = Ring(self.stay_n + self.lag + 2)
+        self.reset()
+
+    def reset(self):
+        """Start a new shot (buffers are cleared, release unlatched)."""
+        for ring in (self.angles, self.dist, self.history, self.times):
+            ring.data[:] = np.nan
+            ring.n = 0
+        self.index = 0
+        self.prev_ds = np.nan
+        self.candidate = None          # (index, distance, contact_r, rise_delta)
+        self.release = None
+
+    def _points(self, frame):
+        player = ((frame.get("data") or {}).get("player") or {})
+        P = {name: _xyz(v) for name, v in player.items()}
+        for s in ("R", "L"):
+            P[f"HAND_{s}"] = kinematics.midpoint_or_first(_xyz(player.get(f"{s}_1STFINGER")),
+                                                          _xyz(player.get(f"{s}_5THFINGER")))
+        return P
+
+    def _thresholds(self):
+        h = self.history.filled()[:, 0]
+        h = h[np.isfinite(h)]
+        if h.size < release.MIN_FINITE:
+            return None
+        dmin = float(h.min())
+        spread = max(1e-6, float(np.percentile(h, 90)) - dmin)
+        return dmin + release.CONTACT_FRAC * spread, max(release.RISE_MIN, release.RISE_FRAC * spread)
+
+    def update(self, frame):
+        """Process one tracking frame -> (smoothed angles dict, release event dict or None)."""
+        i = self.index
+        self.index += 1
+        frame = frame if isinstance(frame, dict) else {}
+        f = frame.get("frame", i)
+        t = float(f) / self.fps if isinstance(f, (int, float)) else np.nan
+        self.times.push(t)
+
+        P = self._points(frame)
+        raw = kinematics.joint_angles(P, self.table)
+        self.angles.push([raw[n][0] if n in raw else np.nan for n in self.names])
+        with np.errstate(invalid="ignore"):
+            recent = self.angles.last(self.win)
+            ok = np.isfinite(recent)
+            smooth = np.where(ok.any(axis=0), np.where(ok, recent, 0).sum(axis=0) / np.maximum(ok.sum(axis=0), 1), np.nan)
+        angles = dict(zip(self.names, smooth.tolist()))
+
+        wrist = P.get(f"{self.side}_WRIST", _xyz(None))
+        d = float(release.wrist_ball_distance(_xyz((frame.get("data") or {}).get("ball")), wrist)[0])
+        self.dist.push(d)
+        recent = self.dist.last(self.win)[:, 0]
+        recent = recent[np.isfinite(recent)]
+        ds = float(recent.mean()) if recent.size else np.nan
+        self.history.push(ds)
+        event = None if self.release is not None else self._detect(i, ds)
+        self.prev_ds = ds
+        return angles, event
+
+    def _detect(self, i, ds):
+        if self.candidate is not None:
+            c_i, c_d, contact_r, rise_delta = self.candidate
+            if not np.isfinite(ds) or ds < contact_r:
+                self.candidate = None
+            elif i - c_i >= self.stay_n:
+                self.candidate = None
+                if ds - c_d >= rise_delta:
+                    idx = max(0, c_i - self.lag)
+                    back = self.index - 1 - idx
+                    t = self.times.last(back + 1)[0, 0] if back < len(self.times.data) else np.nan
+                    self.release = {"event": "release", "frame": idx, "time_s": t,
+                                    "detected_at": i, "latency_frames": i - idx}
+                    return self.release
+        if self.candidate is None and np.isfinite(ds) and np.isfinite(self.prev_ds):
+            th = self._thresholds()
+            if th is not None and self.prev_ds < th[0] <= ds:
+                self.candidate = (i, ds, th[0], th[1])
+        return None
+
+
+def _clean(v):
+    """JSON-safe copy: NaN -> null, numpy scalars -> Python numbers."""
+    if isinstance(v, dict):
+        return {k: _clean(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_clean(x) for x in v]
+    if isinstance(v, (float, np.floating)):
+        return None if np.isnan(v) else float(v)
+    if isinstance(v, np.integer):
+        return int(v)
+    return v
+
+
+def _dump(obj):
+    return json.dumps(_clean(obj))
+
+
+def run_stream(lines, shot, out=sys.stdout, events_only=False):
+    """Feed JSON lines (one tracking frame each) through ``shot`` and print results."""
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            frame = json.loads(line)
+        except ValueError as e:
+            print(f"[WARN] Skipping bad frame line: {e}", file=sys.stderr)
+            continue
+        if not isinstance(frame, dict):
+            print("[WARN] Skipping frame line that is not a JSON object", file=sys.stderr)
+            continue
+        if frame.get("reset"):
+            shot.reset()
+            continue
+        angles, event = shot.update(frame)
+        if not events_only:
+            out.write(_dump({"frame": frame.get("frame"), "angles": angles}) + "\n")
+        if event is not None:
+            out.write(_dump(event) + "\n")
+        out.flush()
+
+
+def serve(port, shot, events_only=False):
+    """Accept JSON-lines connections on localhost:``port`` one at a time (a new shot each)."""
+    with socket.create_server(("127.0.0.1", port)) as srv:
+        print(f"[INFO] Listening on 127.0.0.1:{port}", file=sys.stderr)
+        while True:
+            conn, addr = srv.accept()
+            with conn, conn.makefile("r", encoding="utf-8") as rf, conn.makefile("w", encoding="utf-8") as wf:
+                shot.reset()
+                run_stream(rf, shot, out=wf, events_only=events_only)
+
+
+def replay(path, side=sm.SHOOTING_SIDE, fps=sm.FPS, smooth_win=sm.SMOOTH_WIN):
+    """Feed a JSON trial through ``OnlineShot`` and compare with the offline analysis.
+
+    Angle differences are against the offline angles without the low-pass
+    stage, smoothed with the centred moving average and shifted by the causal
+    lag, i.e. what the live value at frame i should equal at i - lag.
+    """
+    shot = OnlineShot(side=side, fps=fps, smooth_win=smooth_win)
+    online, lat, event = [], [], None
+    for frame in tracking.iter_frames(path):
+        t0 = time.perf_counter()
+        angles, ev = shot.update(frame)
+        lat.append(time.perf_counter() - t0)
+        online.append([angles[n] for n in shot.names])
+        event = event or ev
+    _, events, mags = sm.analyze(sm.read_trial(path), side=side, fps=fps, smooth_win=smooth_win, lowpass=None)
+    online = np.asarray(online, float)
+    diff = {}
+    for j, n in enumerate(shot.names):
+        if n in mags:
+            offline = release.smooth_series(mags[n], smooth_win)
+            d = np.abs(online[shot.lag:, j] - offline[:len(offline) - shot.lag])
+            diff[n] = float(np.nanmean(d)) if np.isfinite(d).any() else None
+    lat = np.asarray(lat) * 1000.0
+    return {
+        "trial": Path(path).name, "frames": len(online),
+        "offline_release": events["release"],
+        "online_release": event["frame"] if event else None,
+        "detected_at": event["detected_at"] if event else None,
+        "latency_frames": event["latency_frames"] if event else None,
+        "frame_ms_mean": float(lat.mean()) if lat.size else None,
+        "frame_ms_max": float(lat.max()) if lat.size else None,
+        "angle_mean_abs_diff": diff,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Live free-throw angles and release detection.")
+    src = parser.add_mutually_exclusive_group()
+    src.add_argument("--listen", type=int, metavar="PORT", help="Read JSON lines from TCP connections on localhost")
+    src.add_argument("--replay", nargs="+", metavar="JSON",
+                     help="Replay trial JSON file(s)/globs and compare with the offline result")
+    parser.add_argument("--side", choices=("R", "L"), default=sm.SHOOTING_SIDE.upper(),
+                        help=f"Shooting side (default: {sm.SHOOTING_SIDE})")
+    parser.add_argument("--fps", type=float, default=sm.FPS, help=f"Frames per second (default: {sm.FPS:g})")
+    parser.add_argument("--smooth", type=int, default=sm.SMOOTH_WIN,
+                        help=f"Causal smoothing window, frames (default: {sm.SMOOTH_WIN})")
+    parser.add_argument("--events-only", action="store_true", help="Only print release events")
+    args = parser.parse_args()
+
+    if args.replay:
+        paths = sorted({p for spec in args.replay for p in (glob.glob(spec) or [spec])})
+        for p in paths:
+            r = replay(p, side=args.side, fps=args.fps, smooth_win=args.smooth)
+            print(_dump(r))
+            rel = (f"release offline {r['offline_release']} / online {r['online_release']} "
+                   f"(confirmed at frame {r['detected_at']}, +{r['latency_frames']} frames)")
+            print(f"[INFO] {r['trial']}: {rel}; per-frame {r['frame_ms_mean']:.2f} ms mean, "
+                  f"{r['frame_ms_max']:.2f} ms max", file=sys.stderr)
+        return
+    shot = OnlineShot(side=args.side, fps=args.fps, smooth_win=args.smooth)
+    if args.listen:
+        serve(args.listen, shot, events_only=args.events_only)
+    else:
+        run_stream(sys.stdin, shot, events_only=args.events_only)
+
+
+if __name__ == "__main__":
+    main()